@@ -0,0 +1,150 @@
+import collections
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from .models import ComplianceResult, ProductListings
+from modules.compliance_batch import ComplianceSummary, audit_chunk, audit_listings, check_chunk, check_listings, init_worker, make_checkers
+
+LISTING_FIELDS = ('product_id', 'product_title', 'product_description', 'images_list', 'price', 'product_details', 'about_this_item')
+
+PRICE_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+def parse_price(value):
+    """Best-effort float from a stored price string such as "₹2,499.00"; 0.0 if there is none."""
+    if not value:
+        return 0.0
+    match = PRICE_NUMBER.search(str(value).replace(',', ''))
+    return float(match.group()) if match else 0.0
+
+
+def bullet_points(value):
+    """about_this_item is stored either as one text with a line per bullet or as a list."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.splitlines()
+    return [str(line).strip() for line in value if str(line).strip()]
+
+
+def listing_kwargs(row):
+    """
+    Map a ProductListings row (as a dict of LISTING_FIELDS) to ProductListing keyword arguments.
+
+    product_details keys are lowercased with spaces turned into underscores, so
+    "Brand" satisfies a RequiredAttributeRule for "brand".
+    """
+    details = row.get('product_details')
+    attributes = {}
+    if isinstance(details, dict):
+        attributes = {str(key).strip().lower().replace(' ', '_'): value for key, value in details.items()}
+    return {
+        "product_id": row['product_id'],
+        "title": row.get('product_title') or "",
+        "description": row.get('product_description') or "",
+        "images": list(row.get('images_list') or []),
+        "price": parse_price(row.get('price')),
+        "category": str(attributes.get('category') or ""),
+        "attributes": attributes,
+        "bullet_points": bullet_points(row.get('about_this_item')),
+    }
+
+
+class BatchComplianceChecker:
+    """
+    Checks every listing in the database against a marketplace profile.
+
+    Listings are streamed from the database in chunks and checked on a pool of
+    worker processes, each holding its own compiled profile. Only a bounded
+    number of chunks is in flight, so memory stays flat however large the
+    catalog is. Results are upserted per chunk into ComplianceResult.
+
+    With columnar checking the structural rules of each chunk are evaluated as
+    NumPy comparisons (see ColumnarChecker); when results are not saved, the
+    chunk is only aggregated and no per-listing reports are built at all.
+    """
+
+    def __init__(self, profile, chunk_size=None, processes=None, columnar=None):
+        """
+        :param profile: MarketplaceProfile to check against.
+        :param chunk_size: Listings read, checked and saved per chunk.
+        :param processes: Worker processes; 1 checks in this process.
+        :param columnar: Evaluate structural rules column-wise; defaults to COMPLIANCE_COLUMNAR.
+        """
+        self.profile = profile
+        self.chunk_size = chunk_size or settings.COMPLIANCE_CHUNK_SIZE
+        self.processes = processes or settings.COMPLIANCE_PROCESSES
+        self.columnar = settings.COMPLIANCE_COLUMNAR if columnar is None else columnar
+
+    def iter_chunks(self, queryset):
+        chunk = []
+        for row in queryset.values(*LISTING_FIELDS).order_by('pk').iterator(chunk_size=self.chunk_size):
+            chunk.append(listing_kwargs(row))
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def save_results(self, results):
+        marketplace = self.profile.marketplace_name
+        ComplianceResult.objects.bulk_create(
+            [
+                ComplianceResult(
+                    listing_id=result["product_id"],
+                    marketplace=marketplace,
+                    compliance_score=result["compliance_score"],
+                    is_compliant=result["is_compliant"],
+                    issues=result["issues"],
+                    rule_results=result["rule_results"],
+                    input_digests=result["input_digests"],
+                )
+                for result in results
+            ],
+            update_conflicts=True,
+            unique_fields=['listing', 'marketplace'],
+            update_fields=['compliance_score', 'is_compliant', 'issues', 'rule_results', 'input_digests', 'checked_at'],
+        )
+
+    def _iter_results(self, chunks, audit=False):
+        if self.processes <= 1:
+            checker, columnar = make_checkers(self.profile, self.columnar)
+            for chunk in chunks:
+                yield audit_listings(columnar, chunk) if audit else check_listings(checker, chunk, columnar)
+            return
+
+        window = self.processes * 2
+        with ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(self.profile, self.columnar),
+        ) as pool:
+            in_flight = collections.deque()
+            for chunk in chunks:
+                in_flight.append(pool.submit(audit_chunk if audit else check_chunk, chunk))
+                if len(in_flight) >= window:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def run(self, queryset=None, save=True):
+        """
+        Check all listings in queryset (default: every listing).
+
+        :param save: Upsert a ComplianceResult per listing.
+        :return: Summary dict with totals, average score and violations by rule and severity.
+        """
+        queryset = ProductListings.objects.all() if queryset is None else queryset
+        summary = ComplianceSummary(self.profile.marketplace_name)
+        audit = self.columnar and not save
+        for results in self._iter_results(self.iter_chunks(queryset), audit=audit):
+            if audit:
+                summary.add_batch(results["scores"], results["compliant"], results["violations"])
+                continue
+            if save:
+                self.save_results(results)
+            for result in results:
+                summary.add(result)
+        return summary.to_dict()
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import ConnectedSocialMedia, ProductListings
+
+LISTING_COUNTS_CACHE_KEY = 'dashboard:listing_counts'
+SOCIAL_COUNT_CACHE_KEY = 'dashboard:connected_social_media'
+# Cached counts are dropped by signals when a listing changes them. Writes that bypass
+# signals (QuerySet.update(), bulk_create) are only picked up once the entry expires;
+# the timeout is set when the entry is computed and never extended.
+STATS_CACHE_TIMEOUT = 600
+
+# One conditional aggregate computes every listing counter in a single scan
+LISTING_AGGREGATES = {
+    'total_listings': Count('pk'),
+    'approved_listings': Count('pk', filter=Q(approved=True)),
+    'disapproved_listings': Count('pk', filter=Q(approved=False)),
+}
+
+
+def compute_listing_counts():
+    return ProductListings.objects.aggregate(**LISTING_AGGREGATES)
+
+
+def compute_connected_social_media_count():
+    connected_social_media = ConnectedSocialMedia.objects.first()
+    if not connected_social_media:
+        return 0
+    links = [
+        connected_social_media.instagram_link,
+        connected_social_media.facebook_link,
+        connected_social_media.tiktok_link,
+    ]
+    return sum(1 for link in links if link.strip())
+
+
+def get_dashboard_stats():
+    """
+    Dashboard counters, served from the cache and computed with one query on a miss.
+    """
+    stats = dict(cache.get_or_set(LISTING_COUNTS_CACHE_KEY, compute_listing_counts, STATS_CACHE_TIMEOUT))
+    stats['connected_social_media'] = cache.get_or_set(
+        SOCIAL_COUNT_CACHE_KEY, compute_connected_social_media_count, STATS_CACHE_TIMEOUT
+    )
+    return stats
+
+
+def get_daily_series(days):
+    """
+    Per-day created/approved/disapproved counts for the last `days` days, using
+    the same conditional aggregates grouped by creation date.
+    """
+    since = timezone.now() - timedelta(days=days)
+    rows = (
+        ProductListings.objects.filter(created_at__gte=since)
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(**LISTING_AGGREGATES)
+        .order_by('day')
+    )
+    return [
+        {
+            "date": row['day'].isoformat(),
+            "created": row['total_listings'],
+            "approved": row['approved_listings'],
+            "disapproved": row['disapproved_listings'],
+        }
+        for row in rows
+    ]
+
+
+def apply_listing_change(created=False, deleted=False, old_approved=None, new_approved=None):
+    """
+    Drop the cached listing counters if a saved or deleted listing changes them.
+
+    The entry is deleted (not adjusted) once the surrounding transaction commits,
+    so concurrent workers cannot lose each other's updates and a rolled back save
+    leaves the counters alone; the next read recomputes them with one query.
+    Edits that keep the approval state do not touch the cache.
+    """
+    if not created and not deleted and old_approved is not None and old_approved == new_approved:
+        return
+    transaction.on_commit(lambda: cache.delete(LISTING_COUNTS_CACHE_KEY))
+
+
+def invalidate_connected_social_media_count():
+    transaction.on_commit(lambda: cache.delete(SOCIAL_COUNT_CACHE_KEY))
@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+from django.conf import settings
+
+GEMINI_BACKEND_API = "api"
+GEMINI_BACKEND_STUB = "stub"
+
+
+class GenaiBackend:
+    """
+    Backend talking to the Gemini API through google.generativeai.
+
+    The SDK keeps its configuration (API key, transport and the underlying
+    gRPC/HTTP channel) globally, so it is configured exactly once here.
+    """
+
+    def __init__(self, api_key, transport=None):
+        import google.generativeai as genai
+        self.genai = genai
+        options = {"api_key": api_key}
+        if transport:
+            options["transport"] = transport
+        genai.configure(**options)
+
+    def model(self, model_name, generation_config=None):
+        return self.genai.GenerativeModel(model_name=model_name, generation_config=generation_config)
+
+    def upload_file(self, path):
+        return self.genai.upload_file(path=path)
+
+    def get_file(self, name):
+        return self.genai.get_file(name)
+
+
+class StubBackend:
+    """
+    Local stand-in for the Gemini API, for tests and benchmarks.
+
+    Every call is answered by responder(model_name, contents) after an optional
+    fixed latency and recorded in self.calls. The default responder returns an
+    empty product JSON for prompts that ask for JSON and a fixed description
+    otherwise.
+    """
+
+    def __init__(self, responder=None, latency=0.0):
+        self.responder = responder or self.default_responder
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_responder(model_name, contents):
+        prompt = " ".join(part for part in contents if isinstance(part, str))
+        if "JSON" in prompt:
+            return json.dumps({
+                "product_title": "Stub product",
+                "price": "",
+                "product_details": [],
+                "about_this_item": "",
+                "product_description": "",
+            })
+        return "A product photographed on a plain background."
+
+    def _respond(self, model_name, contents):
+        with self._lock:
+            self.calls.append((model_name, contents))
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(text=self.responder(model_name, contents))
+
+    def model(self, model_name, generation_config=None):
+        backend = self
+
+        class StubModel:
+            def generate_content(self, contents, request_options=None, generation_config=None):
+                if not isinstance(contents, (list, tuple)):
+                    contents = [contents]
+                return backend._respond(model_name, list(contents))
+
+        return StubModel()
+
+    def upload_file(self, path):
+        return SimpleNamespace(name=f"files/{abs(hash(path))}", uri=f"stub://{path}", state=SimpleNamespace(name="ACTIVE"))
+
+    def get_file(self, name):
+        return SimpleNamespace(name=name, uri=f"stub://{name}", state=SimpleNamespace(name="ACTIVE"))
+
+
+class GeminiClient:
+    """
+    Shared entry point for Gemini calls.
+
+    Model handles are created once per (model name, generation config) and reused
+    across requests; the per-request timeout defaults to settings.GEMINI_TIMEOUT.
+    """
+
+    def __init__(self, backend, timeout=None):
+        self.backend = backend
+        self.timeout = timeout or settings.GEMINI_TIMEOUT
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def model(self, model_name, generation_config=None):
+        key = (model_name, json.dumps(generation_config, sort_keys=True, default=str) if generation_config else None)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self.backend.model(model_name, generation_config=generation_config)
+                self._models[key] = model
+            return model
+
+    def generate(self, model_name, contents, timeout=None, generation_config=None):
+        """
+        Run generate_content on a cached model handle.
+
+        :param model_name: Gemini model, e.g. settings.GEMINI_TEXT_MODEL.
+        :param contents: Prompt string or list of prompt parts (text, images, uploaded files).
+        :param timeout: Request timeout in seconds; defaults to the client timeout.
+        :param generation_config: Optional generation config; each distinct config gets its own handle.
+        :return: The SDK response.
+        """
+        model = self.model(model_name, generation_config)
+        return model.generate_content(contents, request_options={"timeout": timeout or self.timeout})
+
+    def upload_file(self, path):
+        return self.backend.upload_file(path)
+
+    def get_file(self, name):
+        return self.backend.get_file(name)
+
+
+_gemini_client = None
+_gemini_client_key = None
+_gemini_client_lock = threading.Lock()
+
+
+def get_gemini_client(api_key=None):
+    """
+    Return the process-wide GeminiClient, configured from settings.
+
+    The SDK supports one API key per process, so asking for a different key
+    replaces the shared client.
+    """
+    global _gemini_client, _gemini_client_key
+    api_key = api_key or settings.GOOGLE_API_KEY
+    with _gemini_client_lock:
+        if _gemini_client is None or api_key != _gemini_client_key:
+            if settings.GEMINI_BACKEND == GEMINI_BACKEND_STUB:
+                backend = StubBackend()
+            else:
+                backend = GenaiBackend(api_key, transport=settings.GEMINI_TRANSPORT)
+            _gemini_client = GeminiClient(backend)
+            _gemini_client_key = api_key
+        return _gemini_client
+
+
+def set_gemini_client(client):
+    """Replace the process-wide client, e.g. with a GeminiClient(StubBackend()) in tests."""
+    global _gemini_client, _gemini_client_key
+    with _gemini_client_lock:
+        _gemini_client = client
+        _gemini_client_key = settings.GOOGLE_API_KEY
@@ -1,16 +1,213 @@
 import cv2
+import heapq
+import itertools
 import os
-import requests
-import tempfile
 import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
 from urllib.parse import urlparse
+import numpy as np
+from .MediaCache import get_media_store, file_sha256
+from .MediaDownloader import get_downloader
+
+# Images larger than this on their longer side are downscaled to it (aspect ratio kept) before
+# scoring, so scoring cost does not depend on source resolution. Smaller images are scored as is:
+# upscaling smooths them and would make sharp small photos look blurry.
+ANALYSIS_MAX_SIDE = 512
+
+# Minimum sharpness, in full-resolution cv2.Laplacian variance, for an image to count as sharp
+SHARPNESS_THRESHOLD = 100.0
+
+# Downscaling by a factor s raises the Laplacian variance; multiplying the analysis-resolution
+# variance by s ** DOWNSCALE_EXPONENT estimates the full-resolution value. Checked per source size
+# (200-3200 px long side, photos and 1/f noise blurred at different strengths) against
+# "full-resolution variance > 100": identical up to 512 px, at least 95% agreement above.
+DOWNSCALE_EXPONENT = 1.2
+
+
+def full_resolution_sharpness(variance, scale):
+    """Estimate the full-resolution Laplacian variance from one measured after downscaling by scale."""
+    return float(variance) * scale ** DOWNSCALE_EXPONENT
+
+
+def laplacian_variance_batch(stack):
+    """
+    Variance of the 4-neighbour Laplacian (same kernel as cv2.Laplacian with ksize=1)
+    for every image in an (N, H, W) grayscale stack.
+    """
+    center = stack[:, 1:-1, 1:-1]
+    laplacian = (stack[:, :-2, 1:-1] + stack[:, 2:, 1:-1] + stack[:, 1:-1, :-2] + stack[:, 1:-1, 2:]) - 4.0 * center
+    return laplacian.var(axis=(1, 2))
+
+
+def tenengrad_batch(stack):
+    """Mean squared Sobel gradient magnitude for every image in the stack."""
+    gx = (stack[:, :-2, 2:] + 2.0 * stack[:, 1:-1, 2:] + stack[:, 2:, 2:]) - (stack[:, :-2, :-2] + 2.0 * stack[:, 1:-1, :-2] + stack[:, 2:, :-2])
+    gy = (stack[:, 2:, :-2] + 2.0 * stack[:, 2:, 1:-1] + stack[:, 2:, 2:]) - (stack[:, :-2, :-2] + 2.0 * stack[:, :-2, 1:-1] + stack[:, :-2, 2:])
+    return (gx * gx + gy * gy).mean(axis=(1, 2))
+
+
+def exposure_batch(stack):
+    """Mean brightness (0-1) and fraction of crushed shadows / blown highlights per image."""
+    return {
+        'brightness': stack.mean(axis=(1, 2)) / 255.0,
+        'clipped_dark': (stack <= 5.0).mean(axis=(1, 2)),
+        'clipped_bright': (stack >= 250.0).mean(axis=(1, 2)),
+    }
+
+
+QUALITY_METRICS = {
+    'laplacian': laplacian_variance_batch,
+    'tenengrad': tenengrad_batch,
+    'exposure': exposure_batch,
+}
+
+
+def score_stack(stack, metrics):
+    """
+    Compute the requested metrics on a grayscale stack.
+
+    Returns:
+    - Dict of metric name -> 1-D array with one value per image.
+    """
+    stack = stack.astype(np.float32)
+    scores = {}
+    for metric in metrics:
+        result = QUALITY_METRICS[metric](stack)
+        if isinstance(result, dict):
+            scores.update(result)
+        else:
+            scores[metric] = result
+    return scores
+
+
+def score_grays(grays, metrics=('laplacian',)):
+    """
+    Compute the requested metrics for grayscale images of possibly different shapes.
+
+    Images of the same shape are stacked and scored together.
+
+    Returns:
+    - List with one dict of metric values per image, in input order.
+    """
+    results = [None] * len(grays)
+    for indexes, stack in _shape_groups(grays):
+        _scatter(results, indexes, score_stack(stack, metrics))
+    return results
+
+
+def _shape_groups(grays):
+    """Split grayscale images into (indexes, stack) groups of equal shape."""
+    groups = {}
+    for index, gray in enumerate(grays):
+        groups.setdefault(gray.shape, []).append(index)
+    return [(indexes, np.stack([grays[index] for index in indexes])) for indexes in groups.values()]
+
+
+def _scatter(results, indexes, scores):
+    names = list(scores)
+    for index, values in zip(indexes, zip(*(scores[name] for name in names))):
+        results[index] = {name: float(value) for name, value in zip(names, values)}
+
+
+def image_signature(gray):
+    """Tiny normalized thumbnail used to tell near-identical images apart."""
+    return cv2.resize(gray, (16, 16), interpolation=cv2.INTER_AREA).astype(np.float32).ravel() / 255.0
+
+
+def signature_distance(a, b):
+    """Mean absolute difference between two signatures (0 = identical, 1 = inverted)."""
+    return float(np.abs(np.asarray(a) - np.asarray(b)).mean())
+
+
+class TopKSelector:
+    """
+    Keeps the k best-scoring candidates seen so far in a bounded min-heap.
+
+    With min_distance set, a candidate whose signature is within that distance of
+    an already selected one competes with it instead of taking a separate slot, so
+    near-identical adjacent frames are not all returned. With confidence_threshold
+    set, the selector reports done once it holds k candidates scoring at least
+    that much, letting callers stop scoring early.
+    """
+
+    def __init__(self, k=3, min_distance=None, confidence_threshold=None):
+        self.k = k
+        self.min_distance = min_distance
+        self.confidence_threshold = confidence_threshold
+        self._heap = []  # (score, sequence, key, item, signature)
+        self._sequence = itertools.count()
+
+    @property
+    def done(self):
+        if self.confidence_threshold is None or len(self._heap) < self.k:
+            return False
+        return self._heap[0][0] >= self.confidence_threshold
+
+    def offer(self, score, key, item=None, signature=None):
+        """
+        Consider a candidate.
+
+        Returns:
+        - True if the candidate is currently among the selected ones.
+        """
+        entry = (score, next(self._sequence), key, item, signature)
+
+        if self.min_distance is not None and signature is not None:
+            similar = [
+                index for index, held in enumerate(self._heap)
+                if held[4] is not None and signature_distance(held[4], signature) < self.min_distance
+            ]
+            if similar:
+                if any(score <= self._heap[index][0] for index in similar):
+                    return False
+                # Better shot of the same scene than every similar selected one: takes their place
+                for index in reversed(similar):
+                    self._heap.pop(index)
+                self._heap.append(entry)
+                heapq.heapify(self._heap)
+                return True
+
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if score > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def results(self):
+        """
+        Returns:
+        - List of (key, item, score) for the selected candidates, best first.
+        """
+        return [(key, item, score) for score, _, key, item, _ in sorted(self._heap, key=lambda x: x[0], reverse=True)]
+
 
 class ImageQualityChecker:
-    def __init__(self, images_list, threshold=100.0):
+    def __init__(self, images_list, threshold=SHARPNESS_THRESHOLD, analysis_max_side=ANALYSIS_MAX_SIDE, batch_size=16,
+                 processes=None, top_n=3, min_distance=0.04, confidence_threshold=None):
+        """
+        Parameters:
+        - images_list: Image URLs or local paths to check.
+        - threshold: Minimum full-resolution Laplacian variance for an image to count as sharp.
+        - analysis_max_side: Longer side larger images are downscaled to before scoring.
+        - batch_size: Number of images scored together in one vectorized pass.
+        - processes: Optional number of worker processes to spread batch scoring over.
+        - top_n: Number of images to select.
+        - min_distance: Minimum signature distance between selected images; None disables the diversity check.
+        - confidence_threshold: Stop scoring once top_n images reach this score; None scores everything.
+        """
         self.images_list = images_list
         self.threshold = threshold
-        self.quality_scores = []
+        self.analysis_max_side = analysis_max_side
+        self.batch_size = batch_size
+        self.processes = processes
+        self.top_n = top_n
+        self.min_distance = min_distance
+        self.confidence_threshold = confidence_threshold
+        self.selector = None
         self.temp_files = []  # Track temp files to clean up later
+        self.image_digests = {}  # image_url -> SHA-256 of its content
 
     def calculate_laplacian_variance(self, image):
         """
@@ -28,7 +225,7 @@ class ImageQualityChecker:
         return laplacian_var
 
     def download_image(self, image_url):
-        """Download an image from URL to a temporary file and return the file path"""
+        """Locate a local image or fetch a remote one through the media store and return the file path"""
         try:
             # Parse the URL to handle both absolute and relative URLs
             parsed_url = urlparse(image_url)
@@ -51,69 +248,224 @@ class ImageQualityChecker:
                 if os.path.exists(full_path):
                     return full_path
             
-            # For HTTP URLs, download the image
-            response = requests.get(image_url, stream=True)
-            response.raise_for_status()
-            
-            # Create a temporary file
-            fd, temp_path = tempfile.mkstemp(suffix=".jpg")
-            self.temp_files.append(temp_path)  # Track for cleanup
-            
-            # Write the image data to the temp file
-            with os.fdopen(fd, 'wb') as temp_file:
-                for chunk in response.iter_content(chunk_size=1024):
-                    if chunk:
-                        temp_file.write(chunk)
-                        
-            return temp_path
+            # For HTTP URLs, reuse the cached copy or download it once into the media store
+            sha256, path = get_media_store().fetch(image_url, ext=".jpg")
+            self.image_digests[image_url] = sha256
+            return path
             
         except Exception as e:
             print(f"Error downloading image from {image_url}: {str(e)}")
             return None
 
-    def process_images(self):
+    def _score_files(self, image_paths):
+        """
+        Read image files and score them together at the analysis resolution.
+
+        Returns:
+        - List with a dict of the Laplacian variance and signature per file, or None for files that cannot be decoded.
+        """
+        images = [cv2.imread(image_path) for image_path in image_paths]
+        decoded = [image for image in images if image is not None]
+        grays = [self.to_analysis_gray(image) for image in decoded]
+        scores = iter(self.score_batch(grays))
+        scored = iter(zip(decoded, grays))
+        results = []
+        for image in images:
+            if image is None:
+                results.append(None)
+                continue
+            original, gray = next(scored)
+            laplacian = full_resolution_sharpness(next(scores)["laplacian"], self.analysis_scale(original))
+            results.append({"laplacian": laplacian, "signature": image_signature(gray).tolist()})
+        return results
+
+    @property
+    def memo_kind(self):
+        # Scores depend on the analysis resolution, so memos of another resolution are not reused
+        return f"sharpness-{self.analysis_max_side}"
+
+    def _new_selector(self, top_n):
+        return TopKSelector(top_n, min_distance=self.min_distance, confidence_threshold=self.confidence_threshold)
+
+    def process_images(self, selector=None):
         """
         Processes all images in the list, calculates their quality scores,
         and filters out blurry images based on the threshold.
+
+        Parameters:
+        - selector: TopKSelector fed with every sharp image (a new one keeping
+          top_n images by default); scoring stops early once it reports done.
         """
-        for image_url in self.images_list:
-            try:
-                # Download image if it's a URL
-                local_image_path = self.download_image(image_url)
-                
-                if not local_image_path:
-                    print(f"Failed to download or locate image: {image_url}")
-                    continue
-                
-                # Read the local image file
-                image = cv2.imread(local_image_path)
-                if image is None:
-                    print(f"Could not read file: {local_image_path}")
-                    continue
-                
-                laplacian_var = self.calculate_laplacian_variance(image)
+        if selector is None:
+            selector = self._new_selector(self.top_n)
+        self.selector = selector
+        # Downloads run ahead of scoring on the shared pool, a few at a time
+        local_paths = get_downloader().imap(self.download_image, self.images_list)
+        downloads = zip(self.images_list, local_paths)
+        while True:
+            if selector.done:
+                print("Enough high quality images found, skipping the rest")
+                local_paths.close()
+                break
+            # Images whose scores are not memoized yet are decoded and scored a batch at a time
+            chunk = list(itertools.islice(downloads, self.batch_size))
+            if not chunk:
+                break
+            for image_url, quality in self._chunk_qualities(chunk):
+                laplacian_var = quality["laplacian"]
                 if laplacian_var > self.threshold:
-                    # Store original URL, not the temporary file path
-                    self.quality_scores.append((image_url, laplacian_var))
+                    # Keep the original URL, not the temporary file path
                     print(f"Image quality score for {image_url}: {laplacian_var}")
-                
+                    selector.offer(laplacian_var, image_url, signature=quality["signature"])
+
+    def _chunk_qualities(self, chunk):
+        """
+        Look up or compute the memoized quality of each downloaded image in the chunk.
+
+        Parameters:
+        - chunk: List of (image_url, local path or None).
+
+        Returns:
+        - List of (image_url, quality dict) for the images that could be scored, in input order.
+        """
+        store = get_media_store()
+        qualities = {}
+        pending = []  # (image_url, sha256, local path) not memoized yet
+        for image_url, local_image_path in chunk:
+            if not local_image_path:
+                print(f"Failed to download or locate image: {image_url}")
+                continue
+            try:
+                sha256 = self.image_digests.get(image_url) or file_sha256(local_image_path)
+                found, quality = store.get_memo(sha256, self.memo_kind)
+                if found:
+                    qualities[image_url] = quality
+                else:
+                    pending.append((image_url, sha256, local_image_path))
             except Exception as e:
                 print(f"Error processing image {image_url}: {str(e)}")
 
+        if pending:
+            try:
+                for (image_url, sha256, _), quality in zip(pending, self._score_files([path for _, _, path in pending])):
+                    store.set_memo(sha256, self.memo_kind, quality)
+                    qualities[image_url] = quality
+            except Exception as e:
+                print(f"Error scoring images: {str(e)}")
+
+        results = []
+        for image_url, local_image_path in chunk:
+            if image_url not in qualities:
+                continue
+            if qualities[image_url] is None:
+                print(f"Could not read file: {local_image_path}")
+                continue
+            results.append((image_url, qualities[image_url]))
+        return results
+
+    def analysis_scale(self, image):
+        """Factor to_analysis_gray resizes the image by (1.0 for images not larger than analysis_max_side)."""
+        height, width = image.shape[:2]
+        return min(1.0, self.analysis_max_side / max(height, width))
+
+    def to_analysis_gray(self, image):
+        """Grayscale uint8 copy of a BGR image, downscaled so its longer side is at most analysis_max_side."""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        scale = self.analysis_scale(gray)
+        if scale >= 1:
+            return gray
+        height, width = gray.shape[:2]
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+    def score_batch(self, images, metrics=('laplacian',)):
+        """
+        Score many images with vectorized metrics at the analysis resolution.
+
+        Parameters:
+        - images: Iterable of BGR (or grayscale) ndarrays.
+        - metrics: Names from QUALITY_METRICS: "laplacian", "tenengrad", "exposure".
+
+        Returns:
+        - List with one dict of metric values per image, in input order. Values are measured at the
+          analysis resolution; see full_resolution_sharpness to compare Laplacian variances across sizes.
+        """
+        for metric in metrics:
+            if metric not in QUALITY_METRICS:
+                raise ValueError(f"Unknown quality metric: {metric}")
+
+        # Images keep their aspect ratio, so each chunk is stacked per shape
+        groups = []
+        offset = 0
+        images = iter(images)
+        while True:
+            chunk = list(itertools.islice(images, self.batch_size))
+            if not chunk:
+                break
+            grays = [self.to_analysis_gray(image) for image in chunk]
+            groups.extend(([offset + index for index in indexes], stack) for indexes, stack in _shape_groups(grays))
+            offset += len(chunk)
+
+        stacks = [stack for _, stack in groups]
+        if self.processes and len(stacks) > 1:
+            with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                group_scores = list(pool.map(score_stack, stacks, itertools.repeat(metrics)))
+        else:
+            group_scores = [score_stack(stack, metrics) for stack in stacks]
+
+        results = [None] * offset
+        for (indexes, _), scores in zip(groups, group_scores):
+            _scatter(results, indexes, scores)
+        return results
+
+    def start_from_frames(self, frames, top_n=None):
+        """
+        Score in-memory frames as they arrive and keep only the best ones.
+
+        Parameters:
+        - frames: Iterable of (frame_number, BGR ndarray).
+        - top_n: Number of frames to keep (defaults to self.top_n).
+
+        Returns:
+        - List of (frame_number, frame, score) above the threshold, best first.
+        """
+        selector = self._new_selector(top_n or self.top_n)
+        frames = iter(frames)
+        while not selector.done:
+            # Score frames a batch at a time so only batch_size decoded frames are held at once
+            chunk = list(itertools.islice(frames, self.batch_size))
+            if not chunk:
+                break
+            grays = [self.to_analysis_gray(frame) for _, frame in chunk]
+            scores = [
+                full_resolution_sharpness(quality['laplacian'], self.analysis_scale(frame))
+                for (_, frame), quality in zip(chunk, score_grays(grays))
+            ]
+            for (frame_number, frame), gray, score in zip(chunk, grays, scores):
+                if score > self.threshold:
+                    selector.offer(score, frame_number, frame, image_signature(gray))
+                if selector.done:
+                    break
+        if hasattr(frames, 'close'):
+            # Stop decoding the rest of the video when we exited early
+            frames.close()
+        return selector.results()
+
     def sort_images_by_quality(self):
         """
-        Sorts the processed images by quality score in descending order.
+        Kept for compatibility: the selector already returns images best first.
         """
-        self.quality_scores.sort(key=lambda x: x[1], reverse=True)
 
     def get_sorted_images(self):
         """
-        Returns the sorted list of good quality images and their scores.
+        Returns the selected good quality images and their scores, best first.
 
         Returns:
         - List of tuples containing (filename, quality_score).
         """
-        return self.quality_scores
+        if self.selector is None:
+            return []
+        return [(image_url, score) for image_url, _, score in self.selector.results()]
 
     def start(self):
         """
@@ -121,7 +473,6 @@ class ImageQualityChecker:
         """
         print(f"Starting quality check for {len(self.images_list)} images")
         self.process_images()
-        self.sort_images_by_quality()
         
         # Clean up any temporary files
         for temp_file in self.temp_files:
@@ -131,16 +482,15 @@ class ImageQualityChecker:
             except:
                 pass
         
-        # Return top 3 images or all if less than 3
-        top_images = self.get_sorted_images()[:3]
-        result = [image[0] for image in top_images]
+        # Return the top_n most distinct sharp images, or all if there are fewer
+        result = [image_url for image_url, _ in self.get_sorted_images()]
         print(f"Top quality images: {result}")
         return result
 
 # Example usage
 if __name__ == "__main__":
     input_directory = "static"  # Change to your directory
-    sharpness_threshold = 100.0  # Adjust based on your quality needs
+    sharpness_threshold = SHARPNESS_THRESHOLD  # Adjust based on your quality needs
     
     # Initialize the ImageQualityChecker class
     checker = ImageQualityChecker(input_directory, sharpness_threshold)
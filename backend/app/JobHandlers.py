@@ -0,0 +1,120 @@
+import time
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from .JobQueue import job_handler
+from .models import ProductListings
+from .ProductIdentity import source_fingerprint, make_product_id
+from .LazyImports import lazy
+
+# Loaded on first job, not when the app registry imports this module
+Social2Amazon = lazy('app.Social2Amazon:Social2Amazon')
+video_frames = lazy('app.VideoFrameExtractor')
+ImageQualityChecker = lazy('app.ImageQualityChecker:ImageQualityChecker')
+
+SOCIAL2AMAZON_JOB = 'social2amazon'
+CONVERT_VIDEO_JOB = 'convert_video_to_images'
+
+
+def save_listing(fingerprint, product_id, fields):
+    """
+    Store the listing of a source post, replacing any earlier listing of that post.
+
+    Two submissions of the same post can both find no listing and both insert;
+    the loser hits the unique source_fingerprint constraint and retries once,
+    updating or replacing the row the winner created.
+
+    :param fingerprint: Source fingerprint of the post.
+    :param product_id: Id of the listing.
+    :param fields: Remaining ProductListings fields.
+    """
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                # A forced re-run may produce a different title; the post keeps a single listing
+                ProductListings.objects.filter(source_fingerprint=fingerprint).exclude(product_id=product_id).delete()
+                ProductListings.objects.update_or_create(
+                    product_id=product_id,
+                    defaults={"source_fingerprint": fingerprint, **fields},
+                )
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+            print(f"Listing for source {fingerprint} was created concurrently, retrying")
+
+
+@job_handler(SOCIAL2AMAZON_JOB)
+def create_listing_from_post(social2amazon_data, stage_timings):
+    """
+    Run the Social2Amazon pipeline on a post and store the resulting listing.
+
+    Posts that were already converted are looked up by their source fingerprint
+    and returned without re-running the pipeline, unless "force" is set.
+
+    :param social2amazon_data: Dict with post_link, image_url, description and optionally force.
+    :param stage_timings: Dict filled with seconds spent per stage.
+    :return: Dict with the product_id and product_title of the listing and whether it was reused.
+    """
+    fingerprint = source_fingerprint(social2amazon_data.get('post_link'), social2amazon_data.get('image_url'))
+    if not social2amazon_data.get('force'):
+        existing = ProductListings.objects.filter(source_fingerprint=fingerprint).only('product_id', 'product_title').first()
+        if existing:
+            return {
+                "product_id": existing.product_id,
+                "product_title": existing.product_title,
+                "reused": True,
+            }
+
+    social2amazon = Social2Amazon(GOOGLE_API_KEY=settings.GOOGLE_API_KEY, refresh_cache=bool(social2amazon_data.get('force')))
+    product_data = social2amazon.process_post(social2amazon_data)
+    stage_timings.update(social2amazon.stage_timings)
+
+    start = time.perf_counter()
+    product_title = product_data.get('product_title')
+    product_id = make_product_id(product_title, fingerprint)
+
+    save_listing(fingerprint, product_id, {
+        "images_list": product_data.get('images_list'),
+        "product_title": product_title,
+        "price": product_data.get('price'),  # Keep as string
+        "product_details": product_data.get('product_details'),
+        "about_this_item": product_data.get('about this item'),
+        "product_description": product_data.get('Product description'),
+    })
+    stage_timings['save'] = time.perf_counter() - start
+
+    return {
+        "product_id": product_id,
+        "product_title": product_title,
+        "reused": False,
+    }
+
+
+@job_handler(CONVERT_VIDEO_JOB)
+def convert_video_to_images(payload, stage_timings):
+    """
+    Extract frames from a video and keep the sharpest ones.
+
+    :param payload: Dict with the video_url and optionally the frame sampling mode ("interval" or "scene").
+    :param stage_timings: Dict filled with seconds spent per stage.
+    :return: Dict with the quality_images URLs.
+    """
+    start = time.perf_counter()
+    extractor = video_frames.VideoFrameExtractor(payload['video_url'], sampling=payload.get('sampling') or video_frames.SAMPLING_INTERVAL)
+    # Frames are scored in memory as they are decoded; only the winners are written to disk
+    frame_files = extractor.extract_best_frames(ImageQualityChecker([]))
+    stage_timings['extract_and_score_frames'] = time.perf_counter() - start
+
+    # Ensure frame_files have full URLs with domain
+    quality_images = []
+    base_url = "http://127.0.0.1:8000" if settings.DEBUG else ""
+
+    for url in frame_files:
+        # Make sure we have a proper URL format
+        if url.startswith('/'):
+            url = f"{base_url}{url}"
+        elif not url.startswith('http') and settings.DEBUG:
+            url = f"{base_url}/{url}"
+        quality_images.append(url)
+
+    return {"quality_images": quality_images}
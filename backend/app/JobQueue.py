@@ -0,0 +1,267 @@
+import threading
+import time
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import ConversionJob
+
+# kind -> callable(payload, stage_timings) -> JSON-serializable result
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """
+    Register a function as the handler for jobs of the given kind.
+
+    The handler receives the job payload and a dict it can fill with per-stage
+    timings in seconds; whatever it returns is stored as the job result.
+    """
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+class DatabaseJobQueue:
+    """
+    Job queue backed by the ConversionJob table, so it runs on the existing
+    database without Redis or any other broker.
+    """
+
+    def enqueue(self, kind, payload):
+        """
+        Create a queued job.
+
+        :return: The saved ConversionJob.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        return ConversionJob.objects.create(kind=kind, payload=payload)
+
+    def __init__(self, lease_seconds=None, max_attempts=None):
+        """
+        :param lease_seconds: How long a claimed job stays reserved without a heartbeat.
+        :param max_attempts: Claims after which an abandoned job is failed instead of requeued.
+        """
+        self.lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+
+    def _lease_expiry(self):
+        return timezone.now() + timedelta(seconds=self.lease_seconds)
+
+    def _owned(self, job):
+        # attempts is incremented by every claim, so it identifies the current claim of the job
+        return ConversionJob.objects.filter(pk=job.pk, status=ConversionJob.STATUS_RUNNING, attempts=job.attempts)
+
+    def claim(self):
+        """
+        Atomically move the oldest queued job to running.
+
+        Uses SKIP LOCKED where the database supports it; elsewhere (SQLite) the
+        conditional update on status makes sure only one worker wins a job.
+
+        :return: The claimed ConversionJob, or None if the queue is empty.
+        """
+        while True:
+            with transaction.atomic():
+                queued = ConversionJob.objects.filter(status=ConversionJob.STATUS_QUEUED).order_by('created_at')
+                if connection.features.has_select_for_update_skip_locked:
+                    queued = queued.select_for_update(skip_locked=True)
+                job = queued.first()
+                if job is None:
+                    return None
+                claimed = ConversionJob.objects.filter(
+                    pk=job.pk, status=ConversionJob.STATUS_QUEUED
+                ).update(
+                    status=ConversionJob.STATUS_RUNNING,
+                    started_at=timezone.now(),
+                    lease_expires_at=self._lease_expiry(),
+                    attempts=F('attempts') + 1,
+                )
+            if claimed:
+                job.refresh_from_db()
+                return job
+            # Another worker took it between the read and the update, try the next one
+
+    def heartbeat(self, job):
+        """
+        Extend the lease of a running job.
+
+        :return: False if the job is no longer held by this claim (its lease expired and it was requeued).
+        """
+        return bool(self._owned(job).update(lease_expires_at=self._lease_expiry()))
+
+    def _finish(self, job, **fields):
+        now = timezone.now()
+        if not self._owned(job).update(finished_at=now, updated_at=now, lease_expires_at=None, **fields):
+            print(f"Job {job.job_id} was reclaimed after its lease expired, dropping this attempt's outcome")
+
+    def complete(self, job, result, stage_timings):
+        self._finish(job, status=ConversionJob.STATUS_SUCCEEDED, result=result, stage_timings=stage_timings)
+
+    def fail(self, job, error, stage_timings):
+        self._finish(job, status=ConversionJob.STATUS_FAILED, error=error, stage_timings=stage_timings)
+
+    def requeue_stale(self):
+        """
+        Handle running jobs whose lease expired because their worker died or hung.
+
+        Jobs claimed fewer than max_attempts times go back on the queue; the rest
+        are marked failed, so a job that kills its worker is not retried forever.
+
+        :return: (number of jobs requeued, number of jobs failed)
+        """
+        now = timezone.now()
+        # Jobs claimed before leases existed have none; treat them as expired
+        expired = ConversionJob.objects.filter(
+            Q(lease_expires_at__lt=now) | Q(lease_expires_at__isnull=True), status=ConversionJob.STATUS_RUNNING
+        )
+        failed = expired.filter(attempts__gte=self.max_attempts).update(
+            status=ConversionJob.STATUS_FAILED,
+            error=f"Worker stopped responding on each of {self.max_attempts} attempts",
+            finished_at=now,
+            updated_at=now,
+            lease_expires_at=None,
+        )
+        requeued = expired.filter(attempts__lt=self.max_attempts).update(
+            status=ConversionJob.STATUS_QUEUED, lease_expires_at=None, updated_at=now
+        )
+        return requeued, failed
+
+    def _keep_alive(self, job, done):
+        interval = min(settings.JOB_HEARTBEAT_INTERVAL, self.lease_seconds / 3)
+        try:
+            while not done.wait(interval):
+                if not self.heartbeat(job):
+                    print(f"Job {job.job_id} lost its lease")
+                    return
+        except Exception as e:
+            print(f"Heartbeat of job {job.job_id} failed: {e}")
+        finally:
+            connection.close()
+
+    def run_job(self, job):
+        """
+        Execute a claimed job with its registered handler and record the outcome.
+        """
+        stage_timings = {}
+        start = time.perf_counter()
+        # Renew the lease from a side thread while the handler runs, so a long job is not requeued
+        done = threading.Event()
+        keep_alive = threading.Thread(target=self._keep_alive, args=(job, done), name=f"job-heartbeat-{job.job_id}", daemon=True)
+        keep_alive.start()
+        try:
+            result = JOB_HANDLERS[job.kind](job.payload, stage_timings)
+        except Exception as e:
+            print(f"Job {job.job_id} failed: {e}")
+            print(traceback.format_exc())
+            stage_timings['total'] = time.perf_counter() - start
+            self.fail(job, str(e), stage_timings)
+        else:
+            stage_timings['total'] = time.perf_counter() - start
+            self.complete(job, result, stage_timings)
+        finally:
+            done.set()
+
+
+class JobWorkerPool:
+    """
+    A pool of local worker threads that pull jobs from a DatabaseJobQueue.
+    """
+
+    def __init__(self, queue=None, workers=None, poll_interval=None):
+        self.queue = queue or DatabaseJobQueue()
+        self.workers = workers or settings.JOB_WORKERS
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._requeue_lock = threading.Lock()
+        self._next_requeue = 0.0
+
+    def start(self):
+        if self._threads:
+            return
+        self.requeue_stale()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        """Wake idle workers after a new job was enqueued."""
+        self._wakeup.set()
+
+    def stop(self, wait=True):
+        self._stopping.set()
+        self._wakeup.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def requeue_stale(self):
+        """
+        Requeue (or fail) jobs with expired leases, at most once per JOB_REQUEUE_INTERVAL across all workers of the pool.
+        """
+        with self._requeue_lock:
+            if time.monotonic() < self._next_requeue:
+                return
+            self._next_requeue = time.monotonic() + settings.JOB_REQUEUE_INTERVAL
+        requeued, failed = self.queue.requeue_stale()
+        if requeued or failed:
+            print(f"Requeued {requeued} and failed {failed} abandoned job(s)")
+
+    def _work(self):
+        while not self._stopping.is_set():
+            # A failing step (e.g. the database going away while recording a result)
+            # must not end the worker thread
+            try:
+                close_old_connections()
+                self.requeue_stale()
+                job = self.queue.claim()
+                if job is None:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+                    continue
+                self.queue.run_job(job)
+            except Exception as e:
+                print(f"Job worker {threading.current_thread().name} error: {e}")
+                print(traceback.format_exc())
+                self._stopping.wait(self.poll_interval)
+        close_old_connections()
+
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """
+    Return the process-wide worker pool, starting it on first use.
+    """
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = JobWorkerPool()
+            _worker_pool.start()
+        return _worker_pool
+
+
+def submit_job(kind, payload):
+    """
+    Enqueue a job and, when in-process workers are enabled, make sure they pick it up.
+
+    :return: The queued ConversionJob.
+    """
+    job = DatabaseJobQueue().enqueue(kind, payload)
+    if settings.JOB_WORKERS_IN_PROCESS:
+        get_worker_pool().notify()
+    return job
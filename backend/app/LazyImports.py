@@ -0,0 +1,79 @@
+import importlib
+import threading
+import time
+
+# Modules that are expensive to import (native extensions, SDKs) and are only
+# needed by the conversion endpoints, not by health checks or dashboard reads.
+HEAVY_MODULES = [
+    'numpy',
+    'cv2',
+    'PIL.Image',
+    'instaloader',
+    'google.generativeai',
+    'app.ImageQualityChecker',
+    'app.VideoFrameExtractor',
+    'app.InstaFetcher',
+    'app.OCRService',
+    'app.Social2Amazon',
+    'modules.compliance_columnar',
+]
+
+
+class LazyObject:
+    """
+    Stand-in for a module attribute that is imported on first use.
+
+    Calling the proxy or reading an attribute from it imports the target once;
+    after that it just forwards to the real object.
+    """
+
+    def __init__(self, target):
+        """
+        :param target: "module.path:attribute", or just "module.path" for a whole module.
+        """
+        self._target = target
+        self._resolved = None
+        self._lock = threading.Lock()
+
+    def _resolve(self):
+        if self._resolved is None:
+            with self._lock:
+                if self._resolved is None:
+                    module_name, _, attribute = self._target.partition(':')
+                    resolved = importlib.import_module(module_name)
+                    self._resolved = getattr(resolved, attribute) if attribute else resolved
+        return self._resolved
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        state = "loaded" if self._resolved is not None else "not loaded"
+        return f"<LazyObject {self._target} ({state})>"
+
+
+def lazy(target):
+    """Return a LazyObject for "module.path:attribute"."""
+    return LazyObject(target)
+
+
+def warmup(modules=None):
+    """
+    Import the heavy modules up front, e.g. in the gunicorn master with --preload
+    so forked workers share them instead of each importing on its first request.
+
+    :return: Dict of module name to seconds spent importing it.
+    """
+    timings = {}
+    for module_name in modules or HEAVY_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(module_name)
+        except ImportError as e:
+            print(f"Warmup could not import {module_name}: {e}")
+            continue
+        timings[module_name] = time.perf_counter() - start
+    return timings
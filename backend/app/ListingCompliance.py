@@ -0,0 +1,83 @@
+import threading
+from django.conf import settings
+from .models import ComplianceResult
+from .ComplianceBatch import LISTING_FIELDS, listing_kwargs
+from modules.eci_complience_checker import ECIChecker, ProductListing, build_profile, changed_fields, listing_field_digests
+
+_checkers = {}
+_checkers_lock = threading.Lock()
+
+
+def get_compliance_checker(marketplace):
+    """Return the process-wide ECIChecker for a default profile, compiled on first use."""
+    key = marketplace.lower()
+    with _checkers_lock:
+        checker = _checkers.get(key)
+        if checker is None:
+            checker = ECIChecker(build_profile(key), instrument=settings.COMPLIANCE_INSTRUMENTATION)
+            _checkers[key] = checker
+        return checker
+
+
+def compliance_checkers():
+    """Return the checkers created so far in this process, by profile name."""
+    with _checkers_lock:
+        return dict(_checkers)
+
+
+class ListingComplianceChecker:
+    """
+    Keeps the stored compliance results of a single listing up to date after an edit.
+
+    The per-rule outcomes and field digests stored with the last check tell which
+    fields the edit changed; only rules reading one of those fields are evaluated
+    again, all others keep their stored outcome.
+    """
+
+    def __init__(self, marketplaces=None):
+        """
+        :param marketplaces: Names of the default profiles to check (see PROFILE_BUILDERS).
+        """
+        self.marketplaces = marketplaces or settings.COMPLIANCE_MARKETPLACES
+
+    def recheck(self, product):
+        """
+        Recheck a saved ProductListings row and store the results.
+
+        :return: List with one dict per marketplace: score, compliance, issues and the rules that were re-run.
+        """
+        listing = ProductListing(**listing_kwargs({name: getattr(product, name) for name in LISTING_FIELDS}))
+        digests = listing_field_digests(listing)
+        stored = {result.marketplace: result for result in ComplianceResult.objects.filter(listing=product)}
+
+        feedback = []
+        for marketplace in self.marketplaces:
+            checker = get_compliance_checker(marketplace)
+            marketplace_name = checker.marketplace_profile.marketplace_name
+            previous = stored.get(marketplace_name)
+            if previous is None:
+                report = checker.check_listing_compliance(listing)
+            else:
+                report = checker.recheck_listing_compliance(
+                    listing, previous.rule_results, changed_fields(digests, previous.input_digests)
+                )
+            issues = [issue.to_dict() for issue in report.issues]
+            ComplianceResult.objects.update_or_create(
+                listing=product,
+                marketplace=marketplace_name,
+                defaults={
+                    "compliance_score": report.compliance_score,
+                    "is_compliant": report.is_compliant,
+                    "issues": issues,
+                    "rule_results": checker.serialize_rule_results(report),
+                    "input_digests": digests,
+                },
+            )
+            feedback.append({
+                "marketplace": marketplace_name,
+                "compliance_score": report.compliance_score,
+                "is_compliant": report.is_compliant,
+                "issues": issues,
+                "rechecked_rules": report.evaluated_rules,
+            })
+        return feedback
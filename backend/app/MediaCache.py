@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from django.conf import settings
+from modules.content_hash import file_sha256
+from .MediaDownloader import get_downloader
+
+# Query parameters that CDNs rotate per request (signatures, expiry, routing hints)
+# without changing the content behind the URL.
+VOLATILE_QUERY_PARAMS = {'oh', 'oe', '_nc_gid', '_nc_ohc', '_nc_sid', '_nc_oc', 'ccb', 'edm'}
+
+
+def normalize_url(url):
+    """
+    Normalize a media URL so the same asset maps to the same cache key.
+
+    Lowercases scheme and host, drops the fragment and volatile CDN parameters
+    and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in VOLATILE_QUERY_PARAMS)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ''))
+
+
+def combined_digest(*parts):
+    """Return one hex SHA-256 over several digests or strings, e.g. for a set of images."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class MediaStore:
+    """
+    Content-addressed store for downloaded media.
+
+    Files live under objects/<sha[:2]>/<sha><ext> and are indexed in SQLite by
+    their SHA-256 and by every normalized URL they were fetched from. Total size
+    is bounded; least recently used objects are evicted first. Derived values
+    (OCR text, sharpness scores) are memoized per content hash in the same
+    index and dropped together with their object; memos of content that is not
+    stored (e.g. local files) are pruned whenever objects are evicted.
+
+    Eviction and the read in materialize() hold the index's write lock, so an
+    object cannot be deleted while it is being linked or opened, also by other
+    processes sharing the store.
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = str(root or settings.MEDIA_CACHE_DIR)
+        self.max_bytes = max_bytes or settings.MEDIA_CACHE_MAX_BYTES
+        self.objects_dir = os.path.join(self.root, 'objects')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._local = threading.local()
+        self._init_db()
+
+    # --- Index ---
+
+    def _db(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, 'index.sqlite3'), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _locked(self):
+        """Run the block in an IMMEDIATE transaction, i.e. holding the index's write lock."""
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _init_db(self):
+        db = self._db()
+        db.execute('CREATE TABLE IF NOT EXISTS objects (sha256 TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)')
+        db.execute('CREATE INDEX IF NOT EXISTS objects_last_access ON objects (last_access)')
+        db.execute('CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, sha256 TEXT NOT NULL)')
+        db.execute('CREATE TABLE IF NOT EXISTS memo (sha256 TEXT NOT NULL, kind TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (sha256, kind))')
+
+    def _touch(self, sha256):
+        self._db().execute('UPDATE objects SET last_access = ? WHERE sha256 = ?', (time.time(), sha256))
+
+    def lookup(self, sha256):
+        """
+        :return: Path of the stored object, or None if it is not in the store.
+        """
+        row = self._db().execute('SELECT path FROM objects WHERE sha256 = ?', (sha256,)).fetchone()
+        if not row:
+            return None
+        if not os.path.exists(row[0]):
+            self._forget(sha256)
+            return None
+        self._touch(sha256)
+        return row[0]
+
+    def lookup_url(self, url):
+        """
+        :return: (sha256, path) if the URL was fetched before and its object is still stored, else None.
+        """
+        row = self._db().execute('SELECT sha256 FROM urls WHERE url = ?', (normalize_url(url),)).fetchone()
+        if not row:
+            return None
+        path = self.lookup(row[0])
+        return (row[0], path) if path else None
+
+    def _forget(self, sha256):
+        db = self._db()
+        db.execute('DELETE FROM objects WHERE sha256 = ?', (sha256,))
+        db.execute('DELETE FROM urls WHERE sha256 = ?', (sha256,))
+        db.execute('DELETE FROM memo WHERE sha256 = ?', (sha256,))
+
+    # --- Storing ---
+
+    def put_file(self, source_path, ext='', move=False):
+        """
+        Add a local file to the store.
+
+        :param source_path: File to add.
+        :param ext: Extension to keep on the stored object, e.g. ".jpg".
+        :param move: Move the file into the store instead of copying it.
+        :return: (sha256, stored path)
+        """
+        sha256 = file_sha256(source_path)
+        existing = self.lookup(sha256)
+        if existing:
+            if move:
+                os.remove(source_path)
+            return sha256, existing
+
+        target_dir = os.path.join(self.objects_dir, sha256[:2])
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, f"{sha256}{ext}")
+        if move:
+            os.replace(source_path, target)
+        else:
+            shutil.copyfile(source_path, target)
+        self._db().execute(
+            'INSERT OR REPLACE INTO objects (sha256, path, size, last_access) VALUES (?, ?, ?, ?)',
+            (sha256, target, os.path.getsize(target), time.time())
+        )
+        # The new object is what the caller is about to use, so it is never the one evicted
+        self.evict(keep=sha256)
+        return sha256, target
+
+    def fetch(self, url, ext=None):
+        """
+        Return the stored copy of a URL, downloading it only if it is not cached yet.
+
+        :param url: Media URL.
+        :param ext: Extension for the stored object; guessed from the URL path if omitted.
+        :return: (sha256, stored path)
+        """
+        cached = self.lookup_url(url)
+        if cached:
+            return cached
+
+        if ext is None:
+            ext = os.path.splitext(urlsplit(url).path)[1].lower()
+        fd, temp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                get_downloader().download_to(url, temp_file)
+            sha256, path = self.put_file(temp_path, ext=ext, move=True)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        self._db().execute('INSERT OR REPLACE INTO urls (url, sha256) VALUES (?, ?)', (normalize_url(url), sha256))
+        return sha256, path
+
+    def materialize(self, sha256, dest_path):
+        """
+        Place a stored object at dest_path, hard-linking when possible so no bytes are copied.
+        """
+        with self._locked():
+            source = self.lookup(sha256)
+            if not source:
+                raise FileNotFoundError(f"Object {sha256} is not in the media store")
+            try:
+                os.link(source, dest_path)
+                return dest_path
+            except OSError:
+                # Open it while evict() is locked out; the copy then reads from the open file even if it is evicted
+                source_file = open(source, 'rb')
+        with source_file, open(dest_path, 'wb') as dest_file:
+            shutil.copyfileobj(source_file, dest_file)
+        return dest_path
+
+    # --- Memoization ---
+
+    def memoize(self, sha256, kind, compute):
+        """
+        Return the value of compute() for this content hash, computing it only once.
+
+        :param sha256: Content hash (or combined digest) the value derives from.
+        :param kind: Name of the derived value, e.g. "ocr" or "sharpness-512".
+        :param compute: Zero-argument callable returning a JSON-serializable value.
+        """
+        found, value = self.get_memo(sha256, kind)
+        if found:
+            return value
+        value = compute()
+        self.set_memo(sha256, kind, value)
+        return value
+
+    def get_memo(self, sha256, kind):
+        """
+        :return: (True, value) if a value of this kind is memoized for the hash, else (False, None).
+        """
+        row = self._db().execute('SELECT value FROM memo WHERE sha256 = ? AND kind = ?', (sha256, kind)).fetchone()
+        return (True, json.loads(row[0])) if row else (False, None)
+
+    def set_memo(self, sha256, kind, value):
+        """Memoize a JSON-serializable value computed outside memoize(), e.g. for a whole batch at once."""
+        self._db().execute('INSERT OR REPLACE INTO memo (sha256, kind, value) VALUES (?, ?, ?)', (sha256, kind, json.dumps(value)))
+
+    # --- Eviction ---
+
+    def total_bytes(self):
+        return self._db().execute('SELECT COALESCE(SUM(size), 0) FROM objects').fetchone()[0]
+
+    def evict(self, keep=None):
+        """
+        Remove least recently used objects until the store is under its size limit.
+
+        :param keep: Hash of an object that must stay, even if it alone exceeds the limit.
+        :return: Number of objects evicted.
+        """
+        if self.total_bytes() <= self.max_bytes:
+            return 0
+        with self._locked() as db:
+            # Re-read under the lock: another process may have evicted in the meantime
+            total = self.total_bytes()
+            # Evict down to 90% so we don't evict on every single insert once full
+            target = self.max_bytes * 0.9
+            evicted = 0
+            for sha256, path, size in db.execute('SELECT sha256, path, size FROM objects ORDER BY last_access').fetchall():
+                if total <= target:
+                    break
+                if sha256 == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                self._forget(sha256)
+                total -= size
+                evicted += 1
+            if evicted:
+                db.execute('DELETE FROM memo WHERE sha256 NOT IN (SELECT sha256 FROM objects)')
+        return evicted
+
+
+_media_store = None
+_media_store_lock = threading.Lock()
+
+
+def get_media_store():
+    """Return the process-wide MediaStore."""
+    global _media_store
+    with _media_store_lock:
+        if _media_store is None:
+            _media_store = MediaStore()
+        return _media_store
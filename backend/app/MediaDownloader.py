@@ -0,0 +1,135 @@
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024  # Stream bodies to disk in 1 MiB writes
+
+
+class MediaDownloader:
+    """
+    Shared media downloader.
+
+    One pooled requests session keeps connections alive per host, a thread pool
+    bounds total concurrency and a semaphore per host bounds how many transfers
+    hit the same CDN at once. Connection failures and 429/5xx responses are
+    retried with exponential backoff by the adapter; a transfer that fails in
+    the middle of the body is restarted by download_to.
+    """
+
+    def __init__(self, max_workers=None, per_host_limit=None, timeout=None, retries=None, backoff_factor=0.5):
+        self.max_workers = max_workers or settings.MEDIA_DOWNLOAD_WORKERS
+        self.per_host_limit = per_host_limit or settings.MEDIA_DOWNLOAD_PER_HOST
+        self.timeout = timeout or settings.MEDIA_DOWNLOAD_TIMEOUT
+        self.retries = settings.MEDIA_DOWNLOAD_RETRIES if retries is None else retries
+        self.backoff_factor = backoff_factor
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=self.per_host_limit,
+            pool_block=True,
+            max_retries=Retry(
+                total=self.retries,
+                backoff_factor=self.backoff_factor,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['GET', 'HEAD'],
+            ),
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="media-download")
+        self._host_limits = collections.defaultdict(lambda: threading.BoundedSemaphore(self.per_host_limit))
+        self._host_limits_lock = threading.Lock()
+
+    def _host_limit(self, url):
+        with self._host_limits_lock:
+            return self._host_limits[urlsplit(url).netloc.lower()]
+
+    def download_to(self, url, file_obj):
+        """
+        Stream a URL into an open binary file.
+
+        :return: Number of bytes written.
+        """
+        attempt = 0
+        with self._host_limit(url):
+            while True:
+                file_obj.seek(0)
+                file_obj.truncate()
+                # Connect errors, timeouts before the response and 429/5xx are retried by the adapter
+                with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    try:
+                        written = 0
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            if chunk:
+                                file_obj.write(chunk)
+                                written += len(chunk)
+                        return written
+                    except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                        # The connection dropped or stalled while reading the body: start the transfer over
+                        attempt += 1
+                        if attempt > self.retries:
+                            raise
+                        delay = self.backoff_factor * (2 ** (attempt - 1))
+                        logger.warning("Retrying download of %s in %.1fs after error: %s", url, delay, e)
+                time.sleep(delay)
+
+    def download(self, url, path):
+        """
+        Download a URL to a file path.
+
+        :return: The path.
+        """
+        with open(path, 'wb') as f:
+            self.download_to(url, f)
+        return path
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn on the download pool and return its Future."""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def imap(self, fn, items, window=None):
+        """
+        Apply fn to items on the download pool and yield results in input order.
+
+        At most window calls are in flight, so a consumer that stops iterating early
+        does not trigger the remaining downloads. Exceptions raised by fn are re-raised
+        when their result is reached.
+        """
+        window = window or self.per_host_limit
+        items = iter(items)
+        in_flight = collections.deque()
+        try:
+            for item in items:
+                in_flight.append(self._executor.submit(fn, item))
+                if len(in_flight) >= window:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+_downloader = None
+_downloader_lock = threading.Lock()
+
+
+def get_downloader():
+    """Return the process-wide MediaDownloader."""
+    global _downloader
+    with _downloader_lock:
+        if _downloader is None:
+            _downloader = MediaDownloader()
+        return _downloader
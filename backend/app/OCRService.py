@@ -0,0 +1,146 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+from django.conf import settings
+
+# --- Worker side (runs inside the OCR processes) ---
+
+_engine = None
+_config = {}
+
+
+def _init_worker(config):
+    """
+    Create the OCR engine once per worker process.
+
+    tesserocr keeps a Tesseract instance loaded in-process, so no process is
+    started per image. Without it we fall back to pytesseract, which still runs
+    the tesseract binary per call but at least in parallel and on preprocessed input.
+    """
+    global _engine, _config
+    _config = config
+    try:
+        import tesserocr
+        _engine = tesserocr.PyTessBaseAPI(lang=config['lang'])
+    except ImportError:
+        _engine = None
+
+
+def has_text(gray, min_density):
+    """
+    Cheap text-presence check on a small thumbnail.
+
+    Printed text produces many short, strong horizontal intensity changes; flat
+    product shots and backgrounds produce few. Images below min_density are skipped.
+    """
+    thumb = np.asarray(gray.resize((512, max(1, gray.height * 512 // gray.width))), dtype=np.int16)
+    edges = np.abs(np.diff(thumb, axis=1)) > 32
+    return edges.mean() >= min_density
+
+
+def preprocess(image, target_dpi, max_side):
+    """
+    Grayscale, downscale and binarize an image for OCR.
+
+    Images scanned above target_dpi are scaled down to it; everything else is
+    capped at max_side pixels on its longest side. Binarization uses Otsu's threshold.
+    """
+    gray = image if image.mode == 'L' else image.convert('L')
+    scale = 1.0
+    source_dpi = image.info.get('dpi', (0, 0))[0]
+    if source_dpi and source_dpi > target_dpi:
+        scale = target_dpi / source_dpi
+    longest = max(gray.size)
+    if longest * scale > max_side:
+        scale = max_side / longest
+    if scale < 1.0:
+        gray = gray.resize((max(1, int(gray.width * scale)), max(1, int(gray.height * scale))), Image.LANCZOS)
+
+    pixels = np.asarray(gray)
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    weights = np.arange(256)
+    total = pixels.size
+    cumulative = np.cumsum(histogram)
+    cumulative_mean = np.cumsum(histogram * weights)
+    background = cumulative[:-1]
+    foreground = total - background
+    valid = (background > 0) & (foreground > 0)
+    between = np.zeros(255)
+    between[valid] = (cumulative_mean[-1] * background[valid] / total - cumulative_mean[:-1][valid]) ** 2 / (background[valid] * foreground[valid])
+    threshold = int(np.argmax(between))
+    return Image.fromarray(np.where(pixels > threshold, 255, 0).astype(np.uint8))
+
+
+def _ocr_path(image_path):
+    with Image.open(image_path) as image:
+        gray = image.convert('L')
+        if not has_text(gray, _config['min_text_density']):
+            return ""
+        # convert() keeps image.info, so the grayscale copy still carries the DPI
+        prepared = preprocess(gray, _config['target_dpi'], _config['max_side'])
+    if _engine is not None:
+        _engine.SetImage(prepared)
+        return _engine.GetUTF8Text()
+    import pytesseract
+    return pytesseract.image_to_string(prepared, lang=_config['lang'])
+
+
+# --- Client side ---
+
+class OCRService:
+    """
+    Pool of long-lived OCR worker processes.
+
+    OCR runs in the job workers. The run_job_workers service is one process per
+    host, so its pool gets OCR_WORKERS processes; web processes that run jobs
+    themselves (JOB_WORKERS_IN_PROCESS) start one each, so a host with many web
+    workers is not oversubscribed.
+    """
+
+    def __init__(self, workers=None, lang=None, target_dpi=None, max_side=None, min_text_density=None):
+        self.workers = workers or (1 if settings.JOB_WORKERS_IN_PROCESS else settings.OCR_WORKERS)
+        config = {
+            'lang': lang or settings.OCR_LANG,
+            'target_dpi': target_dpi or settings.OCR_TARGET_DPI,
+            'max_side': max_side or settings.OCR_MAX_SIDE,
+            'min_text_density': settings.OCR_MIN_TEXT_DENSITY if min_text_density is None else min_text_density,
+        }
+        # spawn, not fork: the web process is multi-threaded
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(config,),
+        )
+
+    def submit(self, image_path):
+        """Queue OCR of one image file and return a Future with its text."""
+        return self._pool.submit(_ocr_path, os.path.abspath(image_path))
+
+    def ocr_file(self, image_path):
+        """OCR one image file and return its text (empty if no text was detected)."""
+        return self.submit(image_path).result()
+
+    def ocr_many(self, image_paths):
+        """OCR several image files in parallel and return their texts in input order."""
+        futures = [self.submit(path) for path in image_paths]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+_ocr_service = None
+_ocr_service_lock = threading.Lock()
+
+
+def get_ocr_service():
+    """Return the process-wide OCRService."""
+    global _ocr_service
+    with _ocr_service_lock:
+        if _ocr_service is None:
+            _ocr_service = OCRService()
+        return _ocr_service
@@ -0,0 +1,59 @@
+import hashlib
+import re
+import unicodedata
+from urllib.parse import urlsplit
+from .MediaCache import normalize_url
+
+# Instagram/Facebook post URLs carry the post identity in a short code after one of these segments
+SHORTCODE_PATTERN = re.compile(r'/(?:p|reel|reels|tv|posts|videos)/([^/?#]+)')
+
+
+def normalize_title(title):
+    """
+    Canonical form of a product title: Unicode-normalized, lowercased, punctuation
+    stripped and whitespace collapsed, so cosmetic edits map to the same identity.
+    """
+    title = unicodedata.normalize('NFKC', title or '').lower()
+    title = re.sub(r'[^\w\s]', ' ', title)
+    return ' '.join(title.split())
+
+
+def normalize_post_link(post_link):
+    """
+    Canonical form of a social media post link.
+
+    Links with a post short code collapse to "<host>:<code>", so /p/<code>,
+    /<user>/p/<code>/ and tracking query strings all identify the same post.
+    """
+    parts = urlsplit((post_link or '').strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    match = SHORTCODE_PATTERN.search(parts.path)
+    if match:
+        return f"{host}:{match.group(1)}"
+    return f"{host}{parts.path.rstrip('/')}"
+
+
+def source_fingerprint(post_link, image_urls=None):
+    """
+    Stable SHA-256 fingerprint of the source post.
+
+    Uses the normalized post link; posts submitted without a link fall back to
+    their normalized media URLs.
+    """
+    if post_link:
+        basis = normalize_post_link(post_link)
+    else:
+        basis = '\n'.join(sorted(normalize_url(url) for url in (image_urls or [])))
+    return hashlib.sha256(basis.encode('utf-8')).hexdigest()
+
+
+def make_product_id(product_title, fingerprint):
+    """
+    Deterministic product id from the normalized title and the source fingerprint.
+
+    Unlike hash(), this is identical across processes and restarts.
+    """
+    basis = f"{normalize_title(product_title)}\0{fingerprint}"
+    return hashlib.sha256(basis.encode('utf-8')).hexdigest()
@@ -0,0 +1,221 @@
+import re
+from collections import Counter, defaultdict
+from django.conf import settings
+
+OCR_HEADER = re.compile(r'^--- (.+) ---$')
+WORD = re.compile(r'[a-z0-9]+')
+PRICE_HINT = re.compile(r'(₹|rs\.?|inr|\$|€|£|mrp|price|off|%)', re.IGNORECASE)
+
+# Share of the token budget each section may claim before leftovers are redistributed
+SECTION_SHARES = {
+    "description": 0.35,
+    "vision": 0.35,
+    "ocr": 0.30,
+}
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token), good enough for budgeting."""
+    return (len(text) + 3) // 4
+
+
+def normalize_line(line):
+    return ' '.join(WORD.findall(line.lower()))
+
+
+def shingles(text, size=3):
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Keep whole lines (then whole words) of text until max_tokens is reached."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            remaining = (max_tokens - used) * 4
+            if remaining > 40:
+                kept.append(line[:remaining].rsplit(' ', 1)[0] + ' ...')
+            break
+        kept.append(line)
+        used += cost
+    return '\n'.join(kept)
+
+
+class PromptAssembler:
+    """
+    Builds the inputs of the listing prompt within a token budget.
+
+    OCR lines are deduplicated across images (exact and near-identical lines,
+    by character 3-gram Jaccard similarity), scored for relevance against the
+    post description and vision output, and the best ones are kept in their
+    original order. Description, vision output and OCR each get a share of the
+    budget; whatever one section does not need goes to the others.
+    """
+
+    def __init__(self, token_budget=None, similarity_threshold=0.8):
+        """
+        :param token_budget: Tokens available for the three input sections.
+        :param similarity_threshold: Jaccard similarity at which two OCR lines count as duplicates.
+        """
+        self.token_budget = token_budget or settings.GEMINI_PROMPT_TOKEN_BUDGET
+        self.similarity_threshold = similarity_threshold
+
+    # --- OCR ---
+
+    @staticmethod
+    def split_ocr_blocks(ocr_text):
+        """Split the concatenated OCR output into a list of (source name, lines)."""
+        blocks = []
+        current = None
+        for line in (ocr_text or '').splitlines():
+            header = OCR_HEADER.match(line.strip())
+            if header:
+                current = (header.group(1), [])
+                blocks.append(current)
+                continue
+            if current is None:
+                current = ('', [])
+                blocks.append(current)
+            current[1].append(line)
+        return blocks
+
+    def dedupe_ocr_lines(self, blocks):
+        """
+        Collapse identical and near-identical OCR lines across all blocks.
+
+        :return: List of dicts with the first seen text of each distinct line, its
+                 normalized form and the number of images it appeared in.
+        """
+        lines = []
+        by_normalized = {}
+        shingle_index = defaultdict(set)
+        for _, block_lines in blocks:
+            seen_in_block = set()
+            for raw in block_lines:
+                text = raw.strip()
+                normalized = normalize_line(text)
+                # OCR noise: too few letters or digits to mean anything
+                if len(normalized.replace(' ', '')) < 3:
+                    continue
+
+                match = by_normalized.get(normalized)
+                if match is None:
+                    grams = shingles(normalized)
+                    overlaps = Counter()
+                    for gram in grams:
+                        for index in shingle_index[gram]:
+                            overlaps[index] += 1
+                    for index, overlap in overlaps.most_common(3):
+                        other = lines[index]
+                        if overlap / (len(grams) + len(other['shingles']) - overlap) >= self.similarity_threshold:
+                            match = index
+                            break
+                if match is None:
+                    match = len(lines)
+                    grams = shingles(normalized)
+                    lines.append({"text": text, "normalized": normalized, "shingles": grams, "count": 0})
+                    for gram in grams:
+                        shingle_index[gram].add(match)
+                by_normalized[normalized] = match
+                if match not in seen_in_block:
+                    lines[match]["count"] += 1
+                    seen_in_block.add(match)
+        return lines
+
+    @staticmethod
+    def score_line(line, context_words):
+        words = line["normalized"].split()
+        if not words:
+            return 0.0
+        overlap = sum(1 for word in words if word in context_words) / len(words)
+        score = 2.0 * overlap
+        score += 0.5 * min(line["count"] - 1, 4)  # Text repeated across images is usually the product's own
+        if PRICE_HINT.search(line["text"]) or any(char.isdigit() for char in line["text"]):
+            score += 1.0  # Prices, sizes, model numbers
+        if len(words) < 2:
+            score -= 0.5
+        return score
+
+    def select_ocr(self, ocr_text, context, max_tokens):
+        """
+        :return: (selected OCR text, number of distinct lines, number of lines kept)
+        """
+        lines = self.dedupe_ocr_lines(self.split_ocr_blocks(ocr_text))
+        context_words = set(WORD.findall(context.lower()))
+        ranked = sorted(range(len(lines)), key=lambda i: self.score_line(lines[i], context_words), reverse=True)
+
+        kept = []
+        used = 0
+        for index in ranked:
+            cost = estimate_tokens(lines[index]["text"]) + 1
+            if used + cost > max_tokens:
+                continue
+            kept.append(index)
+            used += cost
+        return '\n'.join(lines[i]["text"] for i in sorted(kept)), len(lines), len(kept)
+
+    # --- Vision ---
+
+    @staticmethod
+    def format_vision(gemini_results):
+        if not isinstance(gemini_results, dict):
+            return str(gemini_results or '')
+        parts = []
+        if gemini_results.get("images"):
+            parts.append(f"Images: {gemini_results['images'].strip()}")
+        for video in gemini_results.get("videos", []):
+            for name, description in video.items():
+                parts.append(f"Video {name}: {description.strip()}")
+        return '\n'.join(parts)
+
+    # --- Assembly ---
+
+    def _allocate(self, needs):
+        allocation = {name: min(need, int(self.token_budget * SECTION_SHARES[name])) for name, need in needs.items()}
+        leftover = self.token_budget - sum(allocation.values())
+        for name in SECTION_SHARES:
+            if leftover <= 0:
+                break
+            extra = min(needs[name] - allocation[name], leftover)
+            allocation[name] += extra
+            leftover -= extra
+        return allocation
+
+    def assemble(self, post_description, ocr_text, gemini_results):
+        """
+        :return: Dict with the "description", "vision" and "ocr" sections to put in
+                 the prompt, and "stats" with token counts and OCR line counts.
+        """
+        description = (post_description or '').strip()
+        vision = self.format_vision(gemini_results)
+        ocr_need = estimate_tokens(ocr_text or '')
+        allocation = self._allocate({
+            "description": estimate_tokens(description),
+            "vision": estimate_tokens(vision),
+            "ocr": ocr_need,
+        })
+
+        description = truncate_to_tokens(description, allocation["description"])
+        vision = truncate_to_tokens(vision, allocation["vision"])
+        ocr, distinct_lines, kept_lines = self.select_ocr(ocr_text, f"{description}\n{vision}", allocation["ocr"])
+        return {
+            "description": description,
+            "vision": vision,
+            "ocr": ocr,
+            "stats": {
+                "tokens": {
+                    "description": estimate_tokens(description),
+                    "vision": estimate_tokens(vision),
+                    "ocr": estimate_tokens(ocr),
+                },
+                "ocr_tokens_before": ocr_need,
+                "ocr_distinct_lines": distinct_lines,
+                "ocr_kept_lines": kept_lines,
+            },
+        }
@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import threading
+import time
+from django.conf import settings
+from .MediaCache import combined_digest
+
+
+class ResponseCache:
+    """
+    Persistent cache of model responses.
+
+    Entries are keyed by model name, prompt template version and the digests of
+    every input (media content hashes, prompt text), so a changed image, prompt
+    or model never hits a stale answer. Entries expire after ttl seconds and the
+    total size is bounded; least recently used entries are evicted first.
+    """
+
+    def __init__(self, path=None, ttl=None, max_bytes=None):
+        self.path = str(path or settings.GEMINI_CACHE_PATH)
+        self.ttl = settings.GEMINI_CACHE_TTL if ttl is None else ttl
+        self.max_bytes = max_bytes or settings.GEMINI_CACHE_MAX_BYTES
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._db().execute(
+            'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT NOT NULL, template_version TEXT NOT NULL, '
+            'value TEXT NOT NULL, size INTEGER NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)'
+        )
+        self._db().execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+
+    def _db(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model, template_version, *parts):
+        return combined_digest(model, template_version, *parts)
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """
+        :return: The cached response text, or None if missing or expired.
+        """
+        db = self._db()
+        row = db.execute('SELECT value, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+        if row and time.time() - row[1] > self.ttl:
+            db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            row = None
+        self._count(row is not None)
+        if row is None:
+            return None
+        db.execute('UPDATE responses SET last_access = ? WHERE key = ?', (time.time(), key))
+        return row[0]
+
+    def put(self, key, model, template_version, value):
+        now = time.time()
+        self._db().execute(
+            'INSERT OR REPLACE INTO responses (key, model, template_version, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (key, model, str(template_version), value, len(value.encode('utf-8')), now, now)
+        )
+        self.evict()
+
+    def cached(self, model, template_version, parts, compute, refresh=False, validate=None):
+        """
+        Return the cached response for these inputs, calling compute() only on a miss.
+
+        :param model: Model name the response comes from.
+        :param template_version: Version of the prompt template; bump it when the prompt changes.
+        :param parts: Digests or strings identifying the inputs, e.g. media SHA-256s and prompt text.
+        :param compute: Zero-argument callable returning the response text.
+        :param refresh: Skip the lookup and overwrite the entry with a fresh response.
+        :param validate: Optional callable; a response is only stored if it does not raise.
+        """
+        key = self.make_key(model, template_version, *parts)
+        if not refresh:
+            value = self.get(key)
+            if value is not None:
+                return value
+        value = compute()
+        if validate is not None:
+            validate(value)
+        self.put(key, model, template_version, value)
+        return value
+
+    def total_bytes(self):
+        return self._db().execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def evict(self):
+        """
+        Drop expired entries, then least recently used ones until under the size limit.
+
+        :return: Number of entries removed.
+        """
+        db = self._db()
+        removed = db.execute('DELETE FROM responses WHERE created_at < ?', (time.time() - self.ttl,)).rowcount
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return removed
+        # Evict down to 90% so we don't evict on every single insert once full
+        target = self.max_bytes * 0.9
+        for key, size in db.execute('SELECT key, size FROM responses ORDER BY last_access').fetchall():
+            if total <= target:
+                break
+            db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total -= size
+            removed += 1
+        return removed
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide ResponseCache."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
@@ -1,22 +1,58 @@
 import os
 import glob
 from instaloader import Instaloader, Post
-from PIL import Image
-import pytesseract
-import google.generativeai as genai
-import json5
-import time
 import random
-import requests
+from urllib.parse import urlsplit
+from .StagedPipeline import StagedPipeline
+from .MediaCache import get_media_store, file_sha256
+from .MediaDownloader import get_downloader
+from .OCRService import get_ocr_service
+from .GeminiClient import get_gemini_client
+from .ResponseCache import get_response_cache
+from .VideoAnalysisManager import VideoAnalysisManager
+from .PromptAssembler import PromptAssembler
+from modules.media_preparation import get_media_preparer
+from .StructuredOutput import PRODUCT_GENERATION_CONFIG, StructuredOutputError, parse_json_output, validate_product_output
+from django.conf import settings
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi')
+
+
+def media_extension(url, path):
+    """
+    Extension for a downloaded media file: taken from the URL path when it names a
+    known image or video type, else detected from the file's leading bytes.
+    Unrecognized files are treated as JPEG images.
+    """
+    ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    if ext in IMAGE_EXTENSIONS + VIDEO_EXTENSIONS:
+        return ext
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    if head[4:8] == b'ftyp':
+        return '.mov' if head[8:12] == b'qt  ' else '.mp4'
+    if head[:4] == b'RIFF' and head[8:12] == b'AVI ':
+        return '.avi'
+    if head[:8] == b'\x89PNG\r\n\x1a\n':
+        return '.png'
+    return '.jpg'
+
+# Bump when the corresponding prompt changes so cached responses are not reused
+IMAGE_PROMPT_VERSION = 1
+LISTING_PROMPT_VERSION = 3
 
 class GeminiAnalyzer:
-    def __init__(self, GOOGLE_API_KEY):
+    def __init__(self, GOOGLE_API_KEY=None, client=None, refresh_cache=False):
         """
-        Initialize the GeminiAnalyzer class and configure the API.
+        Initialize the GeminiAnalyzer class.
+
+        :param client: GeminiClient to use; defaults to the shared, already configured one.
+        :param refresh_cache: Ignore cached responses and store fresh ones.
         """
-        # Load the API key from environment variables
-        self.api_key = GOOGLE_API_KEY
-        genai.configure(api_key=self.api_key)
+        self.client = client or get_gemini_client(GOOGLE_API_KEY)
+        self.refresh_cache = refresh_cache
+        self.video_manager = VideoAnalysisManager(self.client, refresh_cache=refresh_cache)
 
     def upload_file(self, file_path):
         """
@@ -25,7 +61,7 @@ class GeminiAnalyzer:
         :return: Uploaded file object.
         """
         print(f"Uploading file: {file_path}")
-        uploaded_file = genai.upload_file(path=file_path)
+        uploaded_file = self.client.upload_file(file_path)
         print(f"Completed upload: {uploaded_file.uri}")
         return uploaded_file
 
@@ -35,18 +71,31 @@ class GeminiAnalyzer:
         :param image_paths: List of paths to image files.
         :return: Generated content describing the images.
         """
-        # Open and validate all image files
-        image_files = [Image.open(image_path) for image_path in image_paths]
-        
-        # Initialize the Gemini model for images
-        model = genai.GenerativeModel(model_name="gemini-1.5-flash")
-        
+        model_name = settings.GEMINI_IMAGE_MODEL
+
         # Prompt for the image analysis
         prompt = "What's in this image?"
-        
-        # Generate content for all uploaded images
-        response = model.generate_content([prompt, *image_files])
-        return response.text
+
+        preparer = get_media_preparer(
+            max_side=settings.GEMINI_IMAGE_MAX_SIDE,
+            quality=settings.GEMINI_IMAGE_QUALITY,
+            store=get_media_store(),
+        )
+        digests = [file_sha256(path) for path in image_paths]
+
+        def describe():
+            # Downscaled, metadata-free JPEGs, encoded once per image
+            images = [preparer.prepare(path, sha256=digest).as_blob() for path, digest in zip(image_paths, digests)]
+
+            # Generate content for all uploaded images
+            response = self.client.generate(model_name, [prompt, *images])
+            return response.text
+
+        # The same image set with the same prompt always gets the cached description
+        return get_response_cache().cached(
+            model_name, IMAGE_PROMPT_VERSION, [prompt, preparer.variant, *digests],
+            describe, refresh=self.refresh_cache,
+        )
 
     def process_video(self, video_path):
         """
@@ -54,28 +103,15 @@ class GeminiAnalyzer:
         :param video_path: Path to the video file.
         :return: Generated content describing the video.
         """
-        # Upload the video
-        video_file = self.upload_file(video_path)
-        
-        # Wait for the video file to be ready
-        print("Processing video...")
-        while video_file.state.name == "PROCESSING":
-            print('.', end='', flush=True)
-            time.sleep(10)
-            video_file = genai.get_file(video_file.name)
-
-        if video_file.state.name == "FAILED":
-            raise ValueError("Video processing failed.")
-
-        # Initialize the Gemini model for video
-        model = genai.GenerativeModel(model_name="gemini-1.5-pro")
-        
-        # Prompt for the video analysis
-        prompt = "What's in this video?"
-        
-        # Generate content for the uploaded video
-        response = model.generate_content([video_file, prompt], request_options={"timeout": 600})
-        return response.text
+        return self.video_manager.describe(video_path)
+
+    def process_videos(self, video_paths):
+        """
+        Process several video files concurrently.
+        :param video_paths: List of paths to video files.
+        :return: List in input order with each description, or the exception raised for that video.
+        """
+        return self.video_manager.describe_many(video_paths)
 
     def analyze(self, file_paths):
         """
@@ -84,7 +120,7 @@ class GeminiAnalyzer:
         :return: Analysis results as text.
         """
         # Check the file types
-        if len(file_paths) == 1 and file_paths[0].lower().endswith(('.mp4', '.mov', '.avi')):
+        if len(file_paths) == 1 and file_paths[0].lower().endswith(VIDEO_EXTENSIONS):
             # Single video file
             return self.process_video(file_paths[0])
         else:
@@ -92,19 +128,25 @@ class GeminiAnalyzer:
             return self.process_images(file_paths)
 
 class Social2Amazon:
-    def __init__(self, base_folder="static", GOOGLE_API_KEY=""):
+    def __init__(self, base_folder="static", GOOGLE_API_KEY="", stage_workers=None, gemini_client=None, refresh_cache=False):
         """
         Initializes the Social2Amazon class.
 
         :param base_folder: The base folder where all data will be saved.
+        :param stage_workers: Optional mapping of pipeline stage name to worker count.
+        :param gemini_client: Optional GeminiClient; defaults to the shared one.
+        :param refresh_cache: Call Gemini even when a cached response exists, and store the new one.
         """
         subfolder_name = ''.join(random.choices('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=10))
         self.base_folder = os.path.join(base_folder, subfolder_name)
         if not os.path.exists(self.base_folder):
             os.makedirs(self.base_folder)
 
-        self.gemini_analyzer = GeminiAnalyzer(GOOGLE_API_KEY)  # Initialize GeminiAnalyzer
-        genai.configure(api_key=GOOGLE_API_KEY)
+        self.gemini_client = gemini_client or get_gemini_client(GOOGLE_API_KEY or None)
+        self.gemini_analyzer = GeminiAnalyzer(client=self.gemini_client, refresh_cache=refresh_cache)  # Initialize GeminiAnalyzer
+        self.refresh_cache = refresh_cache
+        self.stage_workers = stage_workers
+        self.stage_timings = {}
 
     # def download_post(self, url):
     #     """
@@ -152,55 +194,82 @@ class Social2Amazon:
 
     #     return post_description, downloaded_files
 
+    def download_media(self, url):
+        """
+        Download a single media URL (or move a locally extracted frame) into the base folder.
+
+        :param url: Direct image or video link, or a local static/frame_ path.
+        :return: Path of the stored file, or None if the download failed.
+        """
+        if 'static/frame_' in url:
+            file_name = url.split('/')[-1]
+            new_file_path = os.path.join(self.base_folder, file_name)
+            os.rename(url, new_file_path)
+            return new_file_path
+        try:
+            # Reuse the cached copy when this URL or identical content was fetched before
+            sha256, stored_path = get_media_store().fetch(url)
+            # Keep the real type so videos reach the video analysis instead of passing as images
+            file_path = os.path.join(self.base_folder, f"media_{sha256[:16]}{media_extension(url, stored_path)}")
+            if not os.path.exists(file_path):
+                get_media_store().materialize(sha256, file_path)
+            return file_path
+        except Exception as e:
+            print(f"Error downloading media: {e}")
+            return None
+
     def download_post(self, data):
         """download direct links of instagram to static folder and return a medias_files list and description"""
         post_description = data['description']
-        media_files = []
-        for i, url in enumerate(data['image_url']):
-            if 'static/frame_' in url:
-                file_name = url.split('/')[-1]
-                os.rename(url, os.path.join(self.base_folder, file_name))
-                new_file_path = os.path.join(self.base_folder, file_name)
-                media_files.append(new_file_path)
-                continue
-            try:
-                random_alphanumeric_file_name = ''.join(random.choices('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=10))
-                file_path = os.path.join(self.base_folder, f"media_{random_alphanumeric_file_name}.jpg")
-                media_files.append(file_path)
-                with open(file_path, 'wb') as f:
-                    f.write(requests.get(url).content)
-            except Exception as e:
-                print(f"Error downloading image: {e}")
-        return post_description, media_files
+        media_files = get_downloader().imap(self.download_media, data['image_url'])
+        return post_description, [file for file in media_files if file]
 
-    def perform_ocr(self):
+    def ocr_image(self, file_path):
         """
-        Performs OCR on all images in the base folder.
+        Performs OCR on a single image.
+
+        :param file_path: Path to the image file.
+        :return: The OCR text block for this image, or None if it is not an image or OCR failed.
+        """
+        if not file_path or not file_path.lower().endswith(IMAGE_EXTENSIONS):
+            return None
+        file_name = os.path.basename(file_path)
+        try:
+            text = get_media_store().memoize(
+                file_sha256(file_path), 'ocr',
+                lambda: get_ocr_service().ocr_file(file_path)
+            )
+            return f"--- {file_name} ---\n{text.strip()}\n"
+        except Exception as e:
+            print(f"Error performing OCR on {file_name}: {e}")
+            return None
+
+    def write_ocr_output(self, ocr_blocks):
+        """
+        Writes the collected OCR blocks to a results file in the base folder.
 
+        :param ocr_blocks: List of per-image OCR text blocks.
         :return: The concatenated OCR text.
         """
         # Generate a random number for the OCR file
         random_num = random.randint(1000, 999999999)
         ocr_output_file = os.path.join(self.base_folder, f"ocr_{random_num}.txt")
-        ocr_text = []
-
-        # Initialize the output file
         with open(ocr_output_file, "w", encoding="utf-8") as ocr_file:
             ocr_file.write("OCR Results:\n\n")
+            for block in ocr_blocks:
+                ocr_file.write(f"{block}\n")
+        return "\n".join(ocr_blocks)
 
-        # Process images for OCR
-        for file_name in sorted(os.listdir(self.base_folder)):
-            file_path = os.path.join(self.base_folder, file_name)
-            if file_name.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff')):
-                try:
-                    text = pytesseract.image_to_string(Image.open(file_path))
-                    ocr_text.append(f"--- {file_name} ---\n{text.strip()}\n")
-                    with open(ocr_output_file, "a", encoding="utf-8") as ocr_file:
-                        ocr_file.write(f"--- {file_name} ---\n{text.strip()}\n\n")
-                except Exception as e:
-                    print(f"Error performing OCR on {file_name}: {e}")
+    def perform_ocr(self):
+        """
+        Performs OCR on all images in the base folder.
 
-        return "\n".join(ocr_text)
+        :return: The concatenated OCR text.
+        """
+        file_paths = [os.path.join(self.base_folder, file_name) for file_name in sorted(os.listdir(self.base_folder))]
+        with StagedPipeline(self.stage_workers) as pipeline:
+            ocr_blocks = [future.result() for future in pipeline.map("ocr", self.ocr_image, file_paths)]
+        return self.write_ocr_output([block for block in ocr_blocks if block])
 
     def analyze_with_gemini(self, media_files):
         """
@@ -210,8 +279,8 @@ class Social2Amazon:
         :return: Generated content describing the media files.
         """
         # Separate images and videos
-        image_files = [file for file in media_files if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff'))]
-        video_files = [file for file in media_files if file.lower().endswith(('.mp4', '.mov', '.avi'))]
+        image_files = [file for file in media_files if file.lower().endswith(IMAGE_EXTENSIONS)]
+        video_files = [file for file in media_files if file.lower().endswith(VIDEO_EXTENSIONS)]
 
         results = {}
 
@@ -224,47 +293,21 @@ class Social2Amazon:
             except Exception as e:
                 print(f"Error during image analysis: {e}")
 
-        # Analyze videos with Gemini
+        # Analyze videos with Gemini; all clips are uploaded and processed concurrently
         if video_files:
-            try:
-                print("Analyzing videos with Gemini...")
-                video_results = []
-                for video_file in video_files:
-                    result = self.gemini_analyzer.process_video(video_file)
-                    video_results.append({video_file: result})
+            print("Analyzing videos with Gemini...")
+            video_results = []
+            for video_file, result in zip(video_files, self.gemini_analyzer.process_videos(video_files)):
+                if isinstance(result, Exception):
+                    print(f"Error during video analysis of {video_file}: {result}")
+                    continue
+                # Key by file name only so the prompt (and its cache key) does not depend on the temp folder
+                video_results.append({os.path.basename(video_file): result})
+            if video_results:
                 results["videos"] = video_results
-            except Exception as e:
-                print(f"Error during video analysis: {e}")
 
         return results
     
-    def sanitize_to_json(self, response_text):
-        """
-        Sanitize the response text by removing triple backticks and converting it into a JSON object.
-
-        :param response_text: The raw text response from Gemini.
-        :return: A JSON object parsed from the text.
-        """
-        try:
-            # Remove triple backticks if present
-            if "```json" in response_text:
-                sanitized_text = response_text.split("```json")[1].split("```")[0].strip()
-            else:
-                sanitized_text = response_text.split("```")[1].split("```")[0].strip()
-            
-            # Parse the sanitized text into JSON
-            try:
-                json_data = json5.loads(sanitized_text)
-            except:
-                print("Error parsing JSON5, trying JSON...")
-                print("====================================")
-                print(sanitized_text)
-                print("====================================")
-            return json_data
-        except Exception as e:
-            print(f"Error parsing JSON: {e}")
-            return None
-
     def process_gemini_text(self, post_description, ocr_text, gemini_results, media_files):
         """
         Sends all extracted data to Gemini text model for summarization and extraction in JSON format.
@@ -273,67 +316,98 @@ class Social2Amazon:
         :param ocr_text: Text extracted from images using OCR.
         :param gemini_results: Results from Gemini image and video analysis.
         :param media_files: List of downloaded media files.
-        :return: A JSON containing structured product data.
+        :return: A dict containing structured product data.
+        :raises StructuredOutputError: If no valid product could be recovered from the answer.
         """
+        # Deduplicate OCR across images, rank it and keep every section within the token budget
+        sections = PromptAssembler().assemble(post_description, ocr_text, gemini_results)
+        print("Prompt sections:", sections["stats"])
+
         # Combine all text inputs for the prompt
         prompt = f"""
 You are a helpful assistant extracting structured product information. Given the following data:
 
 1. **Post Description**:
-{post_description}
+{sections["description"]}
 
 2. **OCR Text**:
-{ocr_text}
+{sections["ocr"]}
 
 3. **Gemini Results**:
-{gemini_results}
-
-Please return a JSON strictly in this format:
-{{
-   "images_list": {media_files},
-   "product_title": "",
-   "price": "",
-   "product_details": {{
-       "Key1": "Value1",
-       "Key2": "Value2"
-   }},
-   "about this item": "",
-   "Product description": ""
-}}
-The "product_details" field is dynamic, and its keys will vary depending on the product type. Fill in as much detail as possible based on the input. Also the product description should be long and very detailed paragraph about the product. If there is no prize in in the information above then assume a prize of the product yourself.
+{sections["vision"]}
+
+Please return the product as JSON with product_title, price, product_details (name/value pairs; the names vary depending on the product type), about_this_item and product_description. Fill in as much detail as possible based on the input. Also the product description should be long and very detailed paragraph about the product. If there is no prize in in the information above then assume a prize of the product yourself.
 """
-        print("Sending data to Gemini text model...")
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return self.sanitize_to_json(response.text)
+        # The answer is constrained to PRODUCT_RESPONSE_SCHEMA; truncated or slightly
+        # malformed output is repaired, and only this text call is retried if that fails.
+        # Only answers that validate are cached.
+        def generate():
+            print("Sending data to Gemini text model...")
+            return self.gemini_client.generate(settings.GEMINI_TEXT_MODEL, prompt, generation_config=PRODUCT_GENERATION_CONFIG).text
+
+        def validate(response_text):
+            return validate_product_output(parse_json_output(response_text), media_files)
+
+        cache_parts = [prompt, *(file_sha256(path) for path in media_files)]
+        for attempt in range(settings.GEMINI_STRUCTURED_RETRIES + 1):
+            try:
+                response_text = get_response_cache().cached(
+                    settings.GEMINI_TEXT_MODEL, LISTING_PROMPT_VERSION, cache_parts, generate,
+                    refresh=self.refresh_cache or attempt > 0, validate=validate,
+                )
+                return validate(response_text)
+            except StructuredOutputError as e:
+                print(f"Invalid structured output (attempt {attempt + 1}): {e}")
+                error = e
+        raise error
 
 
     def process_post(self, url):
         """
         Main function to process an Instagram post: download, OCR, and Gemini analysis.
 
+        Downloads run concurrently; each image is OCR'd as soon as it lands, the Gemini
+        vision call starts once every download is done and runs alongside OCR, and the
+        final text call starts as soon as OCR and vision results are both available.
+
         :param url: The URL of the Instagram post.
         :return: A JSON with product details and other extracted information.
         """
-        # Step 1: Download Instagram post
-        print("Downloading Instagram post...")
-        post_description, media_files = self.download_post(url)
-        media_files = [file for file in media_files if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff'))]
-        print("Media files:", media_files)
-
-        # Step 2: Perform OCR
-        print("Performing OCR on images...")
-        ocr_text = self.perform_ocr()
-        print("OCR text:", ocr_text)
-
-        # Step 3: Analyze media with Gemini
-        print("Analyzing media with Gemini...")
-        gemini_results = self.analyze_with_gemini(media_files)
-        print("Gemini results:", gemini_results)
-
-        # Step 4: Process Gemini text-only input
-        print("Processing data with Gemini text model...")
-        final_results = self.process_gemini_text(post_description, ocr_text, gemini_results, media_files)
+        post_description = url['description']
+
+        with StagedPipeline(self.stage_workers) as pipeline:
+            # Step 1: Download Instagram post media
+            print("Downloading Instagram post...")
+            downloads = pipeline.map("download", self.download_media, url['image_url'])
+
+            # Step 2: Perform OCR per image as downloads complete
+            ocr_results = [pipeline.submit("ocr", self.ocr_image, after=[download]) for download in downloads]
+
+            # Step 3: Analyze media with Gemini once all media is on disk; images and
+            # videos are described concurrently, but only images become listing images
+            def analyze(*downloaded):
+                media_files = [file for file in downloaded if file and file.lower().endswith(IMAGE_EXTENSIONS + VIDEO_EXTENSIONS)]
+                print("Media files:", media_files)
+                print("Analyzing media with Gemini...")
+                image_files = [file for file in media_files if file.lower().endswith(IMAGE_EXTENSIONS)]
+                return image_files, self.analyze_with_gemini(media_files)
+
+            vision = pipeline.submit("vision", analyze, after=downloads)
+
+            # Step 4: Process Gemini text-only input as soon as its inputs are ready
+            def structure(vision_result, *ocr_blocks):
+                media_files, gemini_results = vision_result
+                ocr_text = self.write_ocr_output([block for block in ocr_blocks if block])
+                print("OCR text:", ocr_text)
+                print("Gemini results:", gemini_results)
+                print("Processing data with Gemini text model...")
+                return self.process_gemini_text(post_description, ocr_text, gemini_results, media_files)
+
+            final = pipeline.submit("text", structure, after=[vision, *ocr_results])
+            final_results = final.result()
+
+        self.stage_timings = dict(pipeline.timings)
+        print("Stage timings:", self.stage_timings)
         print("Result: ", final_results)
 
         return final_results
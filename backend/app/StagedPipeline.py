@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class StagedPipeline:
+    """
+    Runs the work of a post through named stages, each backed by its own bounded
+    thread pool, so network round trips and tesseract runs of different stages
+    overlap instead of adding up.
+
+    A task can depend on futures from earlier stages; it is only queued on its
+    stage pool once all of them are done, so no worker ever sits blocked on a
+    dependency.
+    """
+
+    DEFAULT_STAGE_WORKERS = {
+        "download": 8,
+        "ocr": os.cpu_count() or 4,  # Threads only wait on the OCR process pool
+        "vision": 2,
+        "text": 1,
+    }
+
+    def __init__(self, stage_workers=None):
+        """
+        :param stage_workers: Optional mapping of stage name to max worker count.
+                              Unknown stages fall back to a single worker.
+        """
+        self.stage_workers = dict(self.DEFAULT_STAGE_WORKERS)
+        if stage_workers:
+            self.stage_workers.update(stage_workers)
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.timings = {}
+
+    def _pool(self, stage):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Cannot schedule {stage} work after the pipeline was shut down")
+            pool = self._pools.get(stage)
+            if pool is None:
+                pool = ThreadPoolExecutor(
+                    max_workers=self.stage_workers.get(stage, 1),
+                    thread_name_prefix=f"pipeline-{stage}",
+                )
+                self._pools[stage] = pool
+            return pool
+
+    def _record(self, stage, elapsed):
+        with self._lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + elapsed
+
+    def _timed(self, stage, fn, args, kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._record(stage, time.perf_counter() - start)
+
+    def submit(self, stage, fn, *args, after=(), **kwargs):
+        """
+        Schedule fn on the pool of the given stage.
+
+        :param stage: Stage name, e.g. "download" or "ocr".
+        :param fn: Callable to run.
+        :param after: Futures that must complete before fn is queued. Their results
+                      are passed to fn as leading positional arguments, in order.
+        :return: A Future resolving to fn's return value. If a dependency failed,
+                 the future carries that dependency's exception.
+        """
+        after = list(after)
+        if not after:
+            return self._pool(stage).submit(self._timed, stage, fn, args, kwargs)
+
+        result = Future()
+        remaining = [len(after)]
+        remaining_lock = threading.Lock()
+
+        def chain(inner):
+            try:
+                result.set_result(inner.result())
+            except BaseException as e:
+                result.set_exception(e)
+
+        def on_dependency_done(_):
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            try:
+                dep_results = [dep.result() for dep in after]
+                # Raises RuntimeError once the pipeline (or the stage pool) is shut down
+                inner = self._pool(stage).submit(self._timed, stage, fn, (*dep_results, *args), kwargs)
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            inner.add_done_callback(chain)
+
+        for dep in after:
+            dep.add_done_callback(on_dependency_done)
+        return result
+
+    def map(self, stage, fn, items, after=()):
+        """
+        Schedule fn once per item on the given stage.
+
+        :return: List of futures in the same order as items.
+        """
+        return [self.submit(stage, fn, item, after=after) for item in items]
+
+    def shutdown(self, wait=True):
+        """
+        Shut down every stage pool. Work already queued still runs (and is waited
+        for if wait is set); dependent tasks that were not queued yet fail with
+        RuntimeError instead of starting new pools.
+        """
+        with self._lock:
+            self._closed = True
+            pools = list(self._pools.values())
+            self._pools = {}
+        for pool in pools:
+            pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=exc_type is None)
+        return False
@@ -0,0 +1,194 @@
+import json
+from typing import List, TypedDict
+import json5
+
+
+class ProductDetail(TypedDict):
+    name: str
+    value: str
+
+
+class ProductListingOutput(TypedDict):
+    product_title: str
+    price: str
+    product_details: List[ProductDetail]
+    about_this_item: str
+    product_description: str
+
+
+# Schema sent as response_schema. Gemini's schema subset has no free-form maps,
+# so the dynamic product_details are requested as name/value pairs.
+PRODUCT_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "product_title": {"type": "string"},
+        "price": {"type": "string"},
+        "product_details": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "value": {"type": "string"},
+                },
+                "required": ["name", "value"],
+            },
+        },
+        "about_this_item": {"type": "string"},
+        "product_description": {"type": "string"},
+    },
+    "required": ["product_title", "price", "product_details", "about_this_item", "product_description"],
+}
+
+PRODUCT_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": PRODUCT_RESPONSE_SCHEMA,
+}
+
+# Older free-text answers used these keys
+LEGACY_KEYS = {
+    "about this item": "about_this_item",
+    "Product description": "product_description",
+}
+
+
+class StructuredOutputError(ValueError):
+    pass
+
+
+def strip_code_fences(text):
+    """Return the body of a ```json fenced block, or the text itself if it has none."""
+    if "```" not in text:
+        return text.strip()
+    body = text.split("```", 1)[1]
+    if body.startswith("json"):
+        body = body[4:]
+    return body.split("```", 1)[0].strip()
+
+
+def _close_json(text):
+    """
+    Close whatever is left open at the end of a truncated JSON text.
+
+    Drops a dangling comma, colon or unfinished key, closes an open string and
+    then every open array and object.
+    """
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]' and stack:
+            stack.pop()
+
+    if in_string:
+        text += '"'
+    text = text.rstrip()
+    if text.endswith(','):
+        text = text[:-1]
+    elif text.endswith(':'):
+        # A key without a value: drop the key as well
+        key_end = text[:-1].rstrip()
+        key_start = key_end.rfind('"', 0, len(key_end) - 1)
+        text = key_end[:key_start].rstrip().rstrip(',')
+    return text + ''.join(reversed(stack))
+
+
+def repair_json(text, max_attempts=20):
+    """
+    Parse JSON that may be truncated or slightly malformed.
+
+    The text is closed off as it stands; if it still does not parse, it is cut
+    back to the previous comma and closed again, one element at a time, so as
+    much of the output as possible is kept.
+
+    :raises StructuredOutputError: If no prefix of the text can be parsed.
+    """
+    candidate = text.strip()
+    for _ in range(max_attempts):
+        closed = _close_json(candidate)
+        for loads in (json.loads, json5.loads):
+            try:
+                return loads(closed)
+            except ValueError:
+                continue
+        cut = candidate.rfind(',')
+        if cut <= 0:
+            break
+        candidate = candidate[:cut]
+    raise StructuredOutputError("Could not recover JSON from model output")
+
+
+def parse_json_output(text):
+    """
+    Parse a model response into a Python object, repairing it if needed.
+
+    :raises StructuredOutputError: If nothing usable can be recovered.
+    """
+    body = strip_code_fences(text or "")
+    if not body:
+        raise StructuredOutputError("Empty model output")
+    try:
+        return json.loads(body)
+    except ValueError:
+        return repair_json(body)
+
+
+def _as_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list):
+        return "\n".join(_as_text(item) for item in value if item)
+    return str(value)
+
+
+def _details_dict(details):
+    if isinstance(details, dict):
+        return {str(key): _as_text(value) for key, value in details.items()}
+    result = {}
+    for item in details or []:
+        if isinstance(item, dict) and item.get("name"):
+            result[str(item["name"])] = _as_text(item.get("value"))
+    return result
+
+
+def validate_product_output(data, images_list):
+    """
+    Validate parsed model output against ProductListingOutput and return it in
+    the shape stored by the listing pipeline.
+
+    Missing fields become empty strings and non-string values are coerced, so a
+    partially repaired answer still yields a usable listing.
+
+    :param data: Parsed model output.
+    :param images_list: Media files of the post; not generated by the model.
+    :return: Dict with images_list, product_title, price, product_details,
+             "about this item" and "Product description".
+    :raises StructuredOutputError: If data is not an object or has no title.
+    """
+    if not isinstance(data, dict):
+        raise StructuredOutputError(f"Expected a JSON object, got {type(data).__name__}")
+    data = {LEGACY_KEYS.get(key, key): value for key, value in data.items()}
+    product_title = _as_text(data.get("product_title"))
+    if not product_title:
+        raise StructuredOutputError("Model output has no product_title")
+    return {
+        "images_list": list(images_list),
+        "product_title": product_title,
+        "price": _as_text(data.get("price")),
+        "product_details": _details_dict(data.get("product_details")),
+        "about this item": _as_text(data.get("about_this_item")),
+        "Product description": _as_text(data.get("product_description")),
+    }
@@ -0,0 +1,136 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import cache
+from .MediaCache import file_sha256
+from .ResponseCache import get_response_cache
+
+VIDEO_PROMPT = "What's in this video?"
+VIDEO_PROMPT_VERSION = 1
+
+UPLOADED_FILE_CACHE_PREFIX = 'gemini_file:'
+
+
+class VideoAnalysisManager:
+    """
+    Uploads videos to Gemini concurrently and describes them once they are processed.
+
+    Processing state is polled with exponential backoff starting at poll_initial
+    seconds, so short clips are picked up almost immediately and long ones do not
+    flood the API. Uploaded file handles are remembered per content hash in the
+    shared cache (Gemini keeps uploads for 48 hours), so the same clip is not
+    uploaded again by any worker.
+    """
+
+    def __init__(self, client, max_concurrent=None, poll_initial=None, poll_max=None, poll_factor=1.6,
+                 processing_timeout=None, refresh_cache=False):
+        """
+        :param client: GeminiClient used for uploads and generation.
+        :param max_concurrent: Videos uploaded and processed at the same time.
+        :param poll_initial: First delay in seconds between processing state checks.
+        :param poll_max: Upper bound for the delay between checks.
+        :param poll_factor: Growth of the delay after each check.
+        :param processing_timeout: Seconds to wait for Gemini to finish processing one upload.
+        :param refresh_cache: Ignore cached descriptions and store fresh ones.
+        """
+        self.client = client
+        self.max_concurrent = max_concurrent or settings.GEMINI_VIDEO_CONCURRENCY
+        self.poll_initial = poll_initial or settings.GEMINI_POLL_INITIAL
+        self.poll_max = poll_max or settings.GEMINI_POLL_MAX
+        self.poll_factor = poll_factor
+        self.processing_timeout = processing_timeout or settings.GEMINI_VIDEO_PROCESSING_TIMEOUT
+        self.refresh_cache = refresh_cache
+        self._upload_locks = {}
+        self._upload_locks_lock = threading.Lock()
+
+    def _upload_lock(self, sha256):
+        with self._upload_locks_lock:
+            return self._upload_locks.setdefault(sha256, threading.Lock())
+
+    def _reuse_upload(self, sha256):
+        name = cache.get(UPLOADED_FILE_CACHE_PREFIX + sha256)
+        if not name:
+            return None
+        try:
+            uploaded = self.client.get_file(name)
+        except Exception as e:
+            print(f"Uploaded file {name} is no longer available: {e}")
+            cache.delete(UPLOADED_FILE_CACHE_PREFIX + sha256)
+            return None
+        if uploaded.state.name == "FAILED":
+            cache.delete(UPLOADED_FILE_CACHE_PREFIX + sha256)
+            return None
+        return uploaded
+
+    def upload(self, video_path, sha256):
+        """
+        Return a Gemini file handle for the video, uploading it only if no live upload of the same content exists.
+        """
+        with self._upload_lock(sha256):
+            uploaded = self._reuse_upload(sha256)
+            if uploaded is not None:
+                print(f"Reusing upload {uploaded.name} for {video_path}")
+                return uploaded
+            print(f"Uploading file: {video_path}")
+            uploaded = self.client.upload_file(video_path)
+            print(f"Completed upload: {uploaded.uri}")
+            cache.set(UPLOADED_FILE_CACHE_PREFIX + sha256, uploaded.name, settings.GEMINI_FILE_TTL)
+            return uploaded
+
+    def wait_until_active(self, uploaded):
+        """
+        Poll an uploaded file until Gemini has processed it.
+
+        :raises ValueError: If processing failed.
+        :raises TimeoutError: If it did not finish within processing_timeout.
+        """
+        deadline = time.monotonic() + self.processing_timeout
+        delay = self.poll_initial
+        while uploaded.state.name == "PROCESSING":
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"Video {uploaded.name} still processing after {self.processing_timeout}s")
+            time.sleep(delay)
+            delay = min(delay * self.poll_factor, self.poll_max)
+            uploaded = self.client.get_file(uploaded.name)
+        if uploaded.state.name == "FAILED":
+            raise ValueError("Video processing failed.")
+        return uploaded
+
+    def describe(self, video_path, sha256=None):
+        """
+        Describe one video, using the cached description when available.
+
+        :return: Generated content describing the video.
+        """
+        sha256 = sha256 or file_sha256(video_path)
+
+        def generate():
+            uploaded = self.wait_until_active(self.upload(video_path, sha256))
+            response = self.client.generate(settings.GEMINI_VIDEO_MODEL, [uploaded, VIDEO_PROMPT], timeout=settings.GEMINI_VIDEO_TIMEOUT)
+            return response.text
+
+        return get_response_cache().cached(
+            settings.GEMINI_VIDEO_MODEL, VIDEO_PROMPT_VERSION, [VIDEO_PROMPT, sha256],
+            generate, refresh=self.refresh_cache,
+        )
+
+    def describe_many(self, video_paths):
+        """
+        Describe several videos concurrently; identical clips are handled once.
+
+        :return: List in input order with each video's description, or the exception it raised.
+        """
+        digests = [file_sha256(path) for path in video_paths]
+        with ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="gemini-video") as executor:
+            futures = {}
+            for path, digest in zip(video_paths, digests):
+                if digest not in futures:
+                    futures[digest] = executor.submit(self.describe, path, digest)
+            results = []
+            for digest in digests:
+                try:
+                    results.append(futures[digest].result())
+                except Exception as e:
+                    results.append(e)
+        return results
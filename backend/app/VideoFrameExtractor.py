@@ -1,15 +1,32 @@
 import os
 import uuid
 import cv2
-import tempfile
-import requests
-import random
-import string
 from django.conf import settings
+from .MediaCache import get_media_store
+
+SAMPLING_INTERVAL = "interval"
+SAMPLING_SCENE = "scene"
 
 class VideoFrameExtractor:
-    def __init__(self, video_url):
+    def __init__(self, video_url, sampling=SAMPLING_INTERVAL, interval_seconds=1.0, max_frames=None,
+                 scene_threshold=0.35, scene_sample_seconds=0.25):
+        """
+        :param video_url: URL of the video to extract frames from.
+        :param sampling: "interval" keeps one frame every interval_seconds; "scene" keeps
+                         only frames that differ visually from the previously kept one.
+        :param interval_seconds: Spacing between kept frames in interval mode.
+        :param max_frames: Upper bound on frames kept per video (defaults to settings.VIDEO_MAX_FRAMES).
+        :param scene_threshold: Histogram distance (0-1) above which a frame counts as a new scene.
+        :param scene_sample_seconds: Spacing between frames compared in scene mode.
+        """
+        if sampling not in (SAMPLING_INTERVAL, SAMPLING_SCENE):
+            raise ValueError(f"Unknown sampling mode: {sampling}")
         self.video_url = video_url
+        self.sampling = sampling
+        self.interval_seconds = interval_seconds
+        self.max_frames = max_frames or settings.VIDEO_MAX_FRAMES
+        self.scene_threshold = scene_threshold
+        self.scene_sample_seconds = scene_sample_seconds
         # Generate a unique folder name for this extraction
         self.unique_folder_name = str(uuid.uuid4().hex)[:10]
         # Use absolute path for storage
@@ -18,31 +35,11 @@ class VideoFrameExtractor:
         print(f"Created directory at: {self.output_dir}")
 
     def _download_video(self):
-        """Download the video from the given URL and return the path to the downloaded file"""
+        """Fetch the video through the media store and return the path to the cached file"""
         try:
-            # Generate random filename
-            random_alphanumeric_file_name = ''.join(random.choices(string.ascii_lowercase + string.digits, k=10))
-            video_path = os.path.join(settings.BASE_DIR, "static", f"video_{random_alphanumeric_file_name}.mp4")
-            
-            # Download video with progress reporting
             print(f"Downloading video from {self.video_url}...")
-            response = requests.get(self.video_url, stream=True)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            with open(video_path, 'wb') as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        file.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            percent = (downloaded / total_size) * 100
-                            if downloaded % (1024 * 1024) == 0:  # Report every MB
-                                print(f"Downloaded {downloaded/(1024*1024):.1f}MB of {total_size/(1024*1024):.1f}MB ({percent:.1f}%)")
-            
-            print(f"Video downloaded and saved as: {video_path}")
+            _, video_path = get_media_store().fetch(self.video_url, ext=".mp4")
+            print(f"Video available at: {video_path}")
             return video_path
         except Exception as e:
             print(f"Error downloading video: {str(e)}")
@@ -57,61 +54,142 @@ class VideoFrameExtractor:
         """Create the output folder for extracted frames if it doesn't exist"""
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def extract_frames(self):
-        """Extract frames from the video and return a list of paths to the extracted frames"""
-        try:
-            self.video_path = self._download_video()
-            self._validate_video_path()
-            
-            print(f"Opening video file: {self.video_path}")
-            cap = cv2.VideoCapture(self.video_path)
-            if not cap.isOpened():
-                raise Exception(f"Failed to open the video file: {self.video_path}")
+    def _step_frames(self, fps, seconds, total_frames):
+        """Frames between two samples, widened so at most max_frames samples cover the video."""
+        step = max(1, int(round(fps * seconds))) if fps > 0 else 1
+        if total_frames > 0:
+            step = max(step, -(-total_frames // self.max_frames))
+        return step
+
+    def _advance(self, cap, position, target, seek_gap):
+        """
+        Move the capture from position to target without decoding the frames in between.
+
+        Short gaps are skipped with grab(), which demuxes without converting frames to
+        BGR; long gaps seek directly so the decoder restarts at the nearest keyframe.
+
+        :return: The new position, or None when the video ended.
+        """
+        gap = target - position
+        if gap >= seek_gap:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            return target
+        for _ in range(gap):
+            if not cap.grab():
+                return None
+        return target
+
+    def _iter_interval_frames(self, cap, fps, total_frames):
+        """Yield (frame_number, frame) every interval_seconds, decoding only the kept frames."""
+        step = self._step_frames(fps, self.interval_seconds, total_frames)
+        seek_gap = max(2 * int(fps or 1), 30)
+        position = 0
+        target = 0
+        kept = 0
+        while kept < self.max_frames:
+            position = self._advance(cap, position, target, seek_gap)
+            if position is None:
+                break
+            ret, frame = cap.read()
+            if not ret:
+                break
+            position += 1
+            kept += 1
+            yield target, frame
+            target += step
+
+    def _scene_signature(self, frame):
+        """
+        Normalized hue/saturation and brightness histograms of a downscaled frame.
+
+        Hue and saturation tell colored scenes apart; the separate value histogram
+        catches cuts that mainly change brightness, and grayscale or washed-out
+        shots, where hue and saturation carry almost no information.
+        """
+        small = cv2.resize(frame, (160, 90), interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        color = cv2.calcHist([hsv], [0, 1], None, [16, 16], [0, 180, 0, 256])
+        brightness = cv2.calcHist([hsv], [2], None, [32], [0, 256])
+        return cv2.normalize(color, color).flatten(), cv2.normalize(brightness, brightness).flatten()
+
+    def _scene_distance(self, a, b):
+        """Bhattacharyya distance (0-1) between two scene signatures; the larger of color and brightness."""
+        return max(cv2.compareHist(x, y, cv2.HISTCMP_BHATTACHARYYA) for x, y in zip(a, b))
+
+    def _iter_scene_frames(self, cap, fps, total_frames):
+        """Yield (frame_number, frame) only where the picture differs from the last kept frame."""
+        step = max(1, int(round(fps * self.scene_sample_seconds))) if fps > 0 else 1
+        last_signature = None
+        position = 0
+        kept = 0
+        while kept < self.max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_number = position
+            position += 1
+            signature = self._scene_signature(frame)
+            if last_signature is None or self._scene_distance(last_signature, signature) > self.scene_threshold:
+                last_signature = signature
+                kept += 1
+                yield frame_number, frame
+            position = self._advance(cap, position, position + step - 1, step)
+            if position is None:
+                break
+
+    def _sample_frames(self, cap, fps, total_frames):
+        if self.sampling == SAMPLING_SCENE:
+            return self._iter_scene_frames(cap, fps, total_frames)
+        return self._iter_interval_frames(cap, fps, total_frames)
 
+    def iter_frames(self):
+        """
+        Download the video and yield sampled frames as (frame_number, BGR ndarray)
+        without writing them to disk.
+        """
+        self.video_path = self._download_video()
+        self._validate_video_path()
+
+        print(f"Opening video file: {self.video_path}")
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            raise Exception(f"Failed to open the video file: {self.video_path}")
+
+        try:
             # Get video properties
             fps = cap.get(cv2.CAP_PROP_FPS)
             total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             print(f"Video has {total_frames} frames at {fps} FPS")
-            
-            # Calculate interval (1 frame per second)
-            interval = max(1, int(fps))
-            
-            frame_paths = []
-            frame_count = 0
-            frame_index = 0
-
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                if frame_count % interval == 0:
-                    frame_name = f"frame_{frame_index:04d}.jpg"
-                    frame_path = os.path.join(self.output_dir, frame_name)
-                    success = cv2.imwrite(frame_path, frame)
-                    
-                    if success:
-                        print(f"Saved frame {frame_index} to {frame_path}")
-                        frame_paths.append(frame_path)
-                        frame_index += 1
-                    else:
-                        print(f"Failed to save frame {frame_index}")
-
-                frame_count += 1
-                if frame_count % 100 == 0:
-                    print(f"Processed {frame_count} frames...")
-
+            yield from self._sample_frames(cap, fps, total_frames)
+        finally:
             cap.release()
-            print(f"Extracted {len(frame_paths)} frames from video")
-            
-            # When returning frame paths, convert to URLs
+
+    def save_frame(self, frame, frame_index):
+        """
+        Encode a frame as JPEG into the output folder.
+
+        :return: The /static/ URL path of the saved frame, or None if encoding failed.
+        """
+        frame_name = f"frame_{frame_index:04d}.jpg"
+        frame_path = os.path.join(self.output_dir, frame_name)
+        if not cv2.imwrite(frame_path, frame):
+            print(f"Failed to save frame {frame_index}")
+            return None
+        # Get the path relative to the static directory
+        rel_path = os.path.relpath(frame_path, os.path.join(settings.BASE_DIR, 'static'))
+        return f"/static/{rel_path}"
+
+    def extract_frames(self):
+        """Extract frames from the video and return a list of paths to the extracted frames"""
+        try:
             frame_urls = []
-            for frame_path in frame_paths:
-                # Get the path relative to the static directory
-                rel_path = os.path.relpath(frame_path, os.path.join(settings.BASE_DIR, 'static'))
-                url_path = f"/static/{rel_path}"
-                frame_urls.append(url_path)
-                
+            for frame_index, (frame_number, frame) in enumerate(self.iter_frames()):
+                url_path = self.save_frame(frame, frame_index)
+                if url_path:
+                    print(f"Saved frame {frame_index} (video frame {frame_number}) to {url_path}")
+                    frame_urls.append(url_path)
+
+            print(f"Extracted {len(frame_urls)} frames from video")
             return frame_urls
             
         except Exception as e:
@@ -120,6 +198,23 @@ class VideoFrameExtractor:
             traceback.print_exc()
             return []
 
+    def extract_best_frames(self, quality_checker, top_n=3):
+        """
+        Score frames in memory as they are decoded and only write the best ones to disk.
+
+        :param quality_checker: ImageQualityChecker used to score the frames.
+        :param top_n: Number of frames to keep.
+        :return: /static/ URL paths of the saved frames, sharpest first.
+        """
+        best = quality_checker.start_from_frames(self.iter_frames(), top_n=top_n)
+        frame_urls = []
+        for frame_index, (frame_number, frame, score) in enumerate(best):
+            url_path = self.save_frame(frame, frame_index)
+            if url_path:
+                print(f"Saved frame {frame_index} (video frame {frame_number}, score {score:.2f}) to {url_path}")
+                frame_urls.append(url_path)
+        return frame_urls
+
 # Example usage
 if __name__ == "__main__":
     video_file = "/home/byte/Projects/hackathons/amazon_sambhav/reel_images/watch.mp4"
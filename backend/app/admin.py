@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import ConnectedSocialMedia, ProductListings
+from .models import ConnectedSocialMedia, ProductListings, ConversionJob, ComplianceResult
 
 admin.site.register(ConnectedSocialMedia)
 admin.site.register(ProductListings)
+admin.site.register(ConversionJob)
+admin.site.register(ComplianceResult)
@@ -1,17 +1,42 @@
+import base64
+import json
+import traceback
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets
 from rest_framework.response import Response
 from permissions.clerk import ClerkAuthenticated
-from .models import ConnectedSocialMedia, ProductListings
+from .models import ConnectedSocialMedia, ProductListings, ConversionJob
 from rest_framework.views import APIView
-from .serializers import ConnectedSocialMediaSerializer, ProductListingsSerializer
-from .Social2Amazon import Social2Amazon
-from .InstaFetcher import InstaFetcher
+from .serializers import ConnectedSocialMediaSerializer, ProductListingsSerializer, ConversionJobSerializer
 from .FacebookFetcher import FacebookFetcher
-from .VideoFrameExtractor import VideoFrameExtractor
-from .ImageQualityChecker import ImageQualityChecker
+from .LazyImports import lazy
+from .JobHandlers import SOCIAL2AMAZON_JOB, CONVERT_VIDEO_JOB
+from .JobQueue import submit_job
+from .DashboardStats import get_dashboard_stats, get_daily_series
+from .ListingCompliance import ListingComplianceChecker, compliance_checkers
 import backend.settings as settings
 from rest_framework.permissions import AllowAny
 
+# InstaFetcher pulls in cv2; only load it when a profile is actually fetched
+InstaFetcher = lazy('app.InstaFetcher:InstaFetcher')
+
+def encode_listing_cursor(listing):
+    """Opaque keyset cursor pointing just after the given listing."""
+    raw = json.dumps([listing.created_at.isoformat(), listing.product_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_listing_cursor(cursor):
+    """Inverse of encode_listing_cursor; raises ValueError on malformed input."""
+    try:
+        created_at, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    created_at = parse_datetime(created_at)
+    if created_at is None:
+        raise ValueError("Invalid cursor timestamp")
+    return created_at, product_id
+
 post_data = [
     {
         "id": 1,
@@ -96,41 +121,112 @@ class UpdateListingAPI(APIView):
         product.approved = data.get('approved')
         product.save()
         serializer = ProductListingsSerializer(product)
-        return Response(serializer.data)
+        # Only the rules reading an edited field are re-run, so this stays cheap for small edits.
+        # The edit is already saved, so a failing check must not turn it into an error response.
+        try:
+            compliance = ListingComplianceChecker().recheck(product)
+        except Exception as e:
+            print(f"Compliance recheck failed for {product_id}: {str(e)}")
+            print(traceback.format_exc())
+            compliance = None
+        return Response({**serializer.data, "compliance": compliance})
 
 class PreviousListingAPI(APIView):
+    """
+    List listings newest first.
+
+    Without pagination parameters this returns every listing as a plain list.
+    With ?limit= and/or ?cursor= it returns one keyset page as
+    {"results": [...], "next_cursor": ...}. ?fields=a,b,c restricts which fields
+    are loaded and serialized, e.g. to skip the large JSON/text columns in list views.
+    """
     permission_classes = [ClerkAuthenticated]
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    # Keyset columns are always loaded so the next cursor can be built
+    KEYSET_FIELDS = ('created_at', 'product_id')
+
     def get(self, request):
-        # Change: Get ALL listings instead of excluding the most recent
-        # Previously this was using [1:] which skipped the first result
-        all_listings = ProductListings.objects.all().order_by('-created_at')
-        serializer = ProductListingsSerializer(all_listings, many=True)
-        return Response(serializer.data)
+        fields = None
+        if request.query_params.get('fields'):
+            model_fields = {field.name for field in ProductListings._meta.concrete_fields}
+            requested = (name.strip() for name in request.query_params['fields'].split(','))
+            fields = [name for name in requested if name in model_fields]
+
+        listings = ProductListings.objects.order_by('-created_at', '-product_id')
+        if fields:
+            listings = listings.only(*set(fields) | set(self.KEYSET_FIELDS))
+
+        cursor = request.query_params.get('cursor')
+        limit = request.query_params.get('limit')
+        if not cursor and not limit:
+            # Change: Get ALL listings instead of excluding the most recent
+            # Previously this was using [1:] which skipped the first result
+            serializer = ProductListingsSerializer(listings, many=True, fields=fields or None)
+            return Response(serializer.data)
+
+        try:
+            limit = min(max(int(limit or self.DEFAULT_PAGE_SIZE), 1), self.MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({"message": "limit must be an integer"}, status=400)
+
+        if cursor:
+            try:
+                created_at, product_id = decode_listing_cursor(cursor)
+            except ValueError:
+                return Response({"message": "Invalid cursor"}, status=400)
+            listings = listings.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, product_id__lt=product_id)
+            )
+
+        page = list(listings[:limit + 1])
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_listing_cursor(page[-1])
+
+        serializer = ProductListingsSerializer(page, many=True, fields=fields or None)
+        return Response({
+            "results": serializer.data,
+            "next_cursor": next_cursor
+        })
 
 class DashboardStatsAPI(APIView):
     permission_classes = [ClerkAuthenticated]
+    MAX_SERIES_DAYS = 365
     def get(self, request):
-        total_products = ProductListings.objects.count()
-        approved_products = ProductListings.objects.filter(approved=True).count()
-        disapproved_products = ProductListings.objects.filter(approved=False).count()
-        
-        total_connected_social_media = ConnectedSocialMedia.objects.first()
-        connected_social_media_count = 0
+        stats = get_dashboard_stats()
 
-        if total_connected_social_media:
-            links = [
-                total_connected_social_media.instagram_link,
-                total_connected_social_media.facebook_link,
-                total_connected_social_media.tiktok_link,
-            ]
-            connected_social_media_count = sum(1 for link in links if link.strip())
+        # Optional per-day time series: ?series_days=30
+        series_days = request.query_params.get('series_days')
+        if series_days:
+            try:
+                series_days = min(max(int(series_days), 1), self.MAX_SERIES_DAYS)
+            except ValueError:
+                return Response({"message": "series_days must be an integer"}, status=400)
+            stats["series"] = get_daily_series(series_days)
 
-        return Response({
-            "total_listings": total_products,
-            "approved_listings": approved_products,
-            "disapproved_listings": disapproved_products,
-            "connected_social_media": connected_social_media_count
-        })
+        return Response(stats)
+
+class ComplianceMetricsAPI(APIView):
+    """
+    Per-rule evaluation count, time, p50/p99 latency and violation rate of the
+    compliance checks run by this process (see RuleMetrics).
+
+    ?sort= orders the rules by another stats key, e.g. p99_us or violation_rate.
+    """
+    permission_classes = [ClerkAuthenticated]
+    SORT_KEYS = ('total_ms', 'mean_us', 'p50_us', 'p99_us', 'evaluations', 'violations', 'violation_rate')
+
+    def get(self, request):
+        sort_by = request.query_params.get('sort', 'total_ms')
+        if sort_by not in self.SORT_KEYS:
+            return Response({"message": f"sort must be one of {', '.join(self.SORT_KEYS)}"}, status=400)
+        marketplaces = {}
+        for checker in compliance_checkers().values():
+            if checker.metrics is not None:
+                marketplaces[checker.marketplace_profile.marketplace_name] = checker.metrics.snapshot(sort_by)
+        return Response({"instrumented": settings.COMPLIANCE_INSTRUMENTATION, "marketplaces": marketplaces})
 
 class ProfileDataAPI(APIView):
     permission_classes = [ClerkAuthenticated]
@@ -207,7 +303,49 @@ class FetchFaceBookPostAPI(APIView):
                             "message": "Failed to fetch posts"
                         })
 
-class ConvertVideoToImagesAPI(APIView):
+class SubmitSocial2AmazonJobAPI(APIView):
+    """
+    Queue a post-to-listing conversion and return its job id immediately
+    """
+    permission_classes = [ClerkAuthenticated]
+    def post(self, request):
+        insta_post_link = request.data.get('post_link', '')
+        if not insta_post_link:
+            return Response({
+                "message": "Please provide a valid Instagram post link"
+            })
+
+        connected_social_media = ConnectedSocialMedia.objects.first()
+        connected_social_media_count = 0
+        if connected_social_media:
+            links = [
+                connected_social_media.instagram_link,
+                connected_social_media.facebook_link,
+                connected_social_media.tiktok_link,
+            ]
+            connected_social_media_count = sum(1 for link in links if link.strip())
+
+        if not connected_social_media or connected_social_media_count == 0:
+            return Response({
+                "message": "Please connect your social media accounts"
+            })
+
+        job = submit_job(SOCIAL2AMAZON_JOB, {
+            "post_link": insta_post_link,
+            "image_url": request.data.get('image_url', ''),
+            "description": request.data.get('description', ''),
+            "force": bool(request.data.get('force', False))
+        })
+        return Response({
+            "message": "Job queued",
+            "job_id": str(job.job_id),
+            "status": job.status
+        }, status=202)
+
+class SubmitConvertVideoJobAPI(APIView):
+    """
+    Queue a video-to-images conversion and return its job id immediately
+    """
     permission_classes = [ClerkAuthenticated]
     def post(self, request):
         video_url = request.data.get('video_url', '')
@@ -215,108 +353,57 @@ class ConvertVideoToImagesAPI(APIView):
             return Response({
                 "message": "Please provide a valid video URL"
             })
-        else:
-            extractor = VideoFrameExtractor(video_url)
-            try:
-                frame_files = extractor.extract_frames()
-                
-                # Ensure frame_files have full URLs with domain
-                full_frame_urls = []
-                base_url = "http://127.0.0.1:8000" if settings.DEBUG else ""
-                
-                for url in frame_files:
-                    # Make sure we have a proper URL format
-                    if url.startswith('/'):
-                        url = f"{base_url}{url}"
-                    elif not url.startswith('http') and settings.DEBUG:
-                        url = f"{base_url}/{url}"
-                    full_frame_urls.append(url)
-                
-                get_quality = ImageQualityChecker(full_frame_urls)
-                quality_images = get_quality.start()
-                
-                return Response({
-                    "message": "Video converted to images successfully",
-                    "quality_images": quality_images
-                })
-            except Exception as e:
-                # Add error handling to help debug issues
-                import traceback
-                print(f"Error extracting frames: {str(e)}")
-                print(traceback.format_exc())
-                return Response({
-                    "message": f"Error extracting frames: {str(e)}",
-                    "error": True
-                }, status=500)
 
-class Social2AmazonAPI(APIView):
+        job = submit_job(CONVERT_VIDEO_JOB, {
+            "video_url": video_url,
+            "sampling": request.data.get('sampling', '')
+        })
+        return Response({
+            "message": "Job queued",
+            "job_id": str(job.job_id),
+            "status": job.status
+        }, status=202)
+
+class ConvertVideoToImagesAPI(SubmitConvertVideoJobAPI):
+    """
+    Legacy path of jobs/convert_video_to_images: queues the conversion and
+    returns 202 with the job id instead of extracting frames inside the request.
+    """
+
+class Social2AmazonAPI(SubmitSocial2AmazonJobAPI):
+    """
+    Legacy path of jobs/social2amazon: queues the conversion and returns 202
+    with the job id instead of running the pipeline inside the request.
+    """
+
+class JobStatusAPI(APIView):
     permission_classes = [ClerkAuthenticated]
-    def post(self, request):
-        insta_post_link = request.data.get('post_link', '')
-        images_link = request.data.get('image_url', '')
-        post_description = request.data.get('description', '')
-        social2amazon_data = {
-            "post_link": insta_post_link,
-            "image_url": images_link,
-            "description": post_description
-        }
-        if not insta_post_link:
+    def get(self, request, job_id):
+        job = ConversionJob.objects.filter(job_id=job_id).first()
+        if not job:
+            return Response({"message": "Job not found"}, status=404)
+        serializer = ConversionJobSerializer(job)
+        return Response(serializer.data)
+
+class JobResultAPI(APIView):
+    permission_classes = [ClerkAuthenticated]
+    def get(self, request, job_id):
+        job = ConversionJob.objects.filter(job_id=job_id).first()
+        if not job:
+            return Response({"message": "Job not found"}, status=404)
+        if job.status == ConversionJob.STATUS_FAILED:
+            # The endpoint worked, the job did not: 422 keeps this apart from server errors
             return Response({
-                "message": "Please provide a valid Instagram post link"
-            })
-        else:
-            connected_social_media = ConnectedSocialMedia.objects.first()
-            connected_social_media_count = 0
-
-            if connected_social_media:
-                links = [
-                    connected_social_media.instagram_link,
-                    connected_social_media.facebook_link,
-                    connected_social_media.tiktok_link,
-                ]
-                connected_social_media_count = sum(1 for link in links if link.strip())
-
-            if not connected_social_media or connected_social_media_count == 0:
-                return Response({
-                    "message": "Please connect your social media accounts"
-                })
-            else:
-                GOOGLE_API_KEY = settings.GOOGLE_API_KEY
-                social2amazon = Social2Amazon(GOOGLE_API_KEY=GOOGLE_API_KEY)
-                product_data = social2amazon.process_post(social2amazon_data)
-                product_title = product_data.get('product_title')
-                product_title_hash = hash(product_title)
-                if ProductListings.objects.filter(product_id=product_title_hash).exists():
-                    ProductListings.objects.filter(product_id=product_title_hash).delete()
-                
-                # Make sure product_data has valid JSON or None for JSON fields
-                if 'about this item' in product_data and not isinstance(product_data['about this item'], (dict, list)) and product_data['about this item']:
-                    # Convert string to valid JSON or set to None
-                    try:
-                        import json
-                        product_data['about this item'] = json.loads(product_data['about this item'])
-                    except:
-                        product_data['about this item'] = None
-
-                if 'product_details' in product_data and not isinstance(product_data['product_details'], (dict, list)) and product_data['product_details']:
-                    try:
-                        import json
-                        product_data['product_details'] = json.loads(product_data['product_details'])
-                    except:
-                        product_data['product_details'] = None
-
-                ProductListings(
-                    product_id=product_title_hash,
-                    images_list=product_data.get('images_list'),
-                    product_title=product_title,
-                    price=product_data.get('price'),  # Keep as string
-                    product_details=product_data.get('product_details'),
-                    about_this_item=product_data.get('about this item'),
-                    product_description=product_data.get('Product description')
-                ).save()
-                return Response({
-                    "message": "Data added successfully",
-                })
+                "message": f"Job failed: {job.error}",
+                "status": job.status,
+                "error": job.error
+            }, status=422)
+        if job.status != ConversionJob.STATUS_SUCCEEDED:
+            return Response({
+                "message": "Job is not finished yet",
+                "status": job.status
+            }, status=202)
+        return Response(job.result)
 
 class HealthCheckAPI(APIView):
     """
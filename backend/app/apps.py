@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        # Register job handlers with the queue
+        from . import JobHandlers  # noqa: F401
+        # Keep cached dashboard counters in sync with listing changes
+        from . import signals  # noqa: F401
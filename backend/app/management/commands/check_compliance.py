@@ -0,0 +1,29 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from app.ComplianceBatch import BatchComplianceChecker
+from modules.eci_complience_checker import PROFILE_BUILDERS, build_profile
+
+
+class Command(BaseCommand):
+    help = "Check every product listing against a marketplace profile and store the results"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--marketplace', default='amazon', choices=sorted(PROFILE_BUILDERS), help="Profile to check against")
+        parser.add_argument('--chunk-size', type=int, default=settings.COMPLIANCE_CHUNK_SIZE, help="Listings per chunk")
+        parser.add_argument('--processes', type=int, default=settings.COMPLIANCE_PROCESSES, help="Worker processes (1 = in this process)")
+        parser.add_argument('--per-object', action='store_true', help="Evaluate every rule one listing at a time instead of column-wise")
+        parser.add_argument('--no-save', action='store_true', help="Only print the summary, do not store results")
+
+    def handle(self, *args, **options):
+        checker = BatchComplianceChecker(
+            build_profile(options['marketplace']),
+            chunk_size=options['chunk_size'],
+            processes=options['processes'],
+            columnar=not options['per_object'],
+        )
+        start = time.perf_counter()
+        summary = checker.run(save=not options['no_save'])
+        summary["seconds"] = round(time.perf_counter() - start, 2)
+        self.stdout.write(json.dumps(summary, indent=2, ensure_ascii=False))
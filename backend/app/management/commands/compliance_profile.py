@@ -0,0 +1,43 @@
+import json
+from django.core.management.base import BaseCommand
+from app.ComplianceBatch import BatchComplianceChecker
+from app.models import ProductListings
+from modules.eci_complience_checker import PROFILE_BUILDERS, ECIChecker, ProductListing, build_profile
+
+SORT_KEYS = ('total_ms', 'mean_us', 'p50_us', 'p99_us', 'evaluations', 'violations', 'violation_rate')
+
+
+class Command(BaseCommand):
+    help = "Check listings with per-rule instrumentation and report which rules cost the most time and fire most often"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--marketplace', default='amazon', choices=sorted(PROFILE_BUILDERS), help="Profile to profile")
+        parser.add_argument('--limit', type=int, default=None, help="Check only the first N listings")
+        parser.add_argument('--sort', default='total_ms', choices=SORT_KEYS, help="Order of the rules in the report")
+        parser.add_argument('--uncompiled', action='store_true', help="Let every rule analyse the raw listing on its own")
+        parser.add_argument('--json', action='store_true', help="Print the raw metrics as JSON")
+
+    def handle(self, *args, **options):
+        profile = build_profile(options['marketplace'])
+        # Always in this process: timings should not include pickling or pool overhead
+        checker = ECIChecker(profile, compiled=not options['uncompiled'], instrument=True)
+        queryset = ProductListings.objects.all()
+        if options['limit']:
+            queryset = queryset.filter(pk__in=queryset.order_by('pk').values('pk')[:options['limit']])
+        for chunk in BatchComplianceChecker(profile, processes=1).iter_chunks(queryset):
+            for listing in chunk:
+                checker.check_listing_compliance(ProductListing(**listing))
+
+        snapshot = checker.metrics.snapshot(options['sort'])
+        if options['json']:
+            self.stdout.write(json.dumps(snapshot, indent=2))
+            return
+
+        self.stdout.write(f"{profile.marketplace_name}: {snapshot['listings']} listings, {snapshot['total_ms']:.1f} ms in rules\n")
+        self.stdout.write(f"{'rule':<24} {'type':<26} {'evals':>8} {'viol %':>7} {'total ms':>9} {'share':>6} {'p50 us':>8} {'p99 us':>8}")
+        for stats in snapshot['rules']:
+            self.stdout.write(
+                f"{stats['rule_id']:<24} {stats['rule_type']:<26} {stats['evaluations']:>8} "
+                f"{stats['violation_rate'] * 100:>6.1f}% {stats['total_ms']:>9.2f} {stats['time_share'] * 100:>5.1f}% "
+                f"{stats['p50_us']:>8.2f} {stats['p99_us']:>8.2f}"
+            )
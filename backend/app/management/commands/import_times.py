@@ -0,0 +1,51 @@
+import subprocess
+import sys
+from django.core.management.base import BaseCommand
+from app.LazyImports import HEAVY_MODULES
+
+# Run in a fresh interpreter so each measurement is a cold import on top of django.setup()
+MEASURE_SCRIPT = """
+import os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+import django
+django.setup()
+start = time.perf_counter()
+import importlib
+importlib.import_module(sys.argv[1])
+print(time.perf_counter() - start)
+"""
+
+
+class Command(BaseCommand):
+    help = "Report the cold import cost of heavy modules and of the API module"
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='*', help="Modules to measure (defaults to the heavy modules and app.api)")
+        parser.add_argument('--repeat', type=int, default=3, help="Fresh interpreters per module; the fastest run is reported")
+
+    def measure(self, module_name, repeat):
+        best = None
+        for _ in range(repeat):
+            completed = subprocess.run(
+                [sys.executable, '-c', MEASURE_SCRIPT, module_name],
+                capture_output=True, text=True,
+            )
+            if completed.returncode != 0:
+                return None, completed.stderr.strip().splitlines()[-1:]
+            elapsed = float(completed.stdout.strip().splitlines()[-1])
+            best = elapsed if best is None else min(best, elapsed)
+        return best, None
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or HEAVY_MODULES + ['app.api']
+        results = []
+        for module_name in modules:
+            elapsed, error = self.measure(module_name, options['repeat'])
+            if error is not None:
+                self.stdout.write(self.style.WARNING(f"{module_name}: import failed: {' '.join(error)}"))
+                continue
+            results.append((module_name, elapsed))
+
+        width = max((len(name) for name, _ in results), default=10)
+        for module_name, elapsed in sorted(results, key=lambda item: item[1], reverse=True):
+            self.stdout.write(f"{module_name.ljust(width)}  {elapsed * 1000:9.1f} ms")
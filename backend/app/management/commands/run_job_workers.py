@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from app.JobQueue import JobWorkerPool
+
+
+class Command(BaseCommand):
+    help = "Run a dedicated pool of background workers for queued conversion jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOB_WORKERS, help="Number of worker threads")
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL, help="Seconds between queue polls when idle")
+
+    def handle(self, *args, **options):
+        pool = JobWorkerPool(workers=options['workers'], poll_interval=options['poll_interval'])
+        self.stdout.write(f"Starting {pool.workers} job workers")
+        pool.start()
+        try:
+            pool.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping job workers...")
+            pool.stop()
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_conversionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productlistings',
+            name='source_fingerprint',
+            field=models.CharField(max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-17 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_productlistings_source_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productlistings',
+            index=models.Index(fields=['-created_at', '-product_id'], name='listing_created_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.4 on 2026-10-17 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_productlistings_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplianceResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marketplace', models.CharField(max_length=50)),
+                ('compliance_score', models.FloatField()),
+                ('is_compliant', models.BooleanField()),
+                ('issues', models.JSONField(default=list)),
+                ('checked_at', models.DateTimeField(auto_now=True)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compliance_results', to='app.productlistings')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['marketplace', 'is_compliant'], name='compliance_marketplace_idx')],
+                'constraints': [models.UniqueConstraint(fields=('listing', 'marketplace'), name='compliance_listing_marketplace_uniq')],
+            },
+        ),
+    ]
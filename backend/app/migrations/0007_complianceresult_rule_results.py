@@ -0,0 +1,23 @@
+# Generated by Django 5.0.4 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_complianceresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complianceresult',
+            name='input_digests',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='complianceresult',
+            name='rule_results',
+            field=models.JSONField(default=dict),
+        ),
+    ]
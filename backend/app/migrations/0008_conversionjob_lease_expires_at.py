@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-17 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_complianceresult_rule_results'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversionjob',
+            name='lease_expires_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
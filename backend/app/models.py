@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.conf import settings
 
@@ -13,6 +14,7 @@ class ConnectedSocialMedia(models.Model):
 
 class ProductListings(models.Model):
     product_id = models.CharField(max_length=255, primary_key=True)
+    source_fingerprint = models.CharField(max_length=64, null=True, unique=True)  # SHA-256 of the normalized source post
     images_list = models.JSONField()
     product_title = models.CharField(max_length=255)
     price = models.CharField(max_length=50, null=True)  # Changed from FloatField to CharField
@@ -22,6 +24,19 @@ class ProductListings(models.Model):
     approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination over (created_at, product_id), newest first
+            models.Index(fields=['-created_at', '-product_id'], name='listing_created_keyset_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored approval state so save signals only drop the dashboard counters when it changes
+        instance._loaded_approved = instance.__dict__.get('approved')
+        return instance
     
     def get_full_image_urls(self):
         """
@@ -46,4 +61,59 @@ class ProductListings(models.Model):
         return full_urls
 
     def __str__(self):
-        return self.product_title
\ No newline at end of file
+        return self.product_title
+
+class ConversionJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    job_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    payload = models.JSONField(default=dict)
+    result = models.JSONField(null=True)
+    error = models.TextField(null=True)
+    stage_timings = models.JSONField(default=dict)  # Seconds spent per pipeline stage
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    lease_expires_at = models.DateTimeField(null=True)  # Extended by the running worker's heartbeat
+    finished_at = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.job_id} ({self.status})"
+
+class ComplianceResult(models.Model):
+    listing = models.ForeignKey(ProductListings, on_delete=models.CASCADE, related_name='compliance_results')
+    marketplace = models.CharField(max_length=50)
+    compliance_score = models.FloatField()
+    is_compliant = models.BooleanField()
+    issues = models.JSONField(default=list)
+    rule_results = models.JSONField(default=dict)  # Outcome per rule_id, so edits only re-run affected rules
+    input_digests = models.JSONField(default=dict)  # Digest per checked field, to tell which fields an edit changed
+    checked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'marketplace'], name='compliance_listing_marketplace_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['marketplace', 'is_compliant'], name='compliance_marketplace_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.listing_id} on {self.marketplace}: {self.compliance_score:.1f}"
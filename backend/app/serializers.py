@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import ConnectedSocialMedia, ProductListings
+from .models import ConnectedSocialMedia, ProductListings, ConversionJob
 
 class ConnectedSocialMediaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,7 +13,20 @@ class ProductListingsSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductListings
         fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        # Optional projection: only serialize the given field names
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
     
     def get_price(self, obj):
         # Return the price as is without trying to convert
-        return obj.price
\ No newline at end of file
+        return obj.price
+
+class ConversionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ConversionJob
+        exclude = ['payload', 'result']
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import ConnectedSocialMedia, ProductListings
+from .DashboardStats import apply_listing_change, invalidate_connected_social_media_count
+
+
+@receiver(post_save, sender=ProductListings)
+def listing_saved(sender, instance, created, **kwargs):
+    apply_listing_change(
+        created=created,
+        old_approved=getattr(instance, '_loaded_approved', None),
+        new_approved=instance.approved,
+    )
+    instance._loaded_approved = instance.approved
+
+
+@receiver(post_delete, sender=ProductListings)
+def listing_deleted(sender, instance, **kwargs):
+    apply_listing_change(deleted=True, old_approved=instance.approved)
+
+
+@receiver(post_save, sender=ConnectedSocialMedia)
+@receiver(post_delete, sender=ConnectedSocialMedia)
+def social_media_changed(sender, instance, **kwargs):
+    invalidate_connected_social_media_count()
@@ -1,3 +1,87 @@
-from django.test import TestCase
+import json
+import time
+from unittest import mock
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test import SimpleTestCase
+from middlewares.clerk_auth import ClerkTokenVerifier, JWKSCache, VerifiedTokenCache
 
-# Create your tests here.
+
+def generate_key(kid):
+    """Return (private key, public JWK dict) for a fresh local RSA keypair."""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return private_key, jwk
+
+
+class ClerkTokenVerifierTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.private_key, cls.jwk = generate_key("key-1")
+        cls.rotated_key, cls.rotated_jwk = generate_key("key-2")
+
+    def make_token(self, private_key=None, kid="key-1", **claims):
+        payload = {"sub": "user_123", "azp": "https://app.example.com", "exp": int(time.time()) + 300}
+        payload.update(claims)
+        return jwt.encode(payload, private_key or self.private_key, algorithm="RS256", headers={"kid": kid})
+
+    def make_verifier(self, fetcher=None):
+        jwks = JWKSCache(jwks={"keys": [self.jwk]}, fetcher=fetcher)
+        return ClerkTokenVerifier(jwks, authorized_parties=["https://app.example.com"])
+
+    def test_valid_token(self):
+        claims = self.make_verifier().verify(self.make_token())
+        self.assertEqual(claims["sub"], "user_123")
+
+    def test_expired_token(self):
+        token = self.make_token(exp=int(time.time()) - 60)
+        with self.assertRaises(jwt.ExpiredSignatureError):
+            self.make_verifier().verify(token)
+
+    def test_token_signed_with_other_key(self):
+        token = self.make_token(private_key=self.rotated_key)
+        with self.assertRaises(jwt.InvalidSignatureError):
+            self.make_verifier().verify(token)
+
+    def test_unauthorized_party(self):
+        token = self.make_token(azp="https://evil.example.com")
+        with self.assertRaisesMessage(jwt.InvalidTokenError, "Unauthorized party"):
+            self.make_verifier().verify(token)
+
+    def test_unknown_kid_triggers_one_rate_limited_refresh(self):
+        fetches = []
+
+        def fetcher():
+            fetches.append(time.monotonic())
+            return {"keys": [self.jwk, self.rotated_jwk]}
+
+        verifier = self.make_verifier(fetcher=fetcher)
+        # Rotated key: one refresh picks it up
+        claims = verifier.verify(self.make_token(private_key=self.rotated_key, kid="key-2"))
+        self.assertEqual(claims["sub"], "user_123")
+        self.assertEqual(len(fetches), 1)
+
+        # Another unknown kid right after does not refetch
+        with self.assertRaisesMessage(jwt.InvalidTokenError, "Unknown signing key"):
+            verifier.verify(self.make_token(kid="key-3"))
+        self.assertEqual(len(fetches), 1)
+
+    def test_verified_token_cache_hit(self):
+        verifier = self.make_verifier()
+        token = self.make_token()
+        claims = verifier.verify(token)
+        with mock.patch("middlewares.clerk_auth.jwt.decode") as decode:
+            self.assertEqual(verifier.verify(token), claims)
+        decode.assert_not_called()
+
+    def test_verified_token_cache_expires_at_exp(self):
+        cache = VerifiedTokenCache()
+        exp = int(time.time()) + 300
+        cache.put("token", {"sub": "user_123", "exp": exp})
+        with mock.patch("middlewares.clerk_auth.time.time", return_value=exp - 1):
+            self.assertEqual(cache.get("token"), {"sub": "user_123", "exp": exp})
+        with mock.patch("middlewares.clerk_auth.time.time", return_value=exp):
+            self.assertIsNone(cache.get("token"))
+        self.assertEqual(len(cache), 0)
@@ -2,9 +2,10 @@ from django.urls import path, include
 from .api import (
     PostViewset, ConnectedSocialMediaAPI, UpdateConnectedSocialMediaAPI,
     RecentFetchedPostAPI, UpdateListingAPI, PreviousListingAPI,
-    DashboardStatsAPI, ProfileDataAPI, FetchInstagramPostAPI,
+    DashboardStatsAPI, ComplianceMetricsAPI, ProfileDataAPI, FetchInstagramPostAPI,
     FetchFaceBookPostAPI, ConvertVideoToImagesAPI, Social2AmazonAPI,
-    HealthCheckAPI  # Make sure to import this
+    HealthCheckAPI,  # Make sure to import this
+    SubmitSocial2AmazonJobAPI, SubmitConvertVideoJobAPI, JobStatusAPI, JobResultAPI
 )
 from rest_framework.routers import DefaultRouter
 
@@ -19,10 +20,15 @@ urlpatterns += [
     path('update_listing_data', UpdateListingAPI.as_view()),
     path('previous_listing_data', PreviousListingAPI.as_view()),
     path('dashboard_stats', DashboardStatsAPI.as_view()),
+    path('compliance_metrics', ComplianceMetricsAPI.as_view()),
     path('profile_data', ProfileDataAPI.as_view()),
     path('social2amazon', Social2AmazonAPI.as_view()),
     path('fetch_latest_instagram_post', FetchInstagramPostAPI.as_view()),
     path('fetch_latest_facebook_post', FetchFaceBookPostAPI.as_view()),
     path('convert_video_to_images', ConvertVideoToImagesAPI.as_view()),
-    path('health_check', HealthCheckAPI.as_view(), name='health_check')
+    path('health_check', HealthCheckAPI.as_view(), name='health_check'),
+    path('jobs/social2amazon', SubmitSocial2AmazonJobAPI.as_view()),
+    path('jobs/convert_video_to_images', SubmitConvertVideoJobAPI.as_view()),
+    path('jobs/<uuid:job_id>', JobStatusAPI.as_view()),
+    path('jobs/<uuid:job_id>/result', JobResultAPI.as_view()),
 ]
@@ -43,7 +43,14 @@ GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 
 # Clerk Authentication Settings
 CLERK_SECRET_KEY = 'your_clerk_secret_key'  # Replace with your actual secret key
-CLERK_JWT_AUDIENCE = 'your_audience_value'  # Usually this is your app name
+CLERK_JWT_AUDIENCE = os.getenv('CLERK_JWT_AUDIENCE')  # Only checked when set; Clerk session tokens carry no aud by default
+# Session tokens are verified locally: keys come from the JWKS endpoint (cached, refreshed on unknown kid)
+# or from the instance's PEM public key, which avoids any network call
+CLERK_JWKS_URL = os.getenv('CLERK_JWKS_URL')
+CLERK_PEM_PUBLIC_KEY = os.getenv('CLERK_PEM_PUBLIC_KEY')
+CLERK_ISSUER = os.getenv('CLERK_ISSUER')
+CLERK_AUTHORIZED_PARTIES = [p for p in os.getenv('CLERK_AUTHORIZED_PARTIES', '').split(',') if p]
+CLERK_TOKEN_CACHE_SIZE = 1024  # Verified tokens kept until they expire
 
 # For development, set to True to bypass authentication
 BYPASS_CLERK_AUTH = True  # Set to False in production
@@ -165,6 +172,85 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 FRAMES_DIR = os.path.join(BASE_DIR, 'media', 'frames')
 os.makedirs(FRAMES_DIR, exist_ok=True)
 
+# Import cv2, Gemini, instaloader etc. when the WSGI app loads instead of on first use.
+# Combine with gunicorn --preload so the master pays the cost once for all workers.
+PRELOAD_HEAVY_MODULES = env.bool('PRELOAD_HEAVY_MODULES', default=False)
+
+# Caches, indexes and derived files. Kept outside MEDIA_ROOT so none of it is served under /media/.
+CACHE_ROOT = os.getenv('CACHE_ROOT', os.path.join(BASE_DIR, 'cache'))
+
+# Cache shared by all gunicorn workers on the host (dashboard counters etc.)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_ROOT, 'django_cache'),
+    }
+}
+
+# Upper bound on frames sampled from a single video
+VIDEO_MAX_FRAMES = 30
+
+# Shared media downloader
+MEDIA_DOWNLOAD_WORKERS = 16  # Concurrent downloads per process
+MEDIA_DOWNLOAD_PER_HOST = 6  # Concurrent downloads (and pooled connections) per host
+MEDIA_DOWNLOAD_TIMEOUT = (5, 60)  # (connect, read) seconds
+MEDIA_DOWNLOAD_RETRIES = 3
+
+# OCR worker processes for the whole host (see app/OCRService.py). Install tesserocr to keep
+# Tesseract loaded in them; without it every image starts a tesseract process through pytesseract.
+OCR_WORKERS = int(os.getenv('OCR_WORKERS', os.cpu_count() or 2))
+OCR_LANG = 'eng'
+OCR_TARGET_DPI = 300  # Scans above this DPI are downscaled to it
+OCR_MAX_SIDE = 2000  # Longest side in pixels for images without DPI info
+OCR_MIN_TEXT_DENSITY = 0.002  # Images with fewer text-like edges than this are skipped
+
+# Content-addressed cache for downloaded media and values derived from it
+MEDIA_CACHE_DIR = os.path.join(CACHE_ROOT, 'media')
+MEDIA_CACHE_MAX_BYTES = int(os.getenv('MEDIA_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
+# Background job queue (database-backed, no broker needed)
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+# Jobs run in the dedicated `manage.py run_job_workers` service (DevOps/social2amazon_jobs.service).
+# Set to True only for local development without it; every web worker would start its own pool.
+JOB_WORKERS_IN_PROCESS = env.bool("JOB_WORKERS_IN_PROCESS", default=False)
+JOB_POLL_INTERVAL = 1.0  # Seconds an idle worker waits before checking the queue again
+JOB_LEASE_SECONDS = 120  # A running job whose worker has not renewed its lease for this long is abandoned
+JOB_HEARTBEAT_INTERVAL = 30  # Seconds between lease renewals of a running job
+JOB_MAX_ATTEMPTS = 3  # Abandoned jobs are requeued until they were claimed this often, then marked failed
+JOB_REQUEUE_INTERVAL = 60  # Seconds between checks for abandoned jobs
+
+# Gemini client ("stub" answers locally with canned responses, for tests and benchmarks)
+GEMINI_BACKEND = os.getenv('GEMINI_BACKEND', 'api')
+GEMINI_TRANSPORT = os.getenv('GEMINI_TRANSPORT')  # "grpc" or "rest"; SDK default when unset
+GEMINI_IMAGE_MODEL = os.getenv('GEMINI_IMAGE_MODEL', 'gemini-1.5-flash')
+GEMINI_VIDEO_MODEL = os.getenv('GEMINI_VIDEO_MODEL', 'gemini-1.5-pro')
+GEMINI_TEXT_MODEL = os.getenv('GEMINI_TEXT_MODEL', 'gemini-1.5-flash')
+GEMINI_TIMEOUT = 120  # Seconds per generate_content request
+GEMINI_VIDEO_TIMEOUT = 600
+GEMINI_VIDEO_CONCURRENCY = 4  # Videos uploaded and processed at once
+GEMINI_POLL_INITIAL = 0.5  # First wait in seconds before re-checking an upload's processing state
+GEMINI_POLL_MAX = 8.0  # Polling backs off up to this interval
+GEMINI_VIDEO_PROCESSING_TIMEOUT = 600
+GEMINI_FILE_TTL = 47 * 3600  # Gemini deletes uploads after 48 hours
+GEMINI_PROMPT_TOKEN_BUDGET = 6000  # Tokens for description, OCR and vision output in the listing prompt
+GEMINI_STRUCTURED_RETRIES = 1  # Extra text-model calls when the JSON answer cannot be repaired
+
+# Images are downscaled and re-encoded before upload; encoded payloads are kept in the media store
+GEMINI_IMAGE_MAX_SIDE = 1536
+GEMINI_IMAGE_QUALITY = 85
+
+# Persistent cache of Gemini responses, keyed by model, prompt version and input digests
+GEMINI_CACHE_PATH = os.path.join(CACHE_ROOT, 'gemini_responses.sqlite3')
+GEMINI_CACHE_TTL = 7 * 24 * 3600  # Seconds
+GEMINI_CACHE_MAX_BYTES = 256 * 1024 ** 2
+
+# Batch compliance checks (manage.py check_compliance)
+COMPLIANCE_CHUNK_SIZE = 500  # Listings read, checked and saved at a time
+COMPLIANCE_PROCESSES = os.cpu_count() or 2
+COMPLIANCE_COLUMNAR = True  # Evaluate length/count/attribute rules as NumPy column comparisons
+COMPLIANCE_MARKETPLACES = ['amazon']  # Profiles rechecked when a listing is edited
+COMPLIANCE_INSTRUMENTATION = True  # Per-rule timings of live checks, served at /api/compliance_metrics
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
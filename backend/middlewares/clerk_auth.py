@@ -2,10 +2,19 @@ import requests
 import json
 import jwt
 import base64
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
 from django.conf import settings
 from django.http import JsonResponse
 
+logger = logging.getLogger(__name__)
+
+DEV_USER = {"data": {"first_name": "Dev User", "image_url": "https://example.com/avatar.png"}}
+
+
 def safe_b64decode(s):
     """
     Safely decode a base64 string by adding padding if necessary
@@ -14,50 +23,246 @@ def safe_b64decode(s):
     s_padded = s + "=" * (4 - len(s) % 4) if len(s) % 4 else s
     return base64.b64decode(s_padded)
 
+
+class JWKSCache:
+    """
+    Local cache of the identity provider's signing keys.
+
+    Keys are fetched once and kept in memory. A token signed with an unknown kid
+    triggers one refresh (key rotation), rate limited so forged kids cannot make
+    us hammer the JWKS endpoint.
+    """
+
+    def __init__(self, jwks_url=None, jwks=None, fetcher=None, pem_public_key=None, min_refresh_interval=60):
+        """
+        :param jwks_url: URL of the JWKS document.
+        :param jwks: Static JWKS dict ({"keys": [...]}), e.g. for tests.
+        :param fetcher: Zero-argument callable returning a JWKS dict; overrides jwks_url.
+        :param pem_public_key: Single PEM public key used for every kid.
+        :param min_refresh_interval: Minimum seconds between two refreshes.
+        """
+        self.jwks_url = jwks_url
+        self.fetcher = fetcher
+        self.min_refresh_interval = min_refresh_interval
+        self._keys = {}
+        self._static_key = pem_public_key
+        self._last_refresh = None
+        self._lock = threading.Lock()
+        if jwks:
+            self._load(jwks)
+
+    @property
+    def configured(self):
+        return bool(self._static_key or self._keys or self.fetcher or self.jwks_url)
+
+    def _load(self, jwks):
+        keys = {}
+        for jwk in jwks.get('keys', []):
+            try:
+                keys[jwk.get('kid')] = jwt.PyJWK(jwk).key
+            except jwt.PyJWKError as e:
+                logger.warning(f"Skipping unusable JWK {jwk.get('kid')}: {e}")
+        self._keys = keys
+
+    def _fetch(self):
+        if self.fetcher:
+            return self.fetcher()
+        response = requests.get(self.jwks_url, timeout=5)
+        response.raise_for_status()
+        return response.json()
+
+    def refresh(self, force=False):
+        """
+        Re-fetch the key set unless it was refreshed less than min_refresh_interval ago.
+
+        :return: True if the keys were refreshed.
+        """
+        if not (self.fetcher or self.jwks_url):
+            return False
+        now = time.monotonic()
+        if not force and self._last_refresh is not None and now - self._last_refresh < self.min_refresh_interval:
+            return False
+        self._last_refresh = now
+        self._load(self._fetch())
+        return True
+
+    def get_key(self, kid):
+        """
+        :return: The verification key for kid.
+        :raises jwt.InvalidTokenError: If no key is known for kid, even after a refresh.
+        """
+        if self._static_key:
+            return self._static_key
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is None and self.refresh():
+                key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+        return key
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified token claims, keyed by the token's SHA-256 and
+    kept only until the token expires.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        key = self.digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, token, claims):
+        expires_at = claims.get('exp')
+        if expires_at is None:
+            return
+        key = self.digest(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ClerkTokenVerifier:
+    """
+    Verifies Clerk session tokens offline against cached signing keys.
+    """
+
+    def __init__(self, jwks_cache, audience=None, issuer=None, authorized_parties=None,
+                 algorithms=('RS256',), leeway=5, cache_size=1024):
+        self.jwks_cache = jwks_cache
+        self.audience = audience
+        self.issuer = issuer
+        self.authorized_parties = set(authorized_parties or [])
+        self.algorithms = list(algorithms)
+        self.leeway = leeway
+        self.verified = VerifiedTokenCache(cache_size)
+
+    @property
+    def configured(self):
+        return self.jwks_cache.configured
+
+    def verify(self, token):
+        """
+        :return: The token's claims.
+        :raises jwt.InvalidTokenError: If the token is malformed, expired or not validly signed.
+        """
+        claims = self.verified.get(token)
+        if claims is not None:
+            return claims
+
+        header = jwt.get_unverified_header(token)
+        key = self.jwks_cache.get_key(header.get('kid'))
+        claims = jwt.decode(
+            token,
+            key=key,
+            algorithms=self.algorithms,
+            audience=self.audience,
+            issuer=self.issuer,
+            leeway=self.leeway,
+            options={"require": ["exp", "sub"], "verify_aud": bool(self.audience)},
+        )
+        if self.authorized_parties and claims.get('azp') not in self.authorized_parties:
+            raise jwt.InvalidTokenError(f"Unauthorized party: {claims.get('azp')}")
+
+        self.verified.put(token, claims)
+        return claims
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_token_verifier():
+    """Return the process-wide ClerkTokenVerifier built from settings."""
+    global _verifier
+    with _verifier_lock:
+        if _verifier is None:
+            _verifier = ClerkTokenVerifier(
+                JWKSCache(
+                    jwks_url=getattr(settings, 'CLERK_JWKS_URL', None),
+                    pem_public_key=getattr(settings, 'CLERK_PEM_PUBLIC_KEY', None),
+                ),
+                audience=getattr(settings, 'CLERK_JWT_AUDIENCE', None),
+                issuer=getattr(settings, 'CLERK_ISSUER', None),
+                authorized_parties=getattr(settings, 'CLERK_AUTHORIZED_PARTIES', None),
+                cache_size=getattr(settings, 'CLERK_TOKEN_CACHE_SIZE', 1024),
+            )
+        return _verifier
+
+
+def clerk_user_from_claims(claims):
+    """Shape verified claims the way the views expect request.clerk_user."""
+    return {
+        "data": {
+            "user_id": claims.get('sub'),
+            "first_name": claims.get('first_name'),
+            "image_url": claims.get('image_url'),
+        },
+        "claims": claims,
+    }
+
+
 class ClerkAuthMiddleware:
-    def __init__(self, get_response):
+    def __init__(self, get_response, verifier=None):
         self.get_response = get_response
+        self.verifier = verifier
 
     def __call__(self, request):
-        print("Inside Clerk Middleware")
-        
         # Skip auth for health check endpoint
         if request.path == '/api/health_check':
             return self.get_response(request)
 
         # Development mode bypass
         if settings.DEBUG and getattr(settings, 'BYPASS_CLERK_AUTH', False):
-            print("DEBUG: Using development user data")
-            request.clerk_user = {"data": {"first_name": "Dev User", "image_url": "https://example.com/avatar.png"}}
+            request.clerk_user = DEV_USER
             return self.get_response(request)
-        
+
         # Extract token from Authorization header
         auth_header = request.headers.get('Authorization')
         if not auth_header or not auth_header.startswith('Bearer '):
             # No authentication provided
             request.clerk_user = None
             return self.get_response(request)
-            
+
         token = auth_header.split(' ')[1]
-        
+        verifier = self.verifier or get_token_verifier()
+
         try:
-            # In development, we'll skip the verification
-            if settings.DEBUG:
-                print("DEBUG: Skipping JWT verification")
-                # Just decode without verification for development
-                decoded_token = jwt.decode(token, options={"verify_signature": False})
-                request.clerk_user = {"data": {"first_name": "Dev User", "image_url": "https://example.com/avatar.png"}}
+            if settings.DEBUG and not verifier.configured:
+                # No signing keys configured for development; accept any well-formed token
+                jwt.decode(token, options={"verify_signature": False})
+                request.clerk_user = DEV_USER
             else:
-                # Production verification logic here
-                # This would include proper JWT verification
-                pass
-                
+                request.clerk_user = clerk_user_from_claims(verifier.verify(token))
+
         except Exception as e:
-            logging.error(f"Authentication error: {str(e)}")
-            if settings.DEBUG:
-                print(f"DEBUG: Auth error, using fallback user: {str(e)}")
-                request.clerk_user = {"data": {"first_name": "Dev User", "image_url": "https://example.com/avatar.png"}}
-            else:
-                request.clerk_user = None
-                
-        return self.get_response(request)
\ No newline at end of file
+            logger.warning(f"Authentication error: {str(e)}")
+            request.clerk_user = DEV_USER if settings.DEBUG else None
+
+        return self.get_response(request)
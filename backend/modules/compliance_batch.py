@@ -0,0 +1,151 @@
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+try:
+    from modules.eci_complience_checker import ECIChecker, MarketplaceProfile, ProductListing, ComplianceReport, listing_field_digests
+except ImportError:
+    from eci_complience_checker import ECIChecker, MarketplaceProfile, ProductListing, ComplianceReport, listing_field_digests
+
+# --- Worker Side ---
+
+_checker: Optional[ECIChecker] = None
+_columnar = None
+
+
+def make_checkers(profile: MarketplaceProfile, columnar: bool = False):
+    """
+    Returns:
+        (ECIChecker, ColumnarChecker or None) for the profile.
+    """
+    checker = ECIChecker(profile)
+    if not columnar:
+        return checker, None
+    # Imported here so that only processes checking column-wise load numpy
+    try:
+        from modules.compliance_columnar import ColumnarChecker
+    except ImportError:
+        from compliance_columnar import ColumnarChecker
+    return checker, ColumnarChecker(checker)
+
+
+def init_worker(profile: MarketplaceProfile, columnar: bool = False) -> None:
+    """Process pool initializer: compile the profile once per worker."""
+    global _checker, _columnar
+    _checker, _columnar = make_checkers(profile, columnar)
+
+
+def report_to_result(report: ComplianceReport) -> Dict[str, Any]:
+    """Flattens a ComplianceReport into plain, picklable values."""
+    return {
+        "product_id": report.listing_id,
+        "compliance_score": report.compliance_score,
+        "is_compliant": report.is_compliant,
+        "issues": [issue.to_dict() for issue in report.issues],
+    }
+
+
+def check_listings(checker: ECIChecker, listings: Iterable[Dict[str, Any]], columnar=None) -> List[Dict[str, Any]]:
+    """
+    Checks a chunk of listings given as ProductListing keyword arguments.
+
+    Args:
+        checker: Checker for the profile.
+        listings: ProductListing keyword arguments per listing.
+        columnar: Optional ColumnarChecker wrapping checker, to evaluate the chunk column-wise.
+
+    Returns:
+        One result dict (see report_to_result) per listing, with the per-rule
+        outcomes and field digests needed to recheck it incrementally later.
+    """
+    listings = [ProductListing(**kwargs) for kwargs in listings]
+    if columnar is not None:
+        reports = columnar.check_batch(listings)
+    else:
+        reports = [checker.check_listing_compliance(listing) for listing in listings]
+    results = []
+    for listing, report in zip(listings, reports):
+        result = report_to_result(report)
+        result["rule_results"] = checker.serialize_rule_results(report)
+        result["input_digests"] = listing_field_digests(listing)
+        results.append(result)
+    return results
+
+
+def audit_listings(columnar, listings: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Checks a chunk column-wise for the summary only, without building per-listing reports.
+
+    Returns:
+        Scores, number of compliant listings and (rule_id, severity, count) violations,
+        as taken by ComplianceSummary.add_batch.
+    """
+    evaluation = columnar.evaluate_batch([ProductListing(**kwargs) for kwargs in listings])
+    return {
+        "scores": evaluation.scores.tolist(),
+        "compliant": int(evaluation.is_compliant.sum()),
+        "violations": columnar.violation_counts(evaluation),
+    }
+
+
+def check_chunk(listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Process pool task: checks a chunk with the worker's compiled profile."""
+    return check_listings(_checker, listings, _columnar)
+
+
+def audit_chunk(listings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Process pool task: audit_listings with the worker's columnar checker."""
+    return audit_listings(_columnar, listings)
+
+# --- Aggregation ---
+
+class ComplianceSummary:
+    """
+    Running aggregate over batch results: totals, average score, and
+    violation counts by rule and by severity.
+    """
+
+    def __init__(self, marketplace_name: str):
+        self.marketplace_name = marketplace_name
+        self.listings = 0
+        self.compliant = 0
+        self.score_total = 0.0
+        self.by_severity: Counter = Counter()
+        self.by_rule: Dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.listings += 1
+        self.compliant += int(result["is_compliant"])
+        self.score_total += result["compliance_score"]
+        for issue in result["issues"]:
+            self.by_severity[issue["severity"]] += 1
+            self.by_rule[issue["rule_id"]][issue["severity"]] += 1
+
+    def add_batch(self, scores: List[float], compliant: int, violations: Iterable[Tuple[str, str, int]]) -> None:
+        """
+        Adds a batch that was only evaluated in aggregate (see ColumnarChecker.violation_counts).
+
+        Args:
+            scores: Compliance score of every listing in the batch.
+            compliant: Number of compliant listings in the batch.
+            violations: (rule_id, severity, count) triples.
+        """
+        self.listings += len(scores)
+        self.compliant += compliant
+        for score in scores:
+            self.score_total += score
+        for rule_id, severity, count in violations:
+            self.by_severity[severity] += count
+            self.by_rule[rule_id][severity] += count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "marketplace": self.marketplace_name,
+            "listings": self.listings,
+            "compliant": self.compliant,
+            "non_compliant": self.listings - self.compliant,
+            "average_score": round(self.score_total / self.listings, 2) if self.listings else None,
+            "by_severity": dict(self.by_severity),
+            "by_rule": {
+                rule_id: {"violations": sum(severities.values()), "by_severity": dict(severities)}
+                for rule_id, severities in sorted(self.by_rule.items(), key=lambda item: -sum(item[1].values()))
+            },
+        }
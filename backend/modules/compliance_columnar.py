@@ -0,0 +1,223 @@
+from functools import cached_property
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+try:
+    from modules.eci_complience_checker import (
+        ComplianceIssue, ComplianceReport, ComplianceRule, DescriptionLengthRule, ECIChecker, ImageCountRule,
+        ProductListing, RequiredAttributeRule, TitleLengthRule,
+    )
+except ImportError:
+    from eci_complience_checker import (
+        ComplianceIssue, ComplianceReport, ComplianceRule, DescriptionLengthRule, ECIChecker, ImageCountRule,
+        ProductListing, RequiredAttributeRule, TitleLengthRule,
+    )
+
+# --- Columns ---
+
+class ColumnarBatch:
+    """
+    A batch of listings as NumPy columns.
+
+    Each column (title lengths, description lengths, image counts, presence of an
+    attribute) is built with a single pass over the batch the first time a rule
+    asks for it, and then shared by every rule that reads it.
+    """
+
+    def __init__(self, listings: Sequence[ProductListing]):
+        self.listings = listings
+        self._attribute_masks: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.listings)
+
+    def _column(self, values) -> np.ndarray:
+        return np.fromiter(values, dtype=np.int64, count=len(self.listings))
+
+    @cached_property
+    def title_lengths(self) -> np.ndarray:
+        return self._column(len(listing.title) for listing in self.listings)
+
+    @cached_property
+    def description_lengths(self) -> np.ndarray:
+        return self._column(len(listing.description) for listing in self.listings)
+
+    @cached_property
+    def image_counts(self) -> np.ndarray:
+        return self._column(len(listing.images) for listing in self.listings)
+
+    def attribute_present(self, name: str) -> np.ndarray:
+        """Mask of listings whose attribute is present and truthy."""
+        mask = self._attribute_masks.get(name)
+        if mask is None:
+            mask = np.fromiter(
+                (bool(listing.attributes.get(name)) for listing in self.listings), dtype=bool, count=len(self.listings)
+            )
+            self._attribute_masks[name] = mask
+        return mask
+
+# --- Vectorized Rules ---
+# Each evaluator compares whole columns and returns the mask of violating rows,
+# plus a function building the issue of one violating row with the rule's own
+# issue_for, so messages and details are identical to per-object evaluation.
+
+Evaluation = Tuple[np.ndarray, Callable[[int], ComplianceIssue]]
+
+
+def _title_length(rule: TitleLengthRule, batch: ColumnarBatch) -> Evaluation:
+    lengths = batch.title_lengths
+    violated = (lengths < rule.min_length) | (lengths > rule.max_length)
+    return violated, lambda row: rule.issue_for(int(lengths[row]))
+
+
+def _description_length(rule: DescriptionLengthRule, batch: ColumnarBatch) -> Evaluation:
+    lengths = batch.description_lengths
+    return lengths < rule.min_length, lambda row: rule.issue_for(int(lengths[row]))
+
+
+def _image_count(rule: ImageCountRule, batch: ColumnarBatch) -> Evaluation:
+    counts = batch.image_counts
+    violated = (counts < rule.min_images) | (counts > rule.max_images)
+    return violated, lambda row: rule.issue_for(int(counts[row]))
+
+
+def _required_attribute(rule: RequiredAttributeRule, batch: ColumnarBatch) -> Evaluation:
+    return ~batch.attribute_present(rule.attribute_name), lambda row: rule.issue_for()
+
+
+# Keyed by exact type: a subclass may change what the rule checks, so it is evaluated per object
+VECTORIZED_RULES: Dict[type, Callable[[ComplianceRule, ColumnarBatch], Evaluation]] = {
+    TitleLengthRule: _title_length,
+    DescriptionLengthRule: _description_length,
+    ImageCountRule: _image_count,
+    RequiredAttributeRule: _required_attribute,
+}
+
+# --- Checker ---
+
+class ColumnarChecker:
+    """
+    Checks batches of listings, evaluating the structural rules of a profile
+    column-wise.
+
+    Rules in VECTORIZED_RULES are pure functions of lengths and presence flags
+    and are evaluated as NumPy comparisons over the whole batch. All other rules
+    (those that read the text) are evaluated per listing through the wrapped
+    ECIChecker. Reports are identical to ECIChecker.check_listing_compliance.
+    """
+
+    def __init__(self, checker: ECIChecker):
+        """
+        Args:
+            checker: Checker whose profile, compilation and instrumentation are used.
+                     Instrumentation only covers the rules evaluated per listing.
+        """
+        self.checker = checker
+        self.rules = list(checker.marketplace_profile.rules)
+        self.vector_rules = [rule for rule in self.rules if type(rule) in VECTORIZED_RULES]
+        self.object_rules = [rule for rule in self.rules if type(rule) not in VECTORIZED_RULES]
+        self.rule_ids = [rule.rule_id for rule in self.rules]
+
+    def _object_columns(self, listings: Sequence[ProductListing]) -> Dict[str, List[Optional[ComplianceIssue]]]:
+        columns: Dict[str, List[Optional[ComplianceIssue]]] = {rule.rule_id: [] for rule in self.object_rules}
+        if self.object_rules:
+            for listing in listings:
+                for rule, issue in self.checker.evaluate_rules(listing, self.object_rules):
+                    columns[rule.rule_id].append(issue)
+        return columns
+
+    def evaluate_batch(self, listings: Sequence[ProductListing]) -> "BatchEvaluation":
+        """Evaluates every rule over the batch without building per-listing reports."""
+        batch = ColumnarBatch(listings)
+        count = len(batch)
+        evaluation = BatchEvaluation(listings, self._object_columns(listings))
+        critical = np.zeros(count, dtype=bool)
+        for rule_id, column in evaluation.object_columns.items():
+            evaluation.violated[rule_id] = np.fromiter((issue is not None for issue in column), dtype=bool, count=count)
+            critical |= np.fromiter(
+                (issue is not None and issue.severity == "CRITICAL" for issue in column), dtype=bool, count=count
+            )
+        for rule in self.vector_rules:
+            mask, issue_for = VECTORIZED_RULES[type(rule)](rule, batch)
+            evaluation.violated[rule.rule_id] = mask
+            evaluation.issue_builders[rule.rule_id] = issue_for
+            if rule.severity == "CRITICAL":
+                critical |= mask
+        evaluation.is_compliant = ~critical
+
+        # Same scoring as ECIChecker.build_report: passed weights are added in profile order,
+        # so the float results are identical
+        total_weight = 0
+        achieved = np.zeros(count)
+        for rule in self.rules:
+            total_weight += rule.weight
+            achieved = achieved + np.where(evaluation.violated[rule.rule_id], 0.0, float(rule.weight))
+        evaluation.scores = (achieved / total_weight) * 100 if total_weight > 0 else np.full(count, 100.0)
+        return evaluation
+
+    def check_batch(self, listings: Sequence[ProductListing]) -> List[ComplianceReport]:
+        """
+        Returns:
+            One ComplianceReport per listing, in input order.
+        """
+        evaluation = self.evaluate_batch(listings)
+        count = len(listings)
+        columns = dict(evaluation.object_columns)
+        for rule_id, issue_for in evaluation.issue_builders.items():
+            column: List[Optional[ComplianceIssue]] = [None] * count
+            for row in np.flatnonzero(evaluation.violated[rule_id]).tolist():
+                column[row] = issue_for(row)
+            columns[rule_id] = column
+
+        reports = []
+        marketplace_name = self.checker.marketplace_profile.marketplace_name
+        rule_ids = self.rule_ids
+        rows = zip(*(columns[rule_id] for rule_id in rule_ids))
+        for listing, score, is_compliant, row in zip(listings, evaluation.scores.tolist(), evaluation.is_compliant.tolist(), rows):
+            reports.append(ComplianceReport(
+                listing_id=listing.product_id,
+                marketplace_name=marketplace_name,
+                compliance_score=score,
+                issues=[issue for issue in row if issue],
+                is_compliant=is_compliant,
+                rule_results=dict(zip(rule_ids, row)),
+                evaluated_rules=rule_ids,
+            ))
+        return reports
+
+    def violation_counts(self, evaluation: "BatchEvaluation") -> List[Tuple[str, str, int]]:
+        """
+        Returns:
+            (rule_id, severity, violations) for every rule and severity with violations.
+            Issues of vectorized rules are counted from their masks without being built.
+        """
+        counts: List[Tuple[str, str, int]] = []
+        for rule in self.rules:
+            if rule.rule_id in evaluation.issue_builders:
+                violations = int(np.count_nonzero(evaluation.violated[rule.rule_id]))
+                if violations:
+                    counts.append((rule.rule_id, rule.severity, violations))
+                continue
+            severities: Dict[str, int] = {}
+            for issue in evaluation.object_columns[rule.rule_id]:
+                if issue is not None:
+                    severities[issue.severity] = severities.get(issue.severity, 0) + 1
+            counts.extend((rule.rule_id, severity, violations) for severity, violations in severities.items())
+        return counts
+
+
+class BatchEvaluation:
+    """
+    Outcome of ColumnarChecker.evaluate_batch.
+
+    Issues of the per-object rules are in object_columns (one entry per listing);
+    vectorized rules only have their violation mask and an issue builder, so
+    issue objects are created only when reports are actually needed.
+    """
+
+    def __init__(self, listings: Sequence[ProductListing], object_columns: Dict[str, List[Optional[ComplianceIssue]]]):
+        self.listings = listings
+        self.object_columns = object_columns
+        self.violated: Dict[str, np.ndarray] = {}
+        self.issue_builders: Dict[str, Callable[[int], ComplianceIssue]] = {}
+        self.is_compliant: np.ndarray = np.ones(len(listings), dtype=bool)
+        self.scores: np.ndarray = np.full(len(listings), 100.0)
@@ -0,0 +1,17 @@
+import hashlib
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """
+    Returns the hex SHA-256 of a file's contents, read in 1 MiB chunks.
+
+    Args:
+        path (str): Path to the file.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -1,7 +1,14 @@
+import hashlib
+import random
 import re
-from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+import time
+from abc import ABC
+from dataclasses import dataclass, field, fields as dataclass_fields
+from functools import cached_property
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
 
 # --- Data Structures ---
 
@@ -18,6 +25,36 @@ class ProductListing:
     category: str
     attributes: Dict[str, Any] = field(default_factory=dict)  # e.g., {"brand": "XYZ", "color": "Red"}
     keywords: List[str] = field(default_factory=list) # Keywords targeted for SEO
+    bullet_points: List[str] = field(default_factory=list)  # "About this item" lines
+
+LISTING_FIELDS: Tuple[str, ...] = tuple(f.name for f in dataclass_fields(ProductListing))
+
+
+def _digest(value: Any) -> str:
+    # repr is much cheaper than json.dumps; dict keys are sorted so that key order does not
+    # count as a change. Anything still spuriously different only costs an extra re-evaluation.
+    if isinstance(value, dict):
+        value = sorted(value.items(), key=lambda item: str(item[0]))
+    return hashlib.blake2b(repr(value).encode('utf-8', 'surrogatepass'), digest_size=8).hexdigest()
+
+
+def listing_field_digests(listing: ProductListing) -> Dict[str, str]:
+    """Short digest of every field of the listing, stored to detect which fields an edit changed."""
+    return {name: _digest(getattr(listing, name)) for name in LISTING_FIELDS}
+
+
+def changed_fields(current: Dict[str, str], previous: Optional[Dict[str, str]]) -> Set[str]:
+    """
+    Args:
+        current: Field digests of the listing as it is now.
+        previous: Field digests stored with the last check, if any.
+
+    Returns:
+        Names of the fields whose digest differs (all fields if nothing was stored).
+    """
+    if not previous:
+        return set(current)
+    return {name for name, digest in current.items() if previous.get(name) != digest}
 
 @dataclass
 class ComplianceIssue:
@@ -29,58 +66,221 @@ class ComplianceIssue:
     severity: str  # e.g., "CRITICAL", "WARNING", "INFO", "SEO_SUGGESTION"
     details: Optional[Dict[str, Any]] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        # Built by hand: dataclasses.asdict deep-copies and dominates batch time
+        return {"rule_id": self.rule_id, "message": self.message, "severity": self.severity, "details": self.details}
+
+# --- Shared Analysis Context ---
+
+def _is_word_char(char: str) -> bool:
+    """Matches the definition of \\w used by re for str patterns."""
+    return char.isalnum() or char == '_'
+
+
+class ForbiddenWordMatcher:
+    """
+    Finds which of many words occur in a text in a single pass.
+
+    All words are folded into one character trie. Each position of the text is a
+    candidate start and the trie is walked forward from it, so the cost depends on
+    the text length (and the longest word), not on the number of words. A word
+    counts as found when it is delimited exactly like r'\\b' + re.escape(word) + r'\\b'.
+    """
+
+    _END = object()
+
+    def __init__(self, words: Iterable[str]):
+        self.root: Dict[Any, Any] = {}
+        for word in words:
+            word = word.lower()
+            if not word:
+                continue
+            node = self.root
+            for char in word:
+                node = node.setdefault(char, {})
+            node[self._END] = word
+
+    def find_all(self, text_lower: str) -> Set[str]:
+        """
+        Returns:
+            The set of (lowercased) words found in the already lowercased text.
+        """
+        found: Set[str] = set()
+        if not self.root:
+            return found
+        length = len(text_lower)
+        for start in range(length):
+            node = self.root.get(text_lower[start])
+            if node is None:
+                continue
+            # \b before the word: word-ness must change between the previous char and the first one
+            before_is_word = start > 0 and _is_word_char(text_lower[start - 1])
+            if before_is_word == _is_word_char(text_lower[start]):
+                continue
+            position = start
+            while node is not None:
+                word = node.get(self._END)
+                if word is not None:
+                    after_is_word = position + 1 < length and _is_word_char(text_lower[position + 1])
+                    if after_is_word != _is_word_char(text_lower[position]):
+                        found.add(word)
+                position += 1
+                if position >= length:
+                    break
+                node = node.get(text_lower[position])
+        return found
+
+
+class ListingContext:
+    """
+    A listing analysed once for all rules of a profile.
+
+    Derived values (lowercased text, word lists, forbidden word hits, keyword
+    counts) are computed on first use and shared by every rule that needs them.
+    """
+
+    def __init__(self, listing: "ProductListing", forbidden_matcher: Optional[ForbiddenWordMatcher] = None):
+        self.listing = listing
+        self.forbidden_matcher = forbidden_matcher
+        self._keyword_counts: Dict[str, int] = {}
+
+    @cached_property
+    def title_lower(self) -> str:
+        return self.listing.title.lower()
+
+    @cached_property
+    def description_lower(self) -> str:
+        return self.listing.description.lower()
+
+    @cached_property
+    def title_words(self) -> List[str]:
+        return self.listing.title.split()
+
+    @cached_property
+    def title_length(self) -> int:
+        return len(self.listing.title)
+
+    @cached_property
+    def description_length(self) -> int:
+        return len(self.listing.description)
+
+    @cached_property
+    def description_has_html(self) -> bool:
+        return bool(HTML_TAG_PATTERN.search(self.listing.description))
+
+    @cached_property
+    def title_forbidden_hits(self) -> Set[str]:
+        matcher = self.forbidden_matcher or ForbiddenWordMatcher([])
+        return matcher.find_all(self.title_lower)
+
+    def description_keyword_count(self, keyword: str) -> int:
+        keyword_lower = keyword.lower()
+        count = self._keyword_counts.get(keyword_lower)
+        if count is None:
+            count = self.description_lower.count(keyword_lower)
+            self._keyword_counts[keyword_lower] = count
+        return count
+
 # --- Rule Definition ---
 
 class ComplianceRule(ABC):
     """
     Abstract base class for all compliance and SEO rules.
+
+    Subclasses declare in `fields` the ProductListing fields they read. When a
+    listing is edited only rules depending on a changed field are re-evaluated;
+    rules that do not declare them are re-evaluated on every change.
     """
+    fields: Tuple[str, ...] = LISTING_FIELDS
+
     def __init__(self, rule_id: str, description: str, severity: str = "WARNING", weight: float = 1.0):
         self.rule_id = rule_id
         self.description = description
         self.severity = severity
         self.weight = weight # Used for scoring
 
-    @abstractmethod
     def evaluate(self, listing: ProductListing) -> Optional[ComplianceIssue]:
         """
         Evaluates the product listing against this rule.
 
+        Rules written before ListingContext existed override this method instead
+        of evaluate_context and keep working unchanged.
+
+        Returns:
+            ComplianceIssue object if the rule is violated, None otherwise.
+        """
+        if type(self).evaluate_context is ComplianceRule.evaluate_context:
+            raise NotImplementedError(f"{type(self).__name__} must override evaluate or evaluate_context")
+        return self.evaluate_context(ListingContext(listing, self.forbidden_matcher()))
+
+    def evaluate_context(self, context: ListingContext) -> Optional[ComplianceIssue]:
+        """
+        Evaluates an already analysed listing against this rule.
+
+        Rules override this to reuse the derived values the context computes once
+        for all rules; the default falls back to evaluate on the raw listing.
+
         Returns:
             ComplianceIssue object if the rule is violated, None otherwise.
         """
-        pass
+        return self.evaluate(context.listing)
+
+    def depends_on(self, changed: Iterable[str]) -> bool:
+        """Whether any of the changed ProductListing fields is an input of this rule."""
+        return not set(self.fields).isdisjoint(changed)
+
+    def config_digest(self) -> str:
+        """Digest of the rule's type and settings; stored results of a reconfigured rule are not reused."""
+        config = {key: value for key, value in vars(self).items() if not key.startswith('_')}
+        return _digest([type(self).__name__, config])
+
+    def forbidden_words(self) -> List[str]:
+        """Words this rule needs found in the title; folded into the profile's shared matcher."""
+        return []
+
+    def forbidden_matcher(self) -> Optional[ForbiddenWordMatcher]:
+        words = self.forbidden_words()
+        return ForbiddenWordMatcher(words) if words else None
 
 # --- Concrete Rule Implementations (Examples) ---
 
 # --- Title Rules ---
 class TitleLengthRule(ComplianceRule):
+    fields = ("title",)
+
     def __init__(self, rule_id: str, min_length: int, max_length: int, severity: str = "CRITICAL", weight: float = 10.0):
         super().__init__(rule_id, f"Title length must be between {min_length} and {max_length} characters.", severity, weight)
         self.min_length = min_length
         self.max_length = max_length
 
-    def evaluate(self, listing: ProductListing) -> Optional[ComplianceIssue]:
-        title_len = len(listing.title)
+    def evaluate_context(self, context: ListingContext) -> Optional[ComplianceIssue]:
+        title_len = context.title_length
         if not (self.min_length <= title_len <= self.max_length):
-            return ComplianceIssue(
-                self.rule_id,
-                f"Title length is {title_len}. Expected between {self.min_length} and {self.max_length}.",
-                self.severity,
-                details={"current_length": title_len, "min": self.min_length, "max": self.max_length}
-            )
+            return self.issue_for(title_len)
         return None
 
+    def issue_for(self, title_len: int) -> ComplianceIssue:
+        return ComplianceIssue(
+            self.rule_id,
+            f"Title length is {title_len}. Expected between {self.min_length} and {self.max_length}.",
+            self.severity,
+            details={"current_length": title_len, "min": self.min_length, "max": self.max_length}
+        )
+
 class TitleCapitalizationRule(ComplianceRule):
+    fields = ("title",)
+
     def __init__(self, rule_id: str, severity: str = "WARNING", weight: float = 2.0):
         super().__init__(rule_id, "Title should use title case (first letter of each major word capitalized).", severity, weight)
 
-    def evaluate(self, listing: ProductListing) -> Optional[ComplianceIssue]:
+    def evaluate_context(self, context: ListingContext) -> Optional[ComplianceIssue]:
+        title = context.listing.title
         # This is a simplistic check. Real title case is more complex.
-        if not listing.title == listing.title.title() and not listing.title.isupper():
+        if not title == title.title() and not title.isupper():
              # Allow all caps titles for some brands/styles, but flag mixed non-title case.
-            is_mostly_title_case = sum(1 for word in listing.title.split() if word[0].isupper()) / len(listing.title.split()) > 0.7
-            if not is_mostly_title_case and len(listing.title.split()) > 1 : # Avoid flagging single-word all-lower titles
+            words = context.title_words
+            is_mostly_title_case = sum(1 for word in words if word[0].isupper()) / len(words) > 0.7
+            if not is_mostly_title_case and len(words) > 1 : # Avoid flagging single-word all-lower titles
                 return ComplianceIssue(
                     self.rule_id,
                     "Title does not appear to be in title case. Please review capitalization.",
@@ -89,12 +289,20 @@ class TitleCapitalizationRule(ComplianceRule):
         return None
 
 class TitleForbiddenWordsRule(ComplianceRule):
+    fields = ("title",)
+
     def __init__(self, rule_id: str, forbidden_words: List[str], severity: str = "CRITICAL", weight: float = 5.0):
         super().__init__(rule_id, f"Title contains forbidden words: {', '.join(forbidden_words)}.", severity, weight)
         self.forbidden_words_lower = [word.lower() for word in forbidden_words]
+        self._word_order = {word: index for index, word in reversed(list(enumerate(self.forbidden_words_lower)))}
 
-    def evaluate(self, listing: ProductListing) -> Optional[ComplianceIssue]:
-        found_words = [word for word in self.forbidden_words_lower if re.search(r'\b' + re.escape(word) + r'\b', listing.title.lower())]
+    def forbidden_words(self) -> List[str]:
+        return self.forbidden_words_lower
+
+    def evaluate_context(self, context: ListingContext) -> Optional[ComplianceIssue]:
+        # Hits come from the profile-wide matcher; keep only ours, in our configured order
+        hits = [word for word in context.title_forbidden_hits if word in self._word_order]
+        found_words = sorted(hits, key=self._word_order.get)
         if found_words:
             return ComplianceIssue(
                 self.rule_id,
@@ -106,28 +314,35 @@ class TitleForbiddenWordsRule(ComplianceRule):
 
 # --- Description Rules ---
 class DescriptionLengthRule(ComplianceRule):
+    fields = ("description",)
+
     def __init__(self, rule_id: str, min_length: int, severity: str = "WARNING", weight: float = 5.0):
         super().__init__(rule_id, f"Description should be at least {min_length} characters long.", severity, weight)
         self.min_length = min_length
 
-    def evaluate(self, listing: ProductListing) -> Optional[ComplianceIssue]:
-        if len(listing.description) < self.min_length:
-            return ComplianceIssue(
-                self.rule_id,
-                f"Description length is {len(listing.description)}. Expected at least {self.min_length}.",
-                self.severity,
-                details={"current_length": len(listing.description), "min": self.min_length}
-            )
+    def evaluate_context(self, context: ListingContext) -> Optional[ComplianceIssue]:
+        description_len = context.description_length
+        if description_len < self.min_length:
+            return self.issue_for(description_len)
         return None
 
+    def issue_for(self, description_len: int) -> ComplianceIssue:
+        return ComplianceIssue(
+            self.rule_id,
+            f"Description length is {description_len}. Expected at least {self.min_length}.",
+            self.severity,
+            details={"current_length": description_len, "min": self.min_length}
+        )
+
 class DescriptionHtmlCheckRule(ComplianceRule):
+    fields = ("description",)
+
     def __init__(self, rule_id: str, allow_html: bool = False, severity: str = "CRITICAL", weight: float = 3.0):
         super().__init__(rule_id, "HTML content in description check.", severity, weight)
         self.allow_html = allow_html
 
-    def evaluate(self, listing: ProductListing) -> Optional[ComplianceIssue]:
-        has_html = bool(re.search(r'<[^>]+>', listing.description))
-        if not self.allow_html and has_html:
+    def evaluate_context(self, context: ListingContext) -> Optional[ComplianceIssue]:
+        if not self.allow_html and context.description_has_html:
             return ComplianceIssue(
                 self.rule_id,
                 "HTML tags are not allowed in the description for this marketplace.",
@@ -137,48 +352,62 @@ class DescriptionHtmlCheckRule(ComplianceRule):
 
 # --- Image Rules ---
 class ImageCountRule(ComplianceRule):
+    fields = ("images",)
+
     def __init__(self, rule_id: str, min_images: int, max_images: int, severity: str = "CRITICAL", weight: float = 8.0):
         super().__init__(rule_id, f"Number of images must be between {min_images} and {max_images}.", severity, weight)
         self.min_images = min_images
         self.max_images = max_images
 
-    def evaluate(self, listing: ProductListing) -> Optional[ComplianceIssue]:
-        image_count = len(listing.images)
+    def evaluate_context(self, context: ListingContext) -> Optional[ComplianceIssue]:
+        image_count = len(context.listing.images)
         if not (self.min_images <= image_count <= self.max_images):
-            return ComplianceIssue(
-                self.rule_id,
-                f"Number of images is {image_count}. Expected between {self.min_images} and {self.max_images}.",
-                self.severity,
-                details={"current_count": image_count, "min": self.min_images, "max": self.max_images}
-            )
+            return self.issue_for(image_count)
         return None
 
+    def issue_for(self, image_count: int) -> ComplianceIssue:
+        return ComplianceIssue(
+            self.rule_id,
+            f"Number of images is {image_count}. Expected between {self.min_images} and {self.max_images}.",
+            self.severity,
+            details={"current_count": image_count, "min": self.min_images, "max": self.max_images}
+        )
+
 # --- Attribute Rules ---
 class RequiredAttributeRule(ComplianceRule):
+    fields = ("attributes",)
+
     def __init__(self, rule_id: str, attribute_name: str, severity: str = "CRITICAL", weight: float = 7.0):
         super().__init__(rule_id, f"Attribute '{attribute_name}' is required.", severity, weight)
         self.attribute_name = attribute_name
 
-    def evaluate(self, listing: ProductListing) -> Optional[ComplianceIssue]:
-        if self.attribute_name not in listing.attributes or not listing.attributes[self.attribute_name]:
-            return ComplianceIssue(
-                self.rule_id,
-                f"Required attribute '{self.attribute_name}' is missing or empty.",
-                self.severity,
-                details={"attribute_name": self.attribute_name}
-            )
+    def evaluate_context(self, context: ListingContext) -> Optional[ComplianceIssue]:
+        attributes = context.listing.attributes
+        if self.attribute_name not in attributes or not attributes[self.attribute_name]:
+            return self.issue_for()
         return None
 
+    def issue_for(self) -> ComplianceIssue:
+        return ComplianceIssue(
+            self.rule_id,
+            f"Required attribute '{self.attribute_name}' is missing or empty.",
+            self.severity,
+            details={"attribute_name": self.attribute_name}
+        )
+
 # --- SEO Rules (Examples) ---
 class KeywordInTitleRule(ComplianceRule):
+    fields = ("title", "keywords")
+
     def __init__(self, rule_id: str, severity: str = "SEO_SUGGESTION", weight: float = 3.0):
         super().__init__(rule_id, "Primary keywords should be present in the title.", severity, weight)
 
-    def evaluate(self, listing: ProductListing) -> Optional[ComplianceIssue]:
+    def evaluate_context(self, context: ListingContext) -> Optional[ComplianceIssue]:
+        listing = context.listing
         if not listing.keywords:
             return None # No keywords to check against
         
-        missing_keywords = [kw for kw in listing.keywords if kw.lower() not in listing.title.lower()]
+        missing_keywords = [kw for kw in listing.keywords if kw.lower() not in context.title_lower]
         if len(missing_keywords) == len(listing.keywords) and listing.keywords: # If all primary keywords are missing
             return ComplianceIssue(
                 self.rule_id,
@@ -196,22 +425,26 @@ class KeywordInTitleRule(ComplianceRule):
         return None
 
 class KeywordInDescriptionRule(ComplianceRule):
+    fields = ("description", "keywords")
+
     def __init__(self, rule_id: str, min_occurrences: int = 1, severity: str = "SEO_SUGGESTION", weight: float = 2.0):
         super().__init__(rule_id, f"Primary keywords should appear at least {min_occurrences} time(s) in the description.", severity, weight)
         self.min_occurrences = min_occurrences
 
-    def evaluate(self, listing: ProductListing) -> Optional[ComplianceIssue]:
+    def evaluate_context(self, context: ListingContext) -> Optional[ComplianceIssue]:
+        listing = context.listing
         if not listing.keywords:
             return None
 
         for keyword in listing.keywords:
             # Simple count, could be improved with regex for whole words
-            if listing.description.lower().count(keyword.lower()) < self.min_occurrences:
+            occurrences = context.description_keyword_count(keyword)
+            if occurrences < self.min_occurrences:
                 return ComplianceIssue(
                     self.rule_id,
                     f"Keyword '{keyword}' appears less than {self.min_occurrences} time(s) in the description. Consider adding it more for SEO.",
                     self.severity,
-                    details={"keyword": keyword, "current_occurrences": listing.description.lower().count(keyword.lower())}
+                    details={"keyword": keyword, "current_occurrences": occurrences}
                 )
         return None
 
@@ -228,6 +461,145 @@ class MarketplaceProfile:
     def add_rule(self, rule: ComplianceRule):
         self.rules.append(rule)
 
+    def compile(self) -> "CompiledProfile":
+        """Prepares the profile for checking many listings (see CompiledProfile)."""
+        return CompiledProfile(self)
+
+
+class CompiledProfile:
+    """
+    A marketplace profile prepared for repeated checks.
+
+    The forbidden words of all rules are folded into one ForbiddenWordMatcher
+    built up front, and every listing is analysed once into a ListingContext that
+    all rules share.
+    """
+
+    def __init__(self, profile: MarketplaceProfile):
+        self.profile = profile
+        self.rules = list(profile.rules)
+        words: List[str] = []
+        for rule in self.rules:
+            words.extend(rule.forbidden_words())
+        self.forbidden_matcher = ForbiddenWordMatcher(words)
+
+    def context(self, listing: ProductListing) -> ListingContext:
+        return ListingContext(listing, self.forbidden_matcher)
+
+    def evaluate(self, listing: ProductListing,
+                 rules: Optional[List[ComplianceRule]] = None) -> List[Tuple[ComplianceRule, Optional[ComplianceIssue]]]:
+        """
+        Args:
+            listing: The listing to check.
+            rules: Subset of the profile's rules to evaluate; all of them if None.
+
+        Returns:
+            One (rule, issue or None) pair per evaluated rule, in profile order.
+        """
+        context = self.context(listing)
+        return [(rule, rule.evaluate_context(context)) for rule in (self.rules if rules is None else rules)]
+
+# --- Instrumentation ---
+
+class RuleStats:
+    """
+    Evaluation count, violations and latency of one rule.
+
+    Latencies are kept as a uniform reservoir sample of at most sample_size
+    values, so p50/p99 stay representative over arbitrarily long runs at a
+    fixed memory cost.
+    """
+
+    def __init__(self, rule: ComplianceRule, sample_size: int = 1024):
+        self.rule_id = rule.rule_id
+        self.rule_type = type(rule).__name__
+        self.severity = rule.severity
+        self.sample_size = sample_size
+        self.evaluations = 0
+        self.violations = 0
+        self.total_ns = 0
+        self.samples: List[int] = []
+        self._random = random.Random(0)
+
+    def record(self, elapsed_ns: int, violated: bool) -> None:
+        self.evaluations += 1
+        self.violations += violated
+        self.total_ns += elapsed_ns
+        if len(self.samples) < self.sample_size:
+            self.samples.append(elapsed_ns)
+        else:
+            slot = self._random.randrange(self.evaluations)
+            if slot < self.sample_size:
+                self.samples[slot] = elapsed_ns
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile of the sampled latencies, in nanoseconds."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return float(ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))])
+
+    def to_dict(self, total_ns: int = 0) -> Dict[str, Any]:
+        return {
+            "rule_id": self.rule_id,
+            "rule_type": self.rule_type,
+            "severity": self.severity,
+            "evaluations": self.evaluations,
+            "violations": self.violations,
+            "violation_rate": self.violations / self.evaluations if self.evaluations else 0.0,
+            "total_ms": self.total_ns / 1e6,
+            "time_share": self.total_ns / total_ns if total_ns else 0.0,
+            "mean_us": self.total_ns / self.evaluations / 1e3 if self.evaluations else 0.0,
+            "p50_us": self.percentile(50) / 1e3,
+            "p99_us": self.percentile(99) / 1e3,
+        }
+
+
+class RuleMetrics:
+    """
+    Thread-safe per-rule statistics collected by an instrumented ECIChecker.
+
+    With a compiled profile, rules share the listing's derived values, so the
+    first rule reading e.g. the lowercased description is also charged for
+    computing it.
+    """
+
+    def __init__(self, sample_size: int = 1024):
+        self.sample_size = sample_size
+        self.listings = 0
+        self.rules: Dict[str, RuleStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timings: List[Tuple[ComplianceRule, int, bool]]) -> None:
+        """Records the (rule, elapsed ns, violated) timings of one listing."""
+        with self._lock:
+            self.listings += 1
+            for rule, elapsed_ns, violated in timings:
+                stats = self.rules.get(rule.rule_id)
+                if stats is None:
+                    stats = self.rules[rule.rule_id] = RuleStats(rule, self.sample_size)
+                stats.record(elapsed_ns, violated)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.listings = 0
+            self.rules = {}
+
+    def snapshot(self, sort_by: str = "total_ms") -> Dict[str, Any]:
+        """
+        Args:
+            sort_by: Key of the per-rule dicts to sort by, descending.
+
+        Returns:
+            Number of checked listings and one stats dict per rule.
+        """
+        with self._lock:
+            total_ns = sum(stats.total_ns for stats in self.rules.values())
+            rules = [stats.to_dict(total_ns) for stats in self.rules.values()]
+            listings = self.listings
+        rules.sort(key=lambda stats: stats[sort_by], reverse=True)
+        return {"listings": listings, "total_ms": total_ns / 1e6, "rules": rules}
+
 # --- ECI Checker ---
 
 @dataclass
@@ -240,6 +612,8 @@ class ComplianceReport:
     compliance_score: float  # Score from 0.0 to 100.0
     issues: List[ComplianceIssue] = field(default_factory=list)
     is_compliant: bool = True # Overall compliance status based on critical issues
+    rule_results: Dict[str, Optional[ComplianceIssue]] = field(default_factory=dict, repr=False)  # Outcome per rule_id
+    evaluated_rules: List[str] = field(default_factory=list, repr=False)  # Rules actually run for this report
 
     def __str__(self):
         report_str = f"--- Compliance Report for Listing '{self.listing_id}' on '{self.marketplace_name}' ---\n"
@@ -261,24 +635,54 @@ class ECIChecker:
     """
     Performs compliance and SEO checks on a product listing against a marketplace profile.
     """
-    def __init__(self, marketplace_profile: MarketplaceProfile):
-        self.marketplace_profile = marketplace_profile
-
-    def check_listing_compliance(self, listing: ProductListing) -> ComplianceReport:
+    def __init__(self, marketplace_profile: MarketplaceProfile, compiled: bool = True, instrument: bool = False):
         """
-        Checks the given product listing against all rules in the marketplace profile.
-
-        Returns:
-            A ComplianceReport object with the score and list of issues.
+        Args:
+            marketplace_profile: The rules to check against.
+            compiled: Analyse each listing once and share it across rules (see CompiledProfile).
+                      If False, every rule evaluates the raw listing on its own.
+            instrument: Time every rule evaluation and count violations in self.metrics.
         """
+        self.marketplace_profile = marketplace_profile
+        self.compiled_profile = marketplace_profile.compile() if compiled else None
+        self.metrics = RuleMetrics() if instrument else None
+
+    def evaluate_rules(self, listing: ProductListing,
+                       rules: List[ComplianceRule]) -> List[Tuple[ComplianceRule, Optional[ComplianceIssue]]]:
+        if self.metrics is not None:
+            return self._evaluate_instrumented(listing, rules)
+        if self.compiled_profile is not None:
+            return self.compiled_profile.evaluate(listing, rules)
+        return [(rule, rule.evaluate(listing)) for rule in rules]
+
+    def _evaluate_instrumented(self, listing: ProductListing,
+                               rules: List[ComplianceRule]) -> List[Tuple[ComplianceRule, Optional[ComplianceIssue]]]:
+        if self.compiled_profile is not None:
+            context = self.compiled_profile.context(listing)
+            evaluate = lambda rule: rule.evaluate_context(context)
+        else:
+            evaluate = lambda rule: rule.evaluate(listing)
+        clock = time.perf_counter_ns
+        results = []
+        timings = []
+        for rule in rules:
+            start = clock()
+            issue = evaluate(rule)
+            timings.append((rule, clock() - start, issue is not None))
+            results.append((rule, issue))
+        self.metrics.record(timings)
+        return results
+
+    def build_report(self, listing: ProductListing, results: List[Tuple[ComplianceRule, Optional[ComplianceIssue]]],
+                     evaluated_rules: List[str]) -> ComplianceReport:
+        """Scores the (rule, issue or None) results of a listing into a ComplianceReport."""
         issues_found: List[ComplianceIssue] = []
         total_possible_weight = 0
         achieved_weight = 0
         has_critical_issues = False
 
-        for rule in self.marketplace_profile.rules:
+        for rule, issue in results:
             total_possible_weight += rule.weight
-            issue = rule.evaluate(listing)
             if issue:
                 issues_found.append(issue)
                 if issue.severity == "CRITICAL":
@@ -298,9 +702,117 @@ class ECIChecker:
             marketplace_name=self.marketplace_profile.marketplace_name,
             compliance_score=compliance_score,
             issues=issues_found,
-            is_compliant=not has_critical_issues
+            is_compliant=not has_critical_issues,
+            rule_results={rule.rule_id: issue for rule, issue in results},
+            evaluated_rules=evaluated_rules,
         )
 
+    def check_listing_compliance(self, listing: ProductListing) -> ComplianceReport:
+        """
+        Checks the given product listing against all rules in the marketplace profile.
+
+        Returns:
+            A ComplianceReport object with the score and list of issues.
+        """
+        rules = self.marketplace_profile.rules
+        return self.build_report(listing, self.evaluate_rules(listing, rules), [rule.rule_id for rule in rules])
+
+    def recheck_listing_compliance(self, listing: ProductListing, stored_rule_results: Optional[Dict[str, Any]],
+                                   changed: Iterable[str]) -> ComplianceReport:
+        """
+        Checks an edited listing, re-evaluating only the rules that depend on a changed field.
+
+        Rules without a usable stored result (new or reconfigured since it was
+        stored) are evaluated as well; every other rule keeps its stored outcome.
+
+        Args:
+            listing: The listing as it is now.
+            stored_rule_results: Output of serialize_rule_results for the previous check.
+            changed: ProductListing fields changed since that check (see changed_fields).
+
+        Returns:
+            A ComplianceReport over all rules; evaluated_rules lists the ones that were run.
+        """
+        changed = set(changed)
+        previous = self.load_rule_results(stored_rule_results)
+        rules = self.marketplace_profile.rules
+        to_run = [rule for rule in rules if rule.rule_id not in previous or rule.depends_on(changed)]
+        fresh = {rule.rule_id: issue for rule, issue in self.evaluate_rules(listing, to_run)}
+        results = [
+            (rule, fresh[rule.rule_id] if rule.rule_id in fresh else previous[rule.rule_id])
+            for rule in rules
+        ]
+        return self.build_report(listing, results, [rule.rule_id for rule in to_run])
+
+    @cached_property
+    def rule_digests(self) -> Dict[str, str]:
+        return {rule.rule_id: rule.config_digest() for rule in self.marketplace_profile.rules}
+
+    def serialize_rule_results(self, report: ComplianceReport) -> Dict[str, Any]:
+        """
+        Returns:
+            The per-rule outcomes of a report as plain values, tagged with each rule's config digest.
+        """
+        digests = self.rule_digests
+        return {
+            rule_id: {"config": digests.get(rule_id), "issue": issue.to_dict() if issue else None}
+            for rule_id, issue in report.rule_results.items()
+        }
+
+    def load_rule_results(self, stored: Optional[Dict[str, Any]]) -> Dict[str, Optional[ComplianceIssue]]:
+        """
+        Inverse of serialize_rule_results, dropping results of rules that were since reconfigured or removed.
+        """
+        digests = self.rule_digests
+        results: Dict[str, Optional[ComplianceIssue]] = {}
+        for rule_id, stored_result in (stored or {}).items():
+            if digests.get(rule_id) is None or stored_result.get("config") != digests[rule_id]:
+                continue
+            issue = stored_result.get("issue")
+            results[rule_id] = ComplianceIssue(**issue) if issue else None
+        return results
+
+# --- Default Marketplace Profiles ---
+
+def build_amazon_profile() -> MarketplaceProfile:
+    amazon_profile = MarketplaceProfile(marketplace_name="Amazon")
+    amazon_profile.add_rule(TitleLengthRule("AMZ_TITLE_LEN", min_length=10, max_length=70, weight=10))
+    amazon_profile.add_rule(TitleCapitalizationRule("AMZ_TITLE_CASE", severity="INFO", weight=1))
+    amazon_profile.add_rule(TitleForbiddenWordsRule("AMZ_TITLE_FORBIDDEN", forbidden_words=["FAST", "Special Edition"], weight=5))
+    amazon_profile.add_rule(DescriptionLengthRule("AMZ_DESC_LEN", min_length=100, weight=8))
+    amazon_profile.add_rule(DescriptionHtmlCheckRule("AMZ_DESC_HTML", allow_html=False, weight=3))
+    amazon_profile.add_rule(ImageCountRule("AMZ_IMG_COUNT", min_images=3, max_images=7, weight=10))
+    amazon_profile.add_rule(RequiredAttributeRule("AMZ_ATTR_BRAND", attribute_name="brand", weight=7))
+    amazon_profile.add_rule(RequiredAttributeRule("AMZ_ATTR_COLOR", attribute_name="color", severity="WARNING", weight=3))
+    amazon_profile.add_rule(KeywordInTitleRule("AMZ_SEO_KEY_TITLE", weight=5))
+    amazon_profile.add_rule(KeywordInDescriptionRule("AMZ_SEO_KEY_DESC", min_occurrences=2, weight=3))
+    return amazon_profile
+
+
+def build_flipkart_profile() -> MarketplaceProfile:
+    # Example with slightly different rules
+    flipkart_profile = MarketplaceProfile(marketplace_name="Flipkart")
+    flipkart_profile.add_rule(TitleLengthRule("FLP_TITLE_LEN", min_length=5, max_length=60, weight=10))
+    flipkart_profile.add_rule(DescriptionLengthRule("FLP_DESC_LEN", min_length=50, weight=8))
+    flipkart_profile.add_rule(ImageCountRule("FLP_IMG_COUNT", min_images=2, max_images=5, weight=10))
+    flipkart_profile.add_rule(RequiredAttributeRule("FLP_ATTR_BRAND", attribute_name="brand", weight=7))
+    flipkart_profile.add_rule(KeywordInTitleRule("FLP_SEO_KEY_TITLE", weight=5))
+    return flipkart_profile
+
+
+PROFILE_BUILDERS = {
+    "amazon": build_amazon_profile,
+    "flipkart": build_flipkart_profile,
+}
+
+
+def build_profile(name: str) -> MarketplaceProfile:
+    """Builds one of the default profiles by name (see PROFILE_BUILDERS)."""
+    try:
+        return PROFILE_BUILDERS[name.lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown marketplace profile '{name}'. Available: {', '.join(PROFILE_BUILDERS)}")
+
 # --- Example Usage ---
 if __name__ == "__main__":
     # 1. Define a Product Listing
@@ -331,26 +843,8 @@ if __name__ == "__main__":
 
     # 2. Create Marketplace Profiles with Rules
 
-    # Amazon Profile
-    amazon_profile = MarketplaceProfile(marketplace_name="Amazon")
-    amazon_profile.add_rule(TitleLengthRule("AMZ_TITLE_LEN", min_length=10, max_length=70, weight=10))
-    amazon_profile.add_rule(TitleCapitalizationRule("AMZ_TITLE_CASE", severity="INFO", weight=1))
-    amazon_profile.add_rule(TitleForbiddenWordsRule("AMZ_TITLE_FORBIDDEN", forbidden_words=["FAST", "Special Edition"], weight=5))
-    amazon_profile.add_rule(DescriptionLengthRule("AMZ_DESC_LEN", min_length=100, weight=8))
-    amazon_profile.add_rule(DescriptionHtmlCheckRule("AMZ_DESC_HTML", allow_html=False, weight=3))
-    amazon_profile.add_rule(ImageCountRule("AMZ_IMG_COUNT", min_images=3, max_images=7, weight=10))
-    amazon_profile.add_rule(RequiredAttributeRule("AMZ_ATTR_BRAND", attribute_name="brand", weight=7))
-    amazon_profile.add_rule(RequiredAttributeRule("AMZ_ATTR_COLOR", attribute_name="color", severity="WARNING", weight=3))
-    amazon_profile.add_rule(KeywordInTitleRule("AMZ_SEO_KEY_TITLE", weight=5))
-    amazon_profile.add_rule(KeywordInDescriptionRule("AMZ_SEO_KEY_DESC", min_occurrences=2, weight=3))
-
-    # Flipkart Profile (example with slightly different rules)
-    flipkart_profile = MarketplaceProfile(marketplace_name="Flipkart")
-    flipkart_profile.add_rule(TitleLengthRule("FLP_TITLE_LEN", min_length=5, max_length=60, weight=10))
-    flipkart_profile.add_rule(DescriptionLengthRule("FLP_DESC_LEN", min_length=50, weight=8))
-    flipkart_profile.add_rule(ImageCountRule("FLP_IMG_COUNT", min_images=2, max_images=5, weight=10))
-    flipkart_profile.add_rule(RequiredAttributeRule("FLP_ATTR_BRAND", attribute_name="brand", weight=7))
-    flipkart_profile.add_rule(KeywordInTitleRule("FLP_SEO_KEY_TITLE", weight=5))
+    amazon_profile = build_amazon_profile()
+    flipkart_profile = build_flipkart_profile()
 
 
     # 3. Create ECI Checkers
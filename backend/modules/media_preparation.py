@@ -0,0 +1,189 @@
+import base64
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, Optional
+from PIL import Image, ImageOps
+try:
+    from modules.content_hash import file_sha256
+except ImportError:
+    from content_hash import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Longest side each model family actually looks at; larger inputs are downscaled
+# by the provider anyway, so sending more pixels only costs upload time.
+MODEL_MAX_SIDE = {
+    "gemini": 1536,
+    "llava": 672,
+}
+
+DEFAULT_JPEG_QUALITY = 85
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """An image resized and re-encoded for a model request."""
+    source_sha256: str
+    data: bytes
+    width: int
+    height: int
+    mime_type: str = "image/jpeg"
+
+    def to_base64(self) -> str:
+        """Returns the encoded image as a base64 string (e.g. for Ollama)."""
+        return base64.b64encode(self.data).decode('utf-8')
+
+    def as_blob(self) -> Dict[str, object]:
+        """Returns the image as an inline blob accepted by the Gemini SDK."""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+
+class MediaPreparer:
+    """
+    Downscales, strips metadata from and JPEG-encodes images before they are sent
+    to a model, caching the encoded payload per content hash.
+
+    The encoded bytes are kept in a small in-memory LRU and, if a media store is
+    given, in that store, so an image is only decoded and re-encoded once and the
+    prepared files on disk share the store's size limit and LRU eviction.
+    """
+
+    def __init__(self, max_side: int = MODEL_MAX_SIDE["gemini"], quality: int = DEFAULT_JPEG_QUALITY,
+                 store=None, memory_items: int = 128):
+        """
+        Args:
+            max_side (int): Longest side in pixels of the prepared image.
+            quality (int): JPEG quality of the prepared image.
+            store: Content-addressed store for encoded payloads with lookup, put_file, get_memo and
+                set_memo (e.g. the app's MediaStore); memory only if None.
+            memory_items (int): Number of payloads kept in memory.
+        """
+        self.max_side = max_side
+        self.quality = quality
+        self.store = store
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def variant(self) -> str:
+        """Identifies the preparation settings, e.g. for response cache keys."""
+        return f"jpeg-{self.max_side}-q{self.quality}"
+
+    def encode(self, image: Image.Image) -> PreparedImage:
+        """
+        Resizes and re-encodes an already opened image without caching.
+
+        The EXIF orientation is applied before metadata is dropped, so rotated phone
+        photos stay upright. Transparent images are flattened onto white.
+        """
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        if max(image.size) > self.max_side:
+            image = image.copy()
+            image.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+
+        buffered = BytesIO()
+        # Saving without exif/icc_profile drops all metadata
+        image.save(buffered, format="JPEG", quality=self.quality, optimize=True)
+        return PreparedImage("", buffered.getvalue(), image.width, image.height)
+
+    @property
+    def memo_kind(self) -> str:
+        # Maps a source hash to the hash of its prepared version in the store
+        return f"prepared-{self.variant}"
+
+    def _stored_path(self, sha256: str) -> Optional[str]:
+        if self.store is None:
+            return None
+        found, prepared_sha256 = self.store.get_memo(sha256, self.memo_kind)
+        return self.store.lookup(prepared_sha256) if found else None
+
+    def _store(self, sha256: str, data: bytes) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.store.root, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            prepared_sha256, _ = self.store.put_file(temp_path, ext='.jpg', move=True)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.store.set_memo(sha256, self.memo_kind, prepared_sha256)
+
+    def _remember(self, key: str, prepared: PreparedImage) -> None:
+        with self._lock:
+            self._memory[key] = prepared
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def prepare(self, image_path: str, sha256: Optional[str] = None) -> PreparedImage:
+        """
+        Returns the prepared version of an image file, encoding it only on a cache miss.
+
+        Args:
+            image_path (str): Path to the image file.
+            sha256 (Optional[str]): Content hash of the file, if already known.
+
+        Returns:
+            PreparedImage: The encoded image.
+
+        Raises:
+            FileNotFoundError: If the image_path does not exist.
+        """
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Image file not found at path: {image_path}")
+        sha256 = sha256 or file_sha256(image_path)
+        key = f"{sha256}-{self.variant}"
+
+        with self._lock:
+            prepared = self._memory.get(key)
+            if prepared is not None:
+                self._memory.move_to_end(key)
+                return prepared
+
+        stored_path = self._stored_path(sha256)
+        if stored_path:
+            with open(stored_path, 'rb') as f:
+                data = f.read()
+            with Image.open(BytesIO(data)) as img:
+                prepared = PreparedImage(sha256, data, img.width, img.height)
+            self._remember(key, prepared)
+            return prepared
+
+        with Image.open(image_path) as img:
+            encoded = self.encode(img)
+        prepared = PreparedImage(sha256, encoded.data, encoded.width, encoded.height)
+        logger.debug(f"Prepared {image_path}: {os.path.getsize(image_path)} -> {len(prepared.data)} bytes")
+
+        if self.store is not None:
+            self._store(sha256, prepared.data)
+        self._remember(key, prepared)
+        return prepared
+
+
+_preparers: Dict[tuple, MediaPreparer] = {}
+_preparers_lock = threading.Lock()
+
+
+def get_media_preparer(max_side: int = MODEL_MAX_SIDE["gemini"], quality: int = DEFAULT_JPEG_QUALITY,
+                       store=None) -> MediaPreparer:
+    """Returns a shared MediaPreparer for the given settings."""
+    key = (max_side, quality, id(store))
+    with _preparers_lock:
+        preparer = _preparers.get(key)
+        if preparer is None:
+            preparer = MediaPreparer(max_side=max_side, quality=quality, store=store)
+            _preparers[key] = preparer
+        return preparer
@@ -2,8 +2,13 @@ import ollama
 import base64
 import os
 import logging
+from typing import Optional, Tuple
 from PIL import Image
 from io import BytesIO
+try:
+    from modules.media_preparation import MODEL_MAX_SIDE, get_media_preparer
+except ImportError:
+    from media_preparation import MODEL_MAX_SIDE, get_media_preparer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -17,12 +22,16 @@ class ImageHelper:
     """Helper class for image-related operations."""
 
     @staticmethod
-    def encode_image_to_base64(image_path: str) -> str:
+    def encode_image_to_base64(image_path: str, max_side: int = MODEL_MAX_SIDE["llava"]) -> str:
         """
-        Encodes an image file to a base64 string.
+        Encodes an image file to a base64 JPEG string, downscaled for the model.
+
+        The encoded payload is cached per content hash, so repeated calls for the
+        same image do not decode and re-encode it again.
 
         Args:
             image_path (str): The path to the image file.
+            max_side (int): Longest side in pixels of the encoded image.
 
         Returns:
             str: The base64 encoded string of the image.
@@ -31,18 +40,10 @@ class ImageHelper:
             FileNotFoundError: If the image_path does not exist.
             IOError: If there's an error opening or reading the image.
         """
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image file not found at path: {image_path}")
         try:
-            with Image.open(image_path) as img:
-                # Ensure image is in a common format like RGB before saving to buffer
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                buffered = BytesIO()
-                img.save(buffered, format="JPEG") # Or PNG
-                img_byte = buffered.getvalue()
-                return base64.b64encode(img_byte).decode('utf-8')
+            return get_media_preparer(max_side=max_side).prepare(image_path).to_base64()
+        except FileNotFoundError:
+            raise
         except IOError as e:
             raise IOError(f"Error processing image file {image_path}: {e}")
 
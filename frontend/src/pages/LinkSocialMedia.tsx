@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { useAuth } from "@clerk/clerk-react";
 import Modal from "./Modal";
+import { runBackendJob } from "../services/api";
 import { Link } from 'react-router-dom';
 import {
     enable as enableDarkMode,
@@ -451,30 +452,14 @@ const LinkSocialMedia: React.FC = () => {
         setConvertingLink(post_link);
         setError(null);
         try {
-            const token = await getToken();
             const requestBody = {
                 video_url: video_url
             };
 
-            const response = await fetch(
-                `${import.meta.env.VITE_BACKEND_API_URL}/convert_video_to_images`,
-                {
-                    method: "POST",
-                    headers: {
-                        Authorization: `Bearer ${token}`,
-                        "Content-Type": "application/json",
-                    },
-                    body: JSON.stringify(requestBody),
-                }
-            );
-
-            if (!response.ok) {
-                throw new Error("Failed to convert Instagram post to product listing");
-            }
-
-            const data = await response.json();
+            // Frame extraction runs as a background job; wait for its result
+            const data = await runBackendJob("jobs/convert_video_to_images", requestBody, getToken);
             const image_url = data.quality_images;
-            convertToProductListing(post_link, image_url, description);
+            await convertToProductListing(post_link, image_url, description);
             fetchPreviousListings();
             fetchProductData();
             setSuccessMessage(`Successfully converted to product listing: ${post_link}`);
@@ -539,28 +524,14 @@ const LinkSocialMedia: React.FC = () => {
         }
 
         try {
-            const token = await getToken(); // Replace with your token retrieval method
             const requestBody = {
                 post_link: post_link,
                 image_url: image_url, // list of string
                 description: description // string
             };
 
-            const response = await fetch(
-                `${import.meta.env.VITE_BACKEND_API_URL}/social2amazon`,
-                {
-                    method: "POST",
-                    headers: {
-                        Authorization: `Bearer ${token}`,
-                        "Content-Type": "application/json",
-                    },
-                    body: JSON.stringify(requestBody),
-                }
-            );
-
-            if (!response.ok) {
-                throw new Error("Failed to convert Instagram post to product listing");
-            }
+            // The listing is generated by a background job; wait until it is stored
+            await runBackendJob("jobs/social2amazon", requestBody, getToken);
             fetchPreviousListings();
             fetchProductData();
             if (post_link?.includes("instagram")) {
@@ -14,4 +14,47 @@ export const getFullMediaUrl = (path: string): string => {
   
   // Construct full URL with port
   return `${API_BASE_URL}/${cleanPath}`;
-};
\ No newline at end of file
+};
+type TokenGetter = () => Promise<string | null>;
+
+// Submit a long-running conversion to one of the backend's job endpoints and
+// wait for its result. Conversions run on the job workers, so no request
+// stays open long enough to hit the server timeout. A fresh token is fetched
+// for every poll because session tokens are short-lived.
+export const runBackendJob = async (
+  submitPath: string,
+  body: object,
+  getToken: TokenGetter,
+  { pollIntervalMs = 2000, timeoutMs = 15 * 60 * 1000 } = {}
+): Promise<any> => {
+  const request = async (path: string, init: RequestInit = {}) =>
+    fetch(`${API_BASE_URL}/${path}`, {
+      ...init,
+      headers: {
+        Authorization: `Bearer ${await getToken()}`,
+        "Content-Type": "application/json",
+      },
+    });
+
+  const submitted = await request(submitPath, { method: "POST", body: JSON.stringify(body) });
+  const job = await submitted.json();
+  if (!submitted.ok || !job.job_id) {
+    throw new Error(job.message || "Failed to queue the job");
+  }
+
+  const deadline = Date.now() + timeoutMs;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+    const response = await request(`jobs/${job.job_id}/result`);
+    if (response.status === 202) {
+      continue; // Still queued or running
+    }
+    const data = await response.json();
+    // 422 means the job itself failed (data.error); other errors come from the request
+    if (!response.ok) {
+      throw new Error(data.message || "Job failed");
+    }
+    return data;
+  }
+  throw new Error("Timed out waiting for the job to finish");
+};